@@ -13,7 +13,8 @@ The *config* function will keep connection information inside the
     databases connections.
 """
 
-from . import db
+from . import cache, db
+from .identity import Session, session
 
 __version__ = "0.1.1"
 
@@ -27,11 +28,19 @@ def config(  # pylint: disable=too-many-arguments
     timeout: int = db.TIMEOUT,
     ssl: dict = db.SSL,
     soft_delete=db.SOFT_DELETE,
+    pool_min_size: int = db.POOL_MIN_SIZE,
+    pool_max_size: int = db.POOL_MAX_SIZE,
+    pool_idle_timeout: float = db.POOL_IDLE_TIMEOUT,
+    pool_wait_timeout: float = db.POOL_WAIT_TIMEOUT,
 ):
     """Configure database connection.
 
     This **must** be called **before** any Model method call **or** use
     environment variables as described in :mod:`rethinkmodel.db`.
+
+    The connection pool is reset, connections that are in use are closed
+    once they are released. The caches of :mod:`rethinkmodel.cache` are
+    cleared.
     """
     db.USER = user
     db.PASSWORD = password
@@ -41,3 +50,9 @@ def config(  # pylint: disable=too-many-arguments
     db.TIMEOUT = timeout
     db.SSL = ssl
     db.SOFT_DELETE = soft_delete
+    db.POOL_MIN_SIZE = pool_min_size
+    db.POOL_MAX_SIZE = pool_max_size
+    db.POOL_IDLE_TIMEOUT = pool_idle_timeout
+    db.POOL_WAIT_TIMEOUT = pool_wait_timeout
+    db.reset_pool()
+    cache.reset_caches()
@@ -0,0 +1,286 @@
+"""Read-through cache of :meth:`rethinkmodel.model.Model.get`.
+
+The cache is activated per model with
+:meth:`rethinkmodel.model.BaseModel.get_cache_options`:
+
+.. code::
+
+    class Country(Model):
+        name: str
+
+        @classmethod
+        def get_cache_options(cls):
+            return {"max_size": 500, "ttl": 300}
+
+Documents read by :code:`Country.get(id)` are kept in memory, the least
+recently used ones are evicted when there are more than :code:`max_size`
+documents, and a document is read again after :code:`ttl` seconds.
+
+The cache is kept coherent by a changefeed on the table, shared with
+:meth:`rethinkmodel.model.Model.subscribe`: cached documents are updated when
+they change, and evicted when they are deleted or soft deleted. When the
+changefeed is not available, or when changes were lost, the cache is cleared
+and not used until the changefeed is opened again. The writes of the process
+evict the documents immediately, without waiting for the changefeed.
+
+Use :code:`Country.get(id, cache=False)` to read the database, and
+:meth:`rethinkmodel.model.Model.cache_stats` to get the counters.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from rethinkdb import errors
+
+from . import db
+from .feed import Subscription, get_hub
+
+# accepted keys of get_cache_options()
+CACHE_OPTIONS = ("max_size", "ttl", "feed_size")
+
+
+class DocumentCache:  # pylint: disable=too-many-instance-attributes
+    """LRU cache of documents, invalidated by a changefeed.
+
+    - :code:`max_size`: maximum number of documents
+    - :code:`ttl`: seconds before a document expires, :code:`None` to keep
+      documents until they are evicted or changed
+    - :code:`feed_size`: size of the changefeed queue, when more changes are
+      waiting the cache is cleared
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        max_size: int = 1000,
+        ttl: Optional[float] = None,
+        feed_size: int = db.FEED_QUEUE_SIZE,
+    ):
+        """Create an empty cache, the changefeed is opened on first use."""
+        if max_size < 1:
+            raise ValueError("The cache max_size must be greater than 0")
+
+        self.model = model
+        self.max_size = max_size
+        self.ttl = ttl
+        self.feed_size = feed_size
+
+        self.__entries: "OrderedDict[Any, Tuple[dict, float]]" = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__watch_lock = threading.Lock()
+        self.__subscription: Optional[Subscription] = None
+
+        # incremented when every document is invalidated, a document read
+        # before is not stored as it may be outdated
+        self.__epoch = 0
+
+        # reads in progress per key, with the number of readers and a version
+        # that is incremented when the document changes, see reserve()
+        self.__reads: Dict[Any, List[int]] = {}
+
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__invalidations = 0
+
+    def __watch(self) -> bool:
+        """Open the changefeed if needed, return :code:`False` if it failed."""
+        with self.__watch_lock:
+            if self.__subscription is not None:
+                return True
+            try:
+                subscription = get_hub().subscribe(
+                    self.model, maxsize=self.feed_size, policy="coalesce"
+                )
+            except (errors.ReqlError, OSError):
+                return False
+
+            with self.__lock:
+                self.__subscription = subscription
+                self.__epoch += 1
+            threading.Thread(
+                target=self.__invalidate,
+                args=(subscription,),
+                name=f"rethinkmodel-cache-{self.model.tablename}",
+                daemon=True,
+            ).start()
+            return True
+
+    def __invalidate(self, subscription: Subscription):
+        """Apply the changes of the table until the subscription is closed."""
+        dropped = 0
+        try:
+            while True:
+                change = subscription.get_raw()
+                if subscription.dropped != dropped:
+                    # some changes are lost
+                    dropped = subscription.dropped
+                    self.clear()
+                    continue
+                self.__apply(change)
+        except Exception:  # pylint: disable=broad-except
+            pass
+        finally:
+            with self.__lock:
+                if self.__subscription is subscription:
+                    self.__subscription = None
+                self.__entries.clear()
+                self.__epoch += 1
+
+    def __changed(self, key: Any):
+        """Invalidate the reads in progress of a document, lock must be held."""
+        reads = self.__reads.get(key)
+        if reads is not None:
+            reads[1] += 1
+
+    def __apply(self, change: dict):
+        """Update or evict the document of a change."""
+        new = change.get("new_val")
+        old = change.get("old_val")
+        key = (new or old or {}).get("id")
+        with self.__lock:
+            self.__changed(key)
+            if key not in self.__entries:
+                return
+            self.__invalidations += 1
+            if new is None or new.get("deleted_on") is not None:
+                del self.__entries[key]
+            else:
+                self.__entries[key] = (copy.deepcopy(new), time.monotonic())
+
+    def get(self, key: Any) -> Optional[dict]:
+        """Return a copy of the cached document, or :code:`None`."""
+        if not self.__watch():
+            with self.__lock:
+                self.__misses += 1
+            return None
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and self.ttl is not None:
+                if time.monotonic() - entry[1] > self.ttl:
+                    del self.__entries[key]
+                    self.__evictions += 1
+                    entry = None
+            if entry is None:
+                self.__misses += 1
+                return None
+
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return copy.deepcopy(entry[0])
+
+    def reserve(self, key: Any) -> Tuple[int, int]:
+        """Start a read of the document in database.
+
+        Return the token to give to :meth:`put`, that must be called when
+        the read ends.
+        """
+        with self.__lock:
+            reads = self.__reads.setdefault(key, [0, 0])
+            reads[0] += 1
+            return self.__epoch, reads[1]
+
+    def put(self, key: Any, document: Optional[dict], token: Tuple[int, int]):
+        """End the read started by :meth:`reserve`, and store the document.
+
+        The document is not stored if it's :code:`None`, or if it changed, or
+        the cache was cleared, since the read started. Changes of other
+        documents do not prevent to store it.
+        """
+        with self.__lock:
+            reads = self.__reads[key]
+            reads[0] -= 1
+            current = (self.__epoch, reads[1])
+            if not reads[0]:
+                del self.__reads[key]
+            if document is None or self.__subscription is None or token != current:
+                return
+            self.__entries[key] = (copy.deepcopy(document), time.monotonic())
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+
+    def evict(self, *keys: Any):
+        """Remove documents that are written by this process.
+
+        It's called by the write methods of models, so that a read that
+        follows a write does not get the old document before the changefeed
+        updates the cache.
+        """
+        with self.__lock:
+            for key in keys:
+                self.__changed(key)
+                self.__entries.pop(key, None)
+
+    def clear(self):
+        """Remove every document."""
+        with self.__lock:
+            self.__entries.clear()
+            self.__epoch += 1
+
+    def close(self):
+        """Clear the cache and close the changefeed."""
+        with self.__watch_lock:
+            with self.__lock:
+                subscription, self.__subscription = self.__subscription, None
+                self.__entries.clear()
+                self.__epoch += 1
+            if subscription is not None:
+                subscription.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache statistics.
+
+        - size: number of cached documents
+        - hits: documents returned from the cache
+        - misses: documents that were not in the cache
+        - evictions: documents removed because of the size or the ttl
+        - invalidations: cached documents that were updated or removed because
+          they changed in the database
+        """
+        with self.__lock:
+            return {
+                "size": len(self.__entries),
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "evictions": self.__evictions,
+                "invalidations": self.__invalidations,
+                "max_size": self.max_size,
+            }
+
+
+_CACHES: Dict[Any, DocumentCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_cache(model: Any) -> Optional[DocumentCache]:
+    """Return the cache of a model, or :code:`None` if it's not activated."""
+    options = model.get_cache_options()
+    if not options:
+        return None
+
+    with _CACHES_LOCK:
+        cache = _CACHES.get(model)
+        if cache is None:
+            unknown = set(options) - set(CACHE_OPTIONS)
+            if unknown:
+                raise ValueError(
+                    f"Unknown cache options for {model.__name__}: "
+                    f"{', '.join(sorted(unknown))}"
+                )
+            cache = DocumentCache(model, **options)
+            _CACHES[model] = cache
+        return cache
+
+
+def reset_caches():
+    """Close every cache, it's called by :meth:`rethinkmodel.config()`."""
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+        _CACHES.clear()
+    for cache in caches:
+        cache.close()
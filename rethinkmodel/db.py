@@ -1,8 +1,9 @@
 """RethinkDB connection manager.
 
-It only contains the :code:`connect()` function. It's preferable to use
-the :meth:`rethinkmodel.config()` function to set up connection informations
-before to call :code:`connec()` function, or use environment variables.
+It contains the :code:`connect()` function and the connection pool. It's
+preferable to use the :meth:`rethinkmodel.config()` function to set up
+connection informations before to call :code:`connect()` function, or use
+environment variables.
 
 - RM_DBNAME
 - RM_PORT
@@ -10,12 +11,49 @@ before to call :code:`connec()` function, or use environment variables.
 - RM_USER
 - RM_PASSWORD
 - RM_TIMEOUT
+- RM_PREFETCH_CHUNK_SIZE: number of ids fetched per query to load linked
+  objects, default 1000
+
+Connections are borrowed from a thread-safe pool and returned to it once
+the query is done. The pool can be tuned with:
+
+- RM_POOL_MIN_SIZE: number of connections opened with the pool and kept
+  opened, default 0
+- RM_POOL_MAX_SIZE: maximum number of opened connections, default 10
+- RM_POOL_IDLE_TIMEOUT: seconds before an idle connection is closed, default 300
+- RM_POOL_WAIT_TIMEOUT: seconds to wait for a free connection, default 30
+- RM_POOL_CHECK_INTERVAL: seconds of inactivity before a connection is
+  checked before reuse, default 30
+
+Writes made with :code:`noreply=True` are sent on a dedicated connection,
+call :func:`flush` to wait until RethinkDB processed them. Changefeeds, that
+keep their connection for a long time, use connections opened outside of the
+pool, see :func:`dedicated_connection`.
+
+Shared changefeeds of :mod:`rethinkmodel.feed` are tuned with:
+
+- RM_FEED_QUEUE_SIZE: number of changes kept for each subscriber, default 1000
+- RM_FEED_POLICY: what to do when a subscriber queue is full, "drop",
+  "coalesce" or "disconnect", default "drop"
+- RM_FEED_RECONNECT: number of times in a row a shared changefeed is opened
+  again when its connection is lost, default 5
+
+The asynchronous API of models (:code:`aget()`, :code:`asave()`...) uses
+an other pool of asyncio connections, one per event loop, that is bounded
+by the same settings. See :func:`aconnection`.
 
 """
+import asyncio
 import os
-from typing import Any, Tuple
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import (Any, AsyncGenerator, AsyncIterator, Deque, Dict, Iterator,
+                    List, Optional, Tuple)
 
-from rethinkdb import RethinkDB
+from rethinkdb import RethinkDB, errors
 
 DB_NAME = os.environ.get("RM_DBNAME", "test")
 PORT = int(os.environ.get("RM_PORT", 28015))
@@ -30,6 +68,758 @@ SOFT_DELETE = os.environ.get("RM_SOFT_DELETE", "false").lower() in (
     "y",
     "1",
 )
+PREFETCH_CHUNK_SIZE = int(os.environ.get("RM_PREFETCH_CHUNK_SIZE", 1000))
+
+# secondary index that selects objects that are not soft deleted, it's
+# created by rethinkmodel.manage.auto()
+SOFT_DELETE_INDEX = "rm_alive"
+
+# secondary index on the deletion date, it only contains soft deleted objects
+# and it's used to purge them
+DELETED_ON_INDEX = "rm_deleted_on"
+
+POOL_MIN_SIZE = int(os.environ.get("RM_POOL_MIN_SIZE", 0))
+POOL_MAX_SIZE = int(os.environ.get("RM_POOL_MAX_SIZE", 10))
+POOL_IDLE_TIMEOUT = float(os.environ.get("RM_POOL_IDLE_TIMEOUT", 300))
+POOL_WAIT_TIMEOUT = float(os.environ.get("RM_POOL_WAIT_TIMEOUT", 30))
+POOL_CHECK_INTERVAL = float(os.environ.get("RM_POOL_CHECK_INTERVAL", 30))
+
+FEED_QUEUE_SIZE = int(os.environ.get("RM_FEED_QUEUE_SIZE", 1000))
+FEED_POLICY = os.environ.get("RM_FEED_POLICY", "drop")
+FEED_RECONNECT = int(os.environ.get("RM_FEED_RECONNECT", 5))
+
+
+def soft_delete_index(row: Any) -> Any:
+    """Return the value of :code:`SOFT_DELETE_INDEX` for a row.
+
+    It's :code:`True` if the row is not deleted. Using a boolean is needed
+    because RethinkDB does not index :code:`null` values.
+    """
+    return row["deleted_on"].default(None).eq(None)
+
+
+# errors that mean that the socket cannot be used anymore
+BROKEN_CONNECTION_ERRORS = (errors.ReqlDriverError, OSError)
+
+
+class ConnectionPool:  # pylint: disable=too-many-instance-attributes
+    """Bounded and thread-safe pool of RethinkDB connections.
+
+    Connections are opened on demand, up to :code:`max_size`. When every
+    connection is in use, :meth:`acquire` waits for one to be released.
+
+    Idle connections that were not used since :code:`check_interval` seconds
+    are checked before to be given, and reopened if the socket is broken.
+    Connections that are idle since :code:`idle_timeout` seconds are closed,
+    but the pool keeps at least :code:`min_size` connections. Call
+    :meth:`fill` to open them, :func:`get_pool` does it when it creates the
+    pool.
+
+    You will usually not use this class directly, see :func:`connection`.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        min_size: int = POOL_MIN_SIZE,
+        max_size: int = POOL_MAX_SIZE,
+        idle_timeout: float = POOL_IDLE_TIMEOUT,
+        wait_timeout: float = POOL_WAIT_TIMEOUT,
+        check_interval: float = POOL_CHECK_INTERVAL,
+    ):
+        """Create the pool, no connection is opened at this time."""
+        if max_size < 1:
+            raise ValueError("The pool max_size must be greater than 0")
+
+        self.rdb = RethinkDB()
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.check_interval = check_interval
+
+        # idle connections with the time they were released
+        self.__idle: Deque[Tuple[Any, float]] = deque()
+
+        # connections given back by finalizers, see release_later()
+        self.__orphans: Deque[Any] = deque()
+        self.__available = threading.Condition(threading.Lock())
+        self.__closed = False
+
+        # opened connections, idle or in use
+        self.__size = 0
+        self.__in_use = 0
+        self.__waiters = 0
+        self.__created = 0
+        self.__recycled = 0
+
+        # connection used to send noreply queries, see run_noreply()
+        self.__noreply: Optional[Any] = None
+        self.__noreply_lock = threading.Lock()
+
+        # connections opened outside of the pool, see open_dedicated()
+        self.__dedicated = 0
+
+    def __open(self) -> Any:
+        """Open a new connection with the configured settings."""
+        conn = self.rdb.connect(
+            host=HOST,
+            port=PORT,
+            db=DB_NAME,
+            user=USER,
+            password=PASSWORD,
+            timeout=TIMEOUT,
+            ssl=SSL,
+        )
+        with self.__available:
+            self.__created += 1
+        return conn
+
+    def __checkout(self, timeout: Optional[float]) -> Tuple[Any, float, list]:
+        """Reserve a connection slot.
+
+        Return the idle connection (or None if a new one must be opened), the
+        time it was released and a list of expired connections to close.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__available:
+            while True:
+                if self.__closed:
+                    raise errors.ReqlDriverError("The connection pool is closed")
+
+                expired = self.__reclaim() + self.__expire()
+                if self.__idle:
+                    conn, released = self.__idle.pop()
+                    self.__in_use += 1
+                    return conn, released, expired
+
+                if self.__size < self.max_size:
+                    self.__size += 1
+                    self.__in_use += 1
+                    return None, 0, expired
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise errors.ReqlDriverError(
+                        f"No connection available in the pool after {timeout} seconds"
+                    )
+
+                self.__waiters += 1
+                try:
+                    # wake up regularly to reclaim orphaned connections
+                    self.__available.wait(
+                        1.0 if remaining is None else min(remaining, 1.0)
+                    )
+                finally:
+                    self.__waiters -= 1
+
+    def __reclaim(self) -> list:
+        """Give back orphaned connections, lock must be held.
+
+        Return the connections that cannot be reused, to close them.
+        """
+        broken = []
+        while self.__orphans:
+            conn = self.__orphans.popleft()
+            self.__in_use -= 1
+            if self.__closed or not conn.is_open():
+                self.__size -= 1
+                self.__recycled += 1
+                broken.append(conn)
+            else:
+                self.__idle.append((conn, time.monotonic()))
+        return broken
+
+    def __expire(self) -> list:
+        """Remove connections that are idle for too long, lock must be held."""
+        expired = []
+        limit = time.monotonic() - self.idle_timeout
+        while self.__idle and self.__size > self.min_size and self.__idle[0][1] < limit:
+            conn, _ = self.__idle.popleft()
+            self.__size -= 1
+            self.__recycled += 1
+            expired.append(conn)
+        return expired
+
+    def __discard(self):
+        """Forget a connection slot, lock must not be held."""
+        with self.__available:
+            self.__size -= 1
+            self.__in_use -= 1
+            self.__available.notify()
+
+    def __check(self, conn: Any, released: float) -> Any:
+        """Ensure that the connection is usable, reconnect if it's broken."""
+        if conn.is_open() and time.monotonic() - released < self.check_interval:
+            return conn
+
+        try:
+            if conn.is_open():
+                conn.server()
+                return conn
+        except BROKEN_CONNECTION_ERRORS:
+            pass
+
+        try:
+            conn.reconnect(noreply_wait=False)
+        except Exception:
+            self.__discard()
+            raise
+
+        with self.__available:
+            self.__recycled += 1
+        return conn
+
+    @staticmethod
+    def __close(conn: Any):
+        """Close the connection and ignore errors."""
+        try:
+            conn.close(noreply_wait=False)
+        except BROKEN_CONNECTION_ERRORS:
+            pass
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """Borrow a connection from the pool.
+
+        The connection **must** be given back with :meth:`release`. If
+        :code:`timeout` is not set, the pool :code:`wait_timeout` is used.
+        """
+        if timeout is None:
+            timeout = self.wait_timeout
+
+        conn, released, expired = self.__checkout(timeout)
+        for old in expired:
+            self.__close(old)
+
+        if conn is not None:
+            return self.__check(conn, released)
+
+        try:
+            return self.__open()
+        except Exception:
+            self.__discard()
+            raise
+
+    def release(self, conn: Any, broken: bool = False):
+        """Give back a connection to the pool.
+
+        If :code:`broken` is :code:`True`, or if the pool is closed, the
+        connection is closed instead.
+        """
+        discard = broken or not conn.is_open()
+        with self.__available:
+            discard = discard or self.__closed
+            self.__in_use -= 1
+            if discard:
+                self.__size -= 1
+                self.__recycled += 1
+            else:
+                self.__idle.append((conn, time.monotonic()))
+            self.__available.notify()
+
+        if discard:
+            self.__close(conn)
+
+    def release_later(self, conn: Any):
+        """Give back a connection from a finalizer.
+
+        The lock is not taken, as the finalizer can run while it's held. The
+        connection is reclaimed by the next borrowing.
+        """
+        self.__orphans.append(conn)
+
+    def fill(self):
+        """Open connections until the pool contains :code:`min_size` connections."""
+        while True:
+            with self.__available:
+                if self.__closed or self.__size >= self.min_size:
+                    return
+                self.__size += 1
+                self.__in_use += 1
+            try:
+                conn = self.__open()
+            except Exception:
+                self.__discard()
+                raise
+            self.release(conn)
+
+    def run_noreply(self, query: Any, **options) -> None:
+        """Send a query without waiting for the response.
+
+        Noreply queries are all sent on a dedicated connection, that is not
+        counted in the pool size, so that :meth:`flush` can wait for them.
+        Errors are not reported.
+        """
+        with self.__noreply_lock:
+            if self.__closed:
+                raise errors.ReqlDriverError("The connection pool is closed")
+            if self.__noreply is None or not self.__noreply.is_open():
+                self.__noreply = self.__open()
+            try:
+                query.run(self.__noreply, noreply=True, **options)
+            except BROKEN_CONNECTION_ERRORS:
+                self.__close(self.__noreply)
+                self.__noreply = None
+                raise
+
+    def flush(self):
+        """Wait until every query sent with :meth:`run_noreply` is processed."""
+        with self.__noreply_lock:
+            if self.__noreply is not None and self.__noreply.is_open():
+                self.__noreply.noreply_wait()
+
+    def open_dedicated(self) -> Any:
+        """Open a connection that is not counted in :code:`max_size`.
+
+        It's used by queries that keep the connection for a long time, like
+        changefeeds, so that they do not take the pooled connections. Close
+        it with :meth:`close_dedicated`.
+        """
+        if self.__closed:
+            raise errors.ReqlDriverError("The connection pool is closed")
+        conn = self.__open()
+        with self.__available:
+            self.__dedicated += 1
+        return conn
+
+    def close_dedicated(self, conn: Any):
+        """Close a connection opened by :meth:`open_dedicated`."""
+        with self.__available:
+            self.__dedicated -= 1
+        self.__close(conn)
+
+    def close(self):
+        """Close idle connections and refuse new borrowings.
+
+        Connections that are in use are closed when they are released.
+        Pending noreply queries are awaited.
+        """
+        with self.__available:
+            self.__closed = True
+            idle = [conn for conn, _ in self.__idle]
+            self.__idle.clear()
+            self.__size -= len(idle)
+            self.__available.notify_all()
+
+        for conn in idle:
+            self.__close(conn)
+
+        with self.__noreply_lock:
+            noreply, self.__noreply = self.__noreply, None
+        if noreply is not None:
+            try:
+                noreply.close(noreply_wait=True)
+            except BROKEN_CONNECTION_ERRORS:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        """Return pool statistics.
+
+        - size: opened connections
+        - idle: connections waiting to be used
+        - in_use: borrowed connections
+        - waiters: threads waiting for a connection
+        - created: number of opened connections since the pool creation
+        - recycled: number of closed or reopened connections
+        - dedicated: opened connections that are outside of the pool
+        """
+        with self.__available:
+            broken = self.__reclaim()
+        for conn in broken:
+            self.__close(conn)
+
+        with self.__available:
+            return {
+                "size": self.__size,
+                "idle": len(self.__idle),
+                "in_use": self.__in_use,
+                "waiters": self.__waiters,
+                "created": self.__created,
+                "recycled": self.__recycled,
+                "dedicated": self.__dedicated,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            }
+
+
+class PooledConnection:
+    """Connection borrowed from the pool.
+
+    It behaves like a RethinkDB connection, but :meth:`close` gives the
+    connection back to the pool instead of closing the socket. If it's not
+    closed, the connection is given back when the object is destroyed.
+    """
+
+    def __init__(self, pool: ConnectionPool, conn: Any):
+        """Wrap the borrowed connection."""
+        self.__pool = pool
+        self.__conn = conn
+
+    def __getattr__(self, name: str) -> Any:
+        """Proxy to the real connection."""
+        if self.__conn is None:
+            raise errors.ReqlDriverError("Connection is closed.")
+        return getattr(self.__conn, name)
+
+    def __enter__(self):
+        """Use the connection as a context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Release the connection on context exit."""
+        self.close(broken=isinstance(exc_value, BROKEN_CONNECTION_ERRORS))
+
+    def __del__(self):
+        """Give back the connection if it was not closed."""
+        conn = self.__dict__.get("_PooledConnection__conn")
+        if conn is not None:
+            self.__conn = None
+            self.__pool.release_later(conn)
+
+    def close(self, noreply_wait: bool = False, broken: bool = False):
+        """Give back the connection to the pool."""
+        if self.__conn is None:
+            return
+        conn, self.__conn = self.__conn, None
+        if noreply_wait and not broken:
+            conn.noreply_wait()
+        self.__pool.release(conn, broken)
+
+
+class AsyncConnectionPool:  # pylint: disable=too-many-instance-attributes
+    """Bounded pool of asyncio RethinkDB connections.
+
+    It works like :class:`ConnectionPool` but :meth:`acquire` must be
+    awaited, and the connections can only be used in the event loop that
+    created the pool. Idle connections are kept until the pool is closed,
+    broken ones are reopened on next borrow.
+
+    You will usually not use this class directly, see :func:`aconnection`.
+    """
+
+    def __init__(
+        self,
+        max_size: int = POOL_MAX_SIZE,
+        wait_timeout: float = POOL_WAIT_TIMEOUT,
+    ):
+        """Create the pool, no connection is opened at this time."""
+        if max_size < 1:
+            raise ValueError("The pool max_size must be greater than 0")
+
+        self.rdb = RethinkDB()
+        self.rdb.set_loop_type("asyncio")
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+
+        self.__idle: List[Any] = []
+        self.__slots = asyncio.Semaphore(max_size)
+        self.__closed = False
+        self.__size = 0
+        self.__in_use = 0
+        self.__created = 0
+        self.__recycled = 0
+
+        # connection used to send noreply queries, see run_noreply()
+        self.__noreply: Optional[Any] = None
+        self.__noreply_lock = asyncio.Lock()
+
+        # connections opened outside of the pool, see open_dedicated()
+        self.__dedicated = 0
+
+    async def __open(self) -> Any:
+        """Open a new connection with the configured settings."""
+        conn = await self.rdb.connect(
+            host=HOST,
+            port=PORT,
+            db=DB_NAME,
+            user=USER,
+            password=PASSWORD,
+            timeout=TIMEOUT,
+            ssl=SSL,
+        )
+        self.__created += 1
+        return conn
+
+    @staticmethod
+    async def __close(conn: Any):
+        """Close the connection and ignore errors."""
+        try:
+            await conn.close(noreply_wait=False)
+        except BROKEN_CONNECTION_ERRORS:
+            pass
+
+    async def acquire(self, timeout: Optional[float] = None) -> Any:
+        """Borrow a connection from the pool.
+
+        The connection **must** be given back with :meth:`release`. If
+        :code:`timeout` is not set, the pool :code:`wait_timeout` is used.
+        """
+        if timeout is None:
+            timeout = self.wait_timeout
+        if self.__closed:
+            raise errors.ReqlDriverError("The connection pool is closed")
+
+        try:
+            await asyncio.wait_for(self.__slots.acquire(), timeout)
+        except asyncio.TimeoutError as error:
+            raise errors.ReqlDriverError(
+                f"No connection available in the pool after {timeout} seconds"
+            ) from error
+
+        try:
+            while self.__idle:
+                conn = self.__idle.pop()
+                if conn.is_open():
+                    self.__in_use += 1
+                    return conn
+                self.__size -= 1
+                self.__recycled += 1
+
+            conn = await self.__open()
+        except BaseException:
+            self.__slots.release()
+            raise
+        self.__size += 1
+        self.__in_use += 1
+        return conn
+
+    async def release(self, conn: Any, broken: bool = False):
+        """Give back a connection to the pool.
+
+        If :code:`broken` is :code:`True`, or if the pool is closed, the
+        connection is closed instead.
+        """
+        self.__in_use -= 1
+        if broken or self.__closed or not conn.is_open():
+            self.__size -= 1
+            self.__recycled += 1
+            await self.__close(conn)
+        else:
+            self.__idle.append(conn)
+        self.__slots.release()
+
+    async def run_noreply(self, query: Any, **options) -> None:
+        """Send a query without waiting for the response.
+
+        See :meth:`ConnectionPool.run_noreply`.
+        """
+        async with self.__noreply_lock:
+            if self.__closed:
+                raise errors.ReqlDriverError("The connection pool is closed")
+            if self.__noreply is None or not self.__noreply.is_open():
+                self.__noreply = await self.__open()
+            try:
+                await query.run(self.__noreply, noreply=True, **options)
+            except BROKEN_CONNECTION_ERRORS:
+                await self.__close(self.__noreply)
+                self.__noreply = None
+                raise
+
+    async def flush(self):
+        """Wait until every query sent with :meth:`run_noreply` is processed."""
+        async with self.__noreply_lock:
+            if self.__noreply is not None and self.__noreply.is_open():
+                await self.__noreply.noreply_wait()
+
+    async def open_dedicated(self) -> Any:
+        """Open a connection that is not counted in :code:`max_size`.
+
+        See :meth:`ConnectionPool.open_dedicated`.
+        """
+        if self.__closed:
+            raise errors.ReqlDriverError("The connection pool is closed")
+        conn = await self.__open()
+        self.__dedicated += 1
+        return conn
+
+    async def close_dedicated(self, conn: Any):
+        """Close a connection opened by :meth:`open_dedicated`."""
+        self.__dedicated -= 1
+        await self.__close(conn)
+
+    async def close(self):
+        """Close idle connections and refuse new borrowings.
+
+        Connections that are in use are closed when they are released.
+        Pending noreply queries are awaited.
+        """
+        self.__closed = True
+        idle, self.__idle = self.__idle, []
+        self.__size -= len(idle)
+        for conn in idle:
+            await self.__close(conn)
+
+        async with self.__noreply_lock:
+            noreply, self.__noreply = self.__noreply, None
+        if noreply is not None:
+            try:
+                await noreply.close(noreply_wait=True)
+            except BROKEN_CONNECTION_ERRORS:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        """Return pool statistics, see :meth:`ConnectionPool.stats`."""
+        return {
+            "size": self.__size,
+            "idle": len(self.__idle),
+            "in_use": self.__in_use,
+            "created": self.__created,
+            "recycled": self.__recycled,
+            "dedicated": self.__dedicated,
+            "max_size": self.max_size,
+        }
+
+
+_POOL: Optional[ConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+
+# asyncio connections are bound to their event loop
+_ASYNC_POOLS: "weakref.WeakKeyDictionary[Any, AsyncConnectionPool]"
+_ASYNC_POOLS = weakref.WeakKeyDictionary()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the connection pool, it is created with current settings if needed."""
+    global _POOL  # pylint: disable=global-statement,invalid-name
+    with _POOL_LOCK:
+        created = _POOL is None
+        if created:
+            _POOL = ConnectionPool(
+                min_size=POOL_MIN_SIZE,
+                max_size=POOL_MAX_SIZE,
+                idle_timeout=POOL_IDLE_TIMEOUT,
+                wait_timeout=POOL_WAIT_TIMEOUT,
+                check_interval=POOL_CHECK_INTERVAL,
+            )
+        pool = _POOL
+
+    if created:
+        try:
+            pool.fill()
+        except BROKEN_CONNECTION_ERRORS:
+            # connections are opened on demand if the server is not reachable
+            pass
+    return pool
+
+
+def reset_pool():
+    """Close the connection pool.
+
+    A new pool is created with the current settings on next connection. This
+    is called by :meth:`rethinkmodel.config()`.
+    """
+    global _POOL  # pylint: disable=global-statement,invalid-name
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+        async_pools = list(_ASYNC_POOLS.items())
+        _ASYNC_POOLS.clear()
+    if pool is not None:
+        pool.close()
+
+    # asyncio pools are closed by their own event loop
+    for loop, async_pool in async_pools:
+        if not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(async_pool.close(), loop)
+
+
+def get_async_pool() -> AsyncConnectionPool:
+    """Return the asyncio connection pool of the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _POOL_LOCK:
+        pool = _ASYNC_POOLS.get(loop)
+        if pool is None:
+            pool = AsyncConnectionPool(
+                max_size=POOL_MAX_SIZE,
+                wait_timeout=POOL_WAIT_TIMEOUT,
+            )
+            _ASYNC_POOLS[loop] = pool
+        return pool
+
+
+def flush():
+    """Wait until every noreply write is processed by RethinkDB.
+
+    Writes made with :code:`noreply=True` return before RethinkDB processes
+    them, call this function when you need them to be visible, e.g. before
+    to read them or before to exit.
+    """
+    get_pool().flush()
+
+
+async def aflush():
+    """Asynchronous version of :func:`flush`, for the asyncio pool."""
+    await get_async_pool().flush()
+
+
+def pool_stats() -> Dict[str, int]:
+    """Return the connection pool statistics, see :meth:`ConnectionPool.stats`."""
+    return get_pool().stats()
+
+
+@contextmanager
+def _internal_index_errors() -> Iterator[None]:
+    """Explain the error raised when an internal index was not created."""
+    try:
+        yield
+    except errors.ReqlOpFailedError as error:
+        for index in (SOFT_DELETE_INDEX, DELETED_ON_INDEX):
+            if f"Index `{index}` was not found" in str(error.message):
+                raise errors.ReqlOpFailedError(
+                    f"{error.message} This index is used when soft deletion is "
+                    "activated, call rethinkmodel.manage with soft deletion "
+                    "activated to create it."
+                ) from error
+        raise
+
+
+@contextmanager
+def connection() -> Iterator[Tuple[RethinkDB, Any]]:
+    """Borrow a connection from the pool for the duration of the context.
+
+    .. code::
+
+        with connection() as (rdb, conn):
+            rdb.table("users").count().run(conn)
+
+    If the connection is broken inside the context, it's closed and a new one
+    will be opened on next usage. When soft deletion is activated on tables
+    that were managed without it, the error tells to create the missing
+    internal indexes with :mod:`rethinkmodel.manage`.
+    """
+    pool = get_pool()
+    conn = pool.acquire()
+    broken = False
+    try:
+        with _internal_index_errors():
+            yield pool.rdb, conn
+    except BROKEN_CONNECTION_ERRORS:
+        broken = True
+        raise
+    finally:
+        pool.release(conn, broken)
+
+
+@contextmanager
+def dedicated_connection() -> Iterator[Tuple[RethinkDB, Any]]:
+    """Open a connection outside of the pool for the duration of the context.
+
+    Use it for queries that keep the connection for a long time, like
+    changefeeds: they don't take a pooled connection that other queries
+    wait for. The connection is closed at the end of the context.
+
+    .. code::
+
+        with dedicated_connection() as (rdb, conn):
+            for change in rdb.table("users").changes().run(conn):
+                ...
+
+    """
+    pool = get_pool()
+    conn = pool.open_dedicated()
+    try:
+        with _internal_index_errors():
+            yield pool.rdb, conn
+    finally:
+        pool.close_dedicated(conn)
 
 
 def connect() -> Tuple[RethinkDB, Any]:
@@ -37,15 +827,64 @@ def connect() -> Tuple[RethinkDB, Any]:
 
     You will usually not need to call this function. Rethink:Model use
     this function to internally open and close database connection.
+
+    The connection is borrowed from the pool, calling :code:`close()` on it
+    gives it back to the pool. Prefer :func:`connection` which does it for you.
     """
-    rdb = RethinkDB()
-    connection = rdb.connect(
-        host=HOST,
-        port=PORT,
-        db=DB_NAME,
-        user=USER,
-        password=PASSWORD,
-        timeout=TIMEOUT,
-        ssl=SSL,
-    )
-    return rdb, connection
+    pool = get_pool()
+    return pool.rdb, PooledConnection(pool, pool.acquire())
+
+
+@asynccontextmanager
+async def aconnection() -> AsyncIterator[Tuple[RethinkDB, Any]]:
+    """Borrow an asyncio connection for the duration of the context.
+
+    Queries must be awaited, and cursors are asynchronous iterators.
+
+    .. code::
+
+        async with aconnection() as (rdb, conn):
+            await rdb.table("users").count().run(conn)
+
+    """
+    pool = get_async_pool()
+    conn = await pool.acquire()
+    broken = False
+    try:
+        with _internal_index_errors():
+            yield pool.rdb, conn
+    except BROKEN_CONNECTION_ERRORS:
+        broken = True
+        raise
+    finally:
+        await pool.release(conn, broken)
+
+
+@asynccontextmanager
+async def adedicated_connection() -> AsyncIterator[Tuple[RethinkDB, Any]]:
+    """Asynchronous version of :func:`dedicated_connection`."""
+    pool = get_async_pool()
+    conn = await pool.open_dedicated()
+    try:
+        with _internal_index_errors():
+            yield pool.rdb, conn
+    finally:
+        await pool.close_dedicated(conn)
+
+
+async def aiterate(result: Any) -> AsyncGenerator[Any, None]:
+    """Iterate over the result of an asyncio query, a cursor or a list.
+
+    The cursor is closed when the iteration ends or when the generator is
+    closed.
+    """
+    if isinstance(result, list):
+        for document in result:
+            yield document
+        return
+
+    try:
+        async for document in result:
+            yield document
+    finally:
+        await result.close()
@@ -0,0 +1,399 @@
+"""Shared changefeeds.
+
+:meth:`rethinkmodel.model.Model.changes` runs one changefeed on RethinkDB
+per call. When many consumers of the same process watch the same table, e.g.
+websocket clients, use :meth:`rethinkmodel.model.Model.subscribe` instead: a
+:class:`FeedHub` keeps only one changefeed per table and filter, and fans the
+changes out to every subscriber.
+
+.. code::
+
+    with User.subscribe({"active": True}) as subscription:
+        for old, new in subscription:
+            send(old, new)
+
+Each subscriber has its own bounded queue. When a subscriber is too slow and
+its queue is full, the policy of the subscription is applied:
+
+- "drop": the oldest change is dropped, see :attr:`Subscription.dropped`
+- "coalesce": the changes of a document are always merged with its queued
+  change, so the subscriber only gets the last state of each document. When
+  the queue is full of different documents, the oldest change is dropped
+- "disconnect": the subscription is closed, and reading it raises a
+  :code:`ReqlDriverError`
+
+The changefeed is closed when the last subscriber leaves. Filters are
+compared by their ReQL, so two lambdas with the same body share the feed.
+Each changefeed has its own connection, that is not taken from the pool.
+
+If the connection is lost, the changefeed is opened again up to
+:code:`FeedHub.reconnect` times in a row, waiting longer between each
+attempt. Changes made meanwhile are not received. When the feed cannot be
+opened again, or fails with an other error, every subscription is closed
+with the error: reading it raises the error, and the subscribers must
+subscribe again.
+"""
+import itertools
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from rethinkdb import RethinkDB, errors
+
+from . import db
+from .db import dedicated_connection
+
+POLICIES = ("drop", "coalesce", "disconnect")
+
+# seconds between two checks of the stop flag while the feed waits for changes
+POLL_INTERVAL = 0.5
+
+
+def feed_key(model: Any, select: Optional[Union[Dict, Callable]]) -> Tuple[str, str]:
+    """Return the key that identifies the changefeed of a model and a filter.
+
+    The key contains the database name and the ReQL of the changefeed, where
+    lambda variables are numbered from 1 and dict keys are sorted.
+    """
+    if isinstance(select, dict):
+        select = dict(sorted(select.items()))
+    query = str(model.changes_query(RethinkDB(), select))
+
+    variables: Dict[str, str] = {}
+
+    def rename(match):
+        return variables.setdefault(match.group(0), f"var_{len(variables) + 1}")
+
+    return db.DB_NAME, re.sub(r"\bvar_\d+\b", rename, query)
+
+
+class Subscription:  # pylint: disable=too-many-instance-attributes
+    """Bounded queue of the changes received by one subscriber.
+
+    Iterate the subscription to get :code:`(old, new)` tuples of objects, as
+    with :meth:`rethinkmodel.model.Model.changes`. The iteration stops when
+    the subscription is closed. Use :meth:`close`, or the subscription as a
+    context manager, to leave the feed.
+    """
+
+    def __init__(self, hub: "FeedHub", model: Any, maxsize: int, policy: str):
+        """Create the subscription, see :meth:`FeedHub.subscribe`."""
+        self.model = model
+        self.maxsize = maxsize
+        self.policy = policy
+
+        # number of changes that were dropped because the queue was full
+        self.dropped = 0
+
+        self.__hub = hub
+        self.__queue: "OrderedDict[Any, dict]" = OrderedDict()
+        self.__counter = itertools.count()
+        self.__available = threading.Condition(threading.Lock())
+        self.__closed = False
+        self.__error: Optional[Exception] = None
+
+    @property
+    def closed(self) -> bool:
+        """Return :code:`True` if the subscription does not receive changes."""
+        return self.__closed
+
+    def __key(self, change: dict) -> Any:
+        """Return the queue key of a change."""
+        if self.policy != "coalesce":
+            return next(self.__counter)
+        value = change.get("new_val") or change.get("old_val") or {}
+        return value.get("id", next(self.__counter))
+
+    def put(self, change: dict) -> bool:
+        """Queue a raw change, it's called by the feed.
+
+        Return :code:`False` if the subscriber is disconnected.
+        """
+        with self.__available:
+            if self.__closed:
+                return False
+
+            key = self.__key(change)
+            if key in self.__queue:
+                # coalesce with the queued change of the same document
+                change = {
+                    "old_val": self.__queue[key].get("old_val"),
+                    "new_val": change.get("new_val"),
+                }
+                if change["old_val"] is None and change["new_val"] is None:
+                    del self.__queue[key]
+                else:
+                    self.__queue[key] = change
+                return True
+
+            if len(self.__queue) >= self.maxsize:
+                if self.policy == "disconnect":
+                    self.__error = errors.ReqlDriverError(
+                        f"Subscription on {self.model.tablename} is disconnected, "
+                        f"more than {self.maxsize} changes are waiting"
+                    )
+                    self.__closed = True
+                    self.__available.notify_all()
+                    return False
+                self.__queue.popitem(last=False)
+                self.dropped += 1
+
+            self.__queue[key] = change
+            self.__available.notify()
+            return True
+
+    def fail(self, error: Optional[Exception] = None):
+        """Close the subscription from the hub, with the error of the feed."""
+        with self.__available:
+            self.__error = error
+            self.__closed = True
+            self.__available.notify_all()
+
+    def get_raw(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Return the next raw change, with "old_val" and "new_val" keys.
+
+        Wait at most :code:`timeout` seconds, and return :code:`None` if there
+        is no change. Raise :code:`StopIteration` if the subscription is
+        closed, or the error that closed it.
+        """
+        with self.__available:
+            if not self.__available.wait_for(
+                lambda: self.__queue or self.__closed, timeout
+            ):
+                return None
+            if self.__queue:
+                return self.__queue.popitem(last=False)[1]
+            if self.__error is not None:
+                raise self.__error
+            raise StopIteration
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[Any, Any]]:
+        """Return the next :code:`(old, new)` tuple, see :meth:`get_raw`."""
+        change = self.get_raw(timeout)
+        if change is None:
+            return None
+        return self.model.from_change(change)
+
+    def pending(self) -> int:
+        """Return the number of queued changes."""
+        with self.__available:
+            return len(self.__queue)
+
+    def close(self):
+        """Leave the feed, queued changes are dropped."""
+        with self.__available:
+            self.__closed = True
+            self.__queue.clear()
+            self.__available.notify_all()
+        self.__hub.unsubscribe(self)
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any]]:
+        """Yield changes until the subscription is closed."""
+        while True:
+            try:
+                yield self.get()
+            except StopIteration:
+                return
+
+    def __enter__(self) -> "Subscription":
+        """Use the subscription as a context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Leave the feed on context exit."""
+        self.close()
+
+
+class SharedFeed(threading.Thread):  # pylint: disable=too-many-instance-attributes
+    """Thread that reads one changefeed and gives changes to the hub."""
+
+    def __init__(self, hub: "FeedHub", model: Any, select: Any):
+        """Prepare the feed, it's opened when the thread starts."""
+        super().__init__(name=f"rethinkmodel-feed-{model.tablename}", daemon=True)
+        self.model = model
+        self.select = select
+        self.subscriptions: List[Subscription] = []
+        self.ready = threading.Event()
+        self.error: Optional[Exception] = None
+        self.__hub = hub
+        self.__stopped = threading.Event()
+        self.__attempts = 0
+
+    def stop(self):
+        """Ask the thread to close the changefeed."""
+        self.__stopped.set()
+
+    def run(self):
+        """Read the changefeed until the feed is stopped.
+
+        The changefeed is opened again when the connection is lost, up to
+        :code:`reconnect` times of the hub in a row.
+        """
+        try:
+            while True:
+                try:
+                    self.__read()
+                    return
+                except db.BROKEN_CONNECTION_ERRORS:
+                    self.__attempts += 1
+                    # a feed that was never opened fails in subscribe()
+                    opened = self.ready.is_set()
+                    if not opened or self.__attempts > self.__hub.reconnect:
+                        raise
+                    if self.__stopped.wait(min(0.5 * 2 ** (self.__attempts - 1), 10)):
+                        return
+        except Exception as error:  # pylint: disable=broad-except
+            self.error = error
+            self.__hub.failed(self, error)
+        finally:
+            self.ready.set()
+
+    def __read(self):
+        """Give the changes to the hub until the feed is stopped."""
+        with dedicated_connection() as (rdb, conn):
+            cursor = self.model.changes_query(rdb, self.select).run(conn)
+            self.ready.set()
+            try:
+                while not self.__stopped.is_set():
+                    try:
+                        change = cursor.next(wait=POLL_INTERVAL)
+                    except errors.ReqlTimeoutError:
+                        continue
+                    self.__attempts = 0
+                    self.__hub.dispatch(self, change)
+            finally:
+                cursor.close()
+
+
+class FeedHub:
+    """Share changefeeds between subscribers.
+
+    :code:`maxsize` and :code:`policy` are the default queue size and slow
+    consumer policy of subscriptions, :code:`reconnect` is the number of
+    times in a row a feed is opened again when its connection is lost. See
+    :mod:`rethinkmodel.feed`.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = db.FEED_QUEUE_SIZE,
+        policy: str = db.FEED_POLICY,
+        reconnect: int = db.FEED_RECONNECT,
+    ):
+        """Create the hub, feeds are opened by :meth:`subscribe`."""
+        self.maxsize = maxsize
+        self.policy = self.__check_policy(policy)
+        self.reconnect = reconnect
+        self.__feeds: Dict[Tuple[str, str], SharedFeed] = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def __check_policy(policy: str) -> str:
+        """Raise ValueError if the policy is unknown."""
+        if policy not in POLICIES:
+            raise ValueError(
+                f"Unknown slow consumer policy {policy!r}, use one of {POLICIES}"
+            )
+        return policy
+
+    def subscribe(
+        self,
+        model: Any,
+        select: Optional[Union[Dict, Callable]] = None,
+        maxsize: Optional[int] = None,
+        policy: Optional[str] = None,
+    ) -> Subscription:
+        """Subscribe to the changes of a model table.
+
+        The :code:`select` argument is the same as in
+        :meth:`rethinkmodel.model.Model.changes`. The changefeed is opened if
+        there is no subscriber for this table and filter. The subscription
+        receives the changes made after this call.
+        """
+        subscription = Subscription(
+            self,
+            model,
+            max(1, maxsize or self.maxsize),
+            self.__check_policy(policy or self.policy),
+        )
+        key = feed_key(model, select)
+        with self.__lock:
+            feed = self.__feeds.get(key)
+            if feed is None:
+                feed = SharedFeed(self, model, select)
+                self.__feeds[key] = feed
+                feed.start()
+            feed.subscriptions.append(subscription)
+
+        feed.ready.wait(db.TIMEOUT)
+        if feed.error is not None:
+            raise feed.error
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription, the feed is closed if it was the last one."""
+        with self.__lock:
+            for key, feed in list(self.__feeds.items()):
+                if subscription in feed.subscriptions:
+                    feed.subscriptions.remove(subscription)
+                    if not feed.subscriptions:
+                        del self.__feeds[key]
+                        feed.stop()
+                    return
+
+    def dispatch(self, feed: SharedFeed, change: dict):
+        """Give a change to every subscriber of the feed."""
+        with self.__lock:
+            subscriptions = list(feed.subscriptions)
+        for subscription in subscriptions:
+            if not subscription.put(change):
+                self.unsubscribe(subscription)
+
+    def failed(self, feed: SharedFeed, error: Exception):
+        """Close the subscriptions of a feed that stopped on error."""
+        with self.__lock:
+            for key, current in list(self.__feeds.items()):
+                if current is feed:
+                    del self.__feeds[key]
+            subscriptions, feed.subscriptions = feed.subscriptions, []
+        for subscription in subscriptions:
+            subscription.fail(error)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of opened changefeeds and of subscribers."""
+        with self.__lock:
+            return {
+                "feeds": len(self.__feeds),
+                "subscribers": sum(
+                    len(feed.subscriptions) for feed in self.__feeds.values()
+                ),
+            }
+
+    def close(self):
+        """Close every feed and subscription."""
+        with self.__lock:
+            feeds = list(self.__feeds.values())
+            self.__feeds.clear()
+        for feed in feeds:
+            feed.stop()
+            for subscription in feed.subscriptions:
+                subscription.fail()
+            feed.join()
+
+
+_HUB: Optional[FeedHub] = None
+_HUB_LOCK = threading.Lock()
+
+
+def get_hub() -> FeedHub:
+    """Return the hub used by :meth:`rethinkmodel.model.Model.subscribe`."""
+    global _HUB  # pylint: disable=global-statement,invalid-name
+    with _HUB_LOCK:
+        if _HUB is None:
+            _HUB = FeedHub(
+                maxsize=db.FEED_QUEUE_SIZE,
+                policy=db.FEED_POLICY,
+                reconnect=db.FEED_RECONNECT,
+            )
+        return _HUB
@@ -0,0 +1,162 @@
+"""Identity map and unit of work.
+
+Inside a session, each document is loaded once: objects are kept by table
+and id, and loading the same document again, with
+:meth:`rethinkmodel.model.Model.get`, a query or as a linked object, returns
+the same instance without a round-trip.
+
+:meth:`rethinkmodel.model.Model.save` does not write immediately, objects
+are queued and written with one :meth:`rethinkmodel.model.Model.save_many`
+per Model when the session ends: new objects are inserted, and modified
+objects are updated with their changed fields only. Models that are linked
+by others are written first, so that new linked objects get their ids
+before they are referenced.
+
+.. code::
+
+    with rethinkmodel.session():
+        user = User.get(user_id)
+        for project in Project.filter({"owner": user_id}):
+            assert project.owner is user
+            project.name = project.name.title()
+            project.save()  # queued
+    # projects are saved here
+
+Queued objects are dropped if an exception is raised in the session. Call
+:meth:`Session.flush` to write them before, e.g. before a query that must
+see them. Deletions, asynchronous saves and saves with options are not
+queued.
+"""
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from rethinkdb import errors
+
+_CURRENT: "ContextVar[Optional[Session]]" = ContextVar(
+    "rethinkmodel_session", default=None
+)
+
+
+def current_session() -> Optional["Session"]:
+    """Return the session of the current thread or task, or :code:`None`."""
+    return _CURRENT.get()
+
+
+class Session:
+    """Identity map of loaded objects, and queue of objects to save.
+
+    The session is active in the thread, or the asyncio task, that enters it.
+    Use :func:`session` to create it.
+    """
+
+    def __init__(self, chunk_size: int = 1000):
+        """Create an empty session, see :meth:`Model.save_many` for chunk_size."""
+        self.chunk_size = chunk_size
+        self.__identities: Dict[Tuple[str, Any], Any] = {}
+        self.__pending: Dict[int, Any] = {}
+        self.__tokens: List[Any] = []
+
+    def get(self, model: Any, data_id: Any) -> Optional[Any]:
+        """Return the loaded object of a model, or :code:`None`."""
+        if data_id is None:
+            return None
+        return self.__identities.get((model.tablename, data_id))
+
+    def register(self, obj: Any):
+        """Keep a loaded or saved object in the identity map."""
+        if obj.id is not None:
+            self.__identities.setdefault((obj.tablename, obj.id), obj)
+
+    def forget(self, obj: Any):
+        """Remove an object from the identity map and from the queue."""
+        self.__pending.pop(id(obj), None)
+        if obj.id is not None and self.get(type(obj), obj.id) is obj:
+            del self.__identities[(obj.tablename, obj.id)]
+
+    def add(self, obj: Any):
+        """Queue an object to save on :meth:`flush`."""
+        self.__pending[id(obj)] = obj
+        self.register(obj)
+
+    def pending(self) -> List[Any]:
+        """Return the queued objects."""
+        return list(self.__pending.values())
+
+    def flush(self) -> Dict[str, Any]:
+        """Save queued objects that are new or modified.
+
+        Return the merged reports of :meth:`Model.save_many`. Raise a
+        :code:`ReqlError` after the writes if some objects were not saved.
+        """
+        groups: Dict[Any, List[Any]] = {}
+        for obj in self.__pending.values():
+            if not obj.id or obj.changed_fields():
+                groups.setdefault(type(obj), []).append(obj)
+        self.__pending.clear()
+
+        report: Dict[str, Any] = dict.fromkeys(("inserted", "replaced", "unchanged"), 0)
+        report["errors"] = []
+        while groups:
+            # write linked models before the models that reference them
+            ready = [
+                model
+                for model in groups
+                if not any(
+                    linked in groups and linked is not model
+                    for links in (
+                        model.schema().relations,
+                        model.schema().list_relations,
+                    )
+                    for linked in links.values()
+                )
+            ] or [next(iter(groups))]
+            for model in ready:
+                objects = groups.pop(model)
+                result = model.save_many(
+                    objects, chunk_size=self.chunk_size, changed_only=True
+                )
+                for key in ("inserted", "replaced", "unchanged"):
+                    report[key] += result[key]
+                report["errors"].extend(result["errors"])
+                for obj in objects:
+                    self.register(obj)
+
+        if report["errors"]:
+            obj, message = report["errors"][0]
+            raise errors.ReqlError(
+                f"{len(report['errors'])} objects were not saved, "
+                f"{obj.tablename}: {message}"
+            )
+        return report
+
+    def clear(self):
+        """Forget loaded and queued objects."""
+        self.__identities.clear()
+        self.__pending.clear()
+
+    def __enter__(self) -> "Session":
+        """Activate the session."""
+        self.__tokens.append(_CURRENT.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Save queued objects, if there is no error, and deactivate the session."""
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            _CURRENT.reset(self.__tokens.pop())
+            self.clear()
+
+
+def session(chunk_size: int = 1000) -> Session:
+    """Return a new session, to use as a context manager.
+
+    .. code::
+
+        with rethinkmodel.session() as current:
+            ...
+            current.flush()
+
+    """
+    return Session(chunk_size=chunk_size)
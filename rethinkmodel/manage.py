@@ -24,92 +24,421 @@ the job. For example:
     # It will also create database
     manage(myproject.dataModule)
 
+:func:`manage` uses :func:`sync`, that reads the database state once and
+creates all the missing tables and indexes concurrently. Use
+:code:`sync(module, dry_run=True)` to only get the changes to apply.
+
+From command line, :code:`--dry-run` shows the changes without applying
+them, and :code:`--drop` drops the indexes that are not declared anymore:
+
+.. code-block:: shell
+
+    python -m rethinkmodel.manage --dry-run path/to/data
+
+Objects that are soft deleted for more than 90 days can be removed, and
+archived, with:
+
+.. code-block:: shell
+
+    python -m rethinkmodel.manage --purge 90 --archive /var/backups path/to/data
+
 """
+import argparse
 import glob
 import importlib
 import importlib.util
 import inspect
 import logging
 import os.path
-import sys
-from typing import Any, Type
-
-from rethinkdb import RethinkDB
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
 
 from rethinkmodel import db
-from rethinkmodel.model import Model
+from rethinkmodel.model import Index, Model
 
 LOG = logging.getLogger("rethinkmodel")
 LOG.setLevel(logging.INFO)
 
+# options that BaseModel.get_table_options() can return
+TABLE_OPTIONS = ("shards", "replicas", "primary_replica_tag", "durability")
+
 
 def check_db():
     """Check if DB_NAME exists, or create it."""
-    rdb = RethinkDB()
-    conn = rdb.connect(
-        host=db.HOST,
-        port=db.PORT,
-        user=db.USER,
-        password=db.PASSWORD,
-        ssl=db.SSL,
-        timeout=db.TIMEOUT,
-    )
-
-    dbs = rdb.db_list().run(conn)
-    if db.DB_NAME not in dbs:
-        LOG.info("create database %s", db.DB_NAME)
-        rdb.db_create(db.DB_NAME).run(conn)
-
-    conn.close()
+    with db.connection() as (rdb, conn):
+        dbs = rdb.db_list().run(conn)
+        if db.DB_NAME not in dbs:
+            LOG.info("create database %s", db.DB_NAME)
+            rdb.db_create(db.DB_NAME).run(conn)
 
 
 def auto(member: Type[Model]):
     """Automatic database and table creation for the given type (Modelchild)."""
     if not issubclass(member, Model) or member is Model:
         return
+    sync(member)
+
+
+def models(*targets: Any) -> List[Type[Model]]:
+    """Return the Model classes found in modules, module names or classes.
+
+    Each table appears once, even if its Model is imported in several modules.
+    """
+    found: Dict[str, Type[Model]] = {}
+    for target in targets:
+        if isinstance(target, str):
+            target = importlib.import_module(target)
+        candidates = [target] if inspect.isclass(target) else []
+        if inspect.ismodule(target):
+            candidates = [obj for _, obj in inspect.getmembers(target, inspect.isclass)]
+        for obj in candidates:
+            if issubclass(obj, Model) and obj is not Model:
+                found.setdefault(obj.tablename, obj)
+    return list(found.values())
+
+
+def index_specs(member: Type[Model]) -> Dict[str, Index]:
+    """Return the declared indexes of the model and the ones used internally.
+
+    When :code:`db.SOFT_DELETE` is activated, internal indexes select objects
+    that are not soft deleted, and soft deleted objects by deletion date, see
+    :func:`purge`.
+    """
+    specs = member.index_specs()
+    if db.SOFT_DELETE:
+        specs[db.SOFT_DELETE_INDEX] = Index(
+            db.SOFT_DELETE_INDEX, function=db.soft_delete_index
+        )
+        specs[db.DELETED_ON_INDEX] = Index(db.DELETED_ON_INDEX, "deleted_on")
+    return specs
+
+
+def table_options(member: Type[Model]) -> Dict[str, Any]:
+    """Return the table options declared by the model, see :data:`TABLE_OPTIONS`."""
+    options = member.get_table_options() or {}
+    unknown = set(options) - set(TABLE_OPTIONS)
+    if unknown:
+        raise ValueError(
+            f"Unknown table options for {member.__name__}: {', '.join(sorted(unknown))}"
+        )
+    return {name: value for name, value in options.items() if value is not None}
+
+
+def config_differences(
+    options: Dict[str, Any], config: Dict[str, Any], servers: Dict[str, List[str]]
+) -> List[str]:
+    """Return the table options that differ from the table configuration.
+
+    :code:`config` is the result of :code:`table.config()` and :code:`servers`
+    maps server names to their tags.
+    """
+    shards = config["shards"]
+    different = []
+    if "shards" in options and len(shards) != options["shards"]:
+        different.append("shards")
+
+    replicas = options.get("replicas")
+    if isinstance(replicas, int):
+        if any(len(shard["replicas"]) != replicas for shard in shards):
+            different.append("replicas")
+    elif isinstance(replicas, dict):
+        for shard in shards:
+            counts = {
+                tag: sum(tag in servers.get(server, []) for server in shard["replicas"])
+                for tag in replicas
+            }
+            if counts != replicas:
+                different.append("replicas")
+                break
+
+    tag = options.get("primary_replica_tag")
+    if tag is not None and any(
+        tag not in servers.get(shard["primary_replica"], []) for shard in shards
+    ):
+        different.append("primary_replica_tag")
+
+    if "durability" in options and config.get("durability") != options["durability"]:
+        different.append("durability")
+    return different
+
+
+def diff(  # pylint: disable=too-many-locals
+    members: Iterable[Type[Model]],
+    state: Dict[str, List[str]],
+    configs: Optional[Dict[str, Dict]] = None,
+    servers: Optional[Dict[str, List[str]]] = None,
+) -> Dict[str, List]:
+    """Compare models to the database state.
+
+    :code:`state` maps existing table names to the names of their indexes.
+    :code:`configs` maps table names to their :code:`table.config()`, it's
+    only needed for models that declare table options, and :code:`servers`
+    maps server names to their tags.
+
+    The result gives the operations to apply:
+
+    - create_tables: table names
+    - reconfigure_tables: :code:`(table, options)` tuples, options are the
+      names of the table options that differ in database
+    - create_indexes: :code:`(table, index)` tuples
+    - rename_indexes: :code:`(table, old name, new name)` tuples
+    - drop_indexes: :code:`(table, index)` tuples, for existing indexes that
+      are not declared anymore, internal indexes are never dropped
+    """
+    changes: Dict[str, List] = {
+        "create_tables": [],
+        "reconfigure_tables": [],
+        "create_indexes": [],
+        "rename_indexes": [],
+        "drop_indexes": [],
+    }
+    for member in members:
+        table = member.tablename
+        if table not in state:
+            changes["create_tables"].append(table)
+        elif configs and table in configs:
+            different = config_differences(
+                table_options(member), configs[table], servers or {}
+            )
+            if different:
+                changes["reconfigure_tables"].append((table, different))
+
+        existing = set(state.get(table, []))
+        declared = set()
+        for name, spec in index_specs(member).items():
+            declared.add(name)
+            if name in existing:
+                continue
+            if spec.renamed_from in existing:
+                changes["rename_indexes"].append((table, spec.renamed_from, name))
+                existing.discard(spec.renamed_from)
+            else:
+                changes["create_indexes"].append((table, name))
+
+        # internal indexes are kept when soft deletion is deactivated
+        internal = {db.SOFT_DELETE_INDEX, db.DELETED_ON_INDEX}
+        changes["drop_indexes"].extend(
+            (table, name) for name in sorted(existing - declared - internal)
+        )
+    return changes
+
+
+def sync(  # pylint: disable=too-many-locals
+    *targets: Any, dry_run: bool = False, drop: bool = False
+) -> Dict[str, List]:
+    """Create the missing tables and indexes of all models at once.
+
+    Targets are modules, module names or Model classes. The database state is
+    read in one query, then tables are created concurrently, then indexes are
+    created (or renamed) concurrently, and the indexes are awaited once at
+    the end. Calling it again does nothing if the database is up to date.
 
-    rdb = RethinkDB()
-    conn = rdb.connect(
-        host=db.HOST,
-        port=db.PORT,
-        db=db.DB_NAME,
-        user=db.USER,
-        password=db.PASSWORD,
-        ssl=db.SSL,
-        timeout=db.TIMEOUT,
+    Indexes that exist in database but are no longer declared are only
+    reported, unless :code:`drop` is :code:`True`. With :code:`dry_run`,
+    nothing is changed. The operations are returned, see :func:`diff`.
+
+    Tables are created with the options returned by
+    :meth:`rethinkmodel.model.BaseModel.get_table_options`. Existing tables
+    whose shards, replicas, primary replica tag or durability differ are
+    reconfigured.
+
+    .. code::
+
+        import rethinkmodel.manage as manage
+        import myproject.models
+
+        changes = manage.sync(myproject.models, dry_run=True)
+        print(changes["drop_indexes"])
+    """
+    members = models(*targets)
+    by_table = {member.tablename: member for member in members}
+    options = {name: table_options(member) for name, member in by_table.items()}
+    check_db()
+
+    with db.connection() as (rdb, conn):
+        state = (
+            rdb.table_list()
+            .map(lambda name: [name, rdb.table(name).index_list()])
+            .coerce_to("object")
+            .run(conn)
+        )
+        configs, servers = {}, {}
+        configured = [name for name in by_table if name in state and options[name]]
+        if configured:
+            configs, servers = rdb.expr(
+                [
+                    {name: rdb.table(name).config() for name in configured},
+                    rdb.db("rethinkdb")
+                    .table("server_config")
+                    .map(lambda server: [server["name"], server["tags"]])
+                    .coerce_to("object"),
+                ]
+            ).run(conn)
+    changes = diff(members, state, configs, servers)
+
+    for name in changes["create_tables"]:
+        LOG.info("create table %s %s", name, options[name] or "")
+    for name, different in changes["reconfigure_tables"]:
+        LOG.info("reconfigure table %s (%s)", name, ", ".join(different))
+    for table, index in changes["create_indexes"]:
+        LOG.info("create index %s on %s", index, table)
+    for table, old, new in changes["rename_indexes"]:
+        LOG.info("rename index %s to %s on %s", old, new, table)
+    for table, index in changes["drop_indexes"]:
+        LOG.log(
+            logging.INFO if drop else logging.WARNING,
+            "%s index %s on %s",
+            "drop" if drop else "undeclared",
+            index,
+            table,
+        )
+
+    if dry_run:
+        return changes
+
+    def create_table(name: str) -> Callable:
+        return lambda rdb: rdb.table_create(name, **options[name])
+
+    def reconfigure_table(name: str, different: List[str]) -> Callable:
+        def operations(rdb):
+            table = rdb.table(name)
+            shards = configs[name]["shards"]
+            queries = []
+            if set(different) - {"durability"}:
+                # reconfigure computes new split points, the shards stay balanced
+                settings = {
+                    "shards": options[name].get("shards", len(shards)),
+                    "replicas": options[name].get(
+                        "replicas", len(shards[0]["replicas"])
+                    ),
+                }
+                if "primary_replica_tag" in options[name]:
+                    settings["primary_replica_tag"] = options[name][
+                        "primary_replica_tag"
+                    ]
+                queries.append(table.reconfigure(**settings))
+            if "durability" in different:
+                queries.append(
+                    table.config().update({"durability": options[name]["durability"]})
+                )
+            return rdb.expr(queries)
+
+        return operations
+
+    def index_operations(name: str) -> Callable:
+        def operations(rdb):
+            table = rdb.table(name)
+            specs = index_specs(by_table[name])
+            queries = [
+                table.index_rename(old, new)
+                for tablename, old, new in changes["rename_indexes"]
+                if tablename == name
+            ]
+            for tablename, index in changes["create_indexes"]:
+                if tablename != name:
+                    continue
+                queries.append(specs[index].create(table))
+            if drop:
+                queries.extend(
+                    table.index_drop(index)
+                    for tablename, index in changes["drop_indexes"]
+                    if tablename == name
+                )
+            return rdb.expr(queries)
+
+        return operations
+
+    _run_concurrently(
+        [create_table(name) for name in changes["create_tables"]]
+        + [
+            reconfigure_table(name, different)
+            for name, different in changes["reconfigure_tables"]
+        ]
     )
+    keys = ["create_indexes", "rename_indexes"] + (["drop_indexes"] if drop else [])
+    tables = sorted({operation[0] for key in keys for operation in changes[key]})
+    _run_concurrently([index_operations(name) for name in tables])
+
+    created: Dict[str, List[str]] = {}
+    for table, index in changes["create_indexes"]:
+        created.setdefault(table, []).append(index)
+    reconfigured = [name for name, _ in changes["reconfigure_tables"]]
+    if created or reconfigured:
+        with db.connection() as (rdb, conn):
+            rdb.expr(
+                [
+                    rdb.table(table).index_wait(*indexes)
+                    for table, indexes in created.items()
+                ]
+                + [rdb.table(name).wait() for name in reconfigured]
+            ).run(conn)
+
+    return changes
+
+
+def purge(  # pylint: disable=too-many-arguments
+    *targets: Any,
+    before: datetime,
+    batch_size: int = 1000,
+    pause: float = 0,
+    archive_dir: Optional[str] = None,
+) -> Dict[str, int]:
+    """Remove the objects that were soft deleted before a date, in all models.
+
+    Targets are modules, module names or Model classes. See
+    :meth:`rethinkmodel.model.Model.purge` for the other arguments. If
+    :code:`archive_dir` is set, the documents of each table are appended in
+    :code:`<archive_dir>/<table>.ndjson` before to be deleted.
+
+    Return the number of deleted documents per table.
+    """
+    purged = {}
+    for member in models(*targets):
+        options: Dict[str, Any] = {"batch_size": batch_size, "pause": pause}
+        if archive_dir is None:
+            purged[member.tablename] = member.purge(before, **options)
+        else:
+            path = os.path.join(archive_dir, f"{member.tablename}.ndjson")
+            with open(path, "a", encoding="utf-8") as archive:
+                purged[member.tablename] = member.purge(
+                    before, archive=archive, **options
+                )
+        LOG.info(
+            "purged %d objects from %s", purged[member.tablename], member.tablename
+        )
+    return purged
+
+
+def _run_concurrently(operations: List[Callable]):
+    """Run each operation with its own pooled connection.
+
+    An operation receives the RethinkDB instance and returns the query to run.
+    """
+    if not operations:
+        return
 
-    tables = rdb.table_list().run(conn)
-    if member.tablename not in tables:
-        LOG.info("create table %s", member.tablename)
-        rdb.table_create(member.tablename).run(conn)
-        indexes = member.get_indexes()
-        if indexes:
-            # TODO: at this time, it's only working with simple index
-            for index in indexes:
-                rdb.table(member.tablename).index_create(index).run(conn)
-                rdb.table(member.tablename).index_wait(index).run(conn)
+    def run(operation: Callable):
+        with db.connection() as (rdb, conn):
+            return operation(rdb).run(conn)
 
-    conn.close()
+    workers = max(1, min(db.POOL_MAX_SIZE or len(operations), len(operations)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # consume results to raise errors
+        list(executor.map(run, operations))
 
 
 def manage(mod: Any):
     """Get all classes from given module and call "auto()" function to create table.
 
-    This function accept a module, or the module name as string.
+    This function accept a module, or the module name as string. All tables
+    and indexes are created at once with :func:`sync`.
     """
-    imported = mod
-    if isinstance(mod, str):
-        imported = importlib.import_module(mod)
-    members = inspect.getmembers(imported)
-
-    for _, obj in members:
-        if inspect.isclass(obj):
-            auto(obj)
+    sync(mod)
 
 
-def introspect(modpath: str):
-    """Introspect module inside a given path."""
+def load(modpath: str) -> Any:
+    """Import a module from its path."""
     name = os.path.basename(modpath)
     name = name.replace(".py", "")
 
@@ -117,11 +446,54 @@ def introspect(modpath: str):
     mod = importlib.util.module_from_spec(spec)
     spec.loader.load_module(mod.__name__)
     spec.loader.exec_module(mod)
+    return mod
+
 
-    manage(mod)
+def introspect(modpath: str):
+    """Introspect module inside a given path."""
+    manage(load(modpath))
 
 
 if __name__ == "__main__":
-    for p in sys.argv[1:]:
-        for m in glob.glob("%s/**/*.py" % p, recursive=True):
-            introspect(m)
+    parser = argparse.ArgumentParser(
+        prog="python -m rethinkmodel.manage",
+        description="Create tables and indexes of the models found in paths.",
+    )
+    parser.add_argument("paths", nargs="+", help="directories of data modules")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only show the changes to apply"
+    )
+    parser.add_argument(
+        "--drop", action="store_true", help="drop indexes that are not declared"
+    )
+    parser.add_argument(
+        "--purge",
+        type=float,
+        metavar="DAYS",
+        help="instead of synchronizing, delete objects soft deleted DAYS ago",
+    )
+    parser.add_argument(
+        "--archive", metavar="DIR", help="append purged objects in DIR/<table>.ndjson"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1000, help="objects deleted per query"
+    )
+    parser.add_argument(
+        "--pause", type=float, default=0, help="seconds to wait between batches"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(format="%(levelname)s %(message)s")
+
+    modules = [
+        load(m) for p in args.paths for m in glob.glob("%s/**/*.py" % p, recursive=True)
+    ]
+    if args.purge is not None:
+        purge(
+            *modules,
+            before=datetime.now().astimezone() - timedelta(days=args.purge),
+            batch_size=args.batch_size,
+            pause=args.pause,
+            archive_dir=args.archive,
+        )
+    else:
+        sync(*modules, dry_run=args.dry_run, drop=args.drop)
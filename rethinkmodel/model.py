@@ -22,9 +22,9 @@ Each Model has got:
         categories: Optional[List[str]] # list of string, can be None
 
         @classmethod
-        def get_index(cls):
-            ''' Create an index on "name" property '''
-            return ['name']
+        def get_indexes(cls):
+            ''' Create an index on "username" property '''
+            return ['username']
 
     class Project(Model):
         # bind an User id here, because User is a model
@@ -47,15 +47,229 @@ To get Linked objects, it's possible to use "join()" method
 
 See Model methods documentation to have a look on arguments (like limit, offset, ...)
 
+Each blocking method has an asyncio version, prefixed by "a", that uses the
+asyncio connection pool of :mod:`rethinkmodel.db`:
+
+.. code-block::
+
+    user = await User.aget(id)
+    async for project in Project.astream({"owner": user.id}):
+        ...
+    await user.asave()
+    async for old, new in User.achanges():
+        ...
+
 """
+# pylint: disable=too-many-lines
+import asyncio
+import copy
+import inspect
+import json
+import time
+import uuid
 from datetime import datetime
-from typing import (Any, Callable, Dict, Generator, List, Optional, Type,
-                    Union, get_args, get_type_hints)
+from typing import (
+    IO,
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    FrozenSet,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
 
 from rethinkdb import RethinkDB, errors
 
 from . import db
-from .db import connect
+from .cache import get_cache
+from .db import (
+    aconnection,
+    adedicated_connection,
+    aiterate,
+    connect,
+    connection,
+    dedicated_connection,
+)
+from .feed import Subscription, get_hub
+from .identity import current_session
+from .query import QuerySet
+
+NoneType = type(None)
+
+
+class _Deferred:  # pylint: disable=too-few-public-methods
+    """Value of the fields that are not loaded yet, see :meth:`Model.only`."""
+
+    def __repr__(self) -> str:
+        """Representation of the deferred value."""
+        return "<deferred>"
+
+
+DEFERRED = _Deferred()
+
+
+class Index:
+    """Declaration of a secondary index, to return in :meth:`BaseModel.get_indexes`.
+
+    - name: the index name
+    - fields: a property name, or a list of properties for a compound index.
+      Default is the index name
+    - function: a function that receives the row and returns the indexed
+      value, to index an expression instead of properties
+    - multi: index each element of a list property, so that
+      :code:`get_all("tag", index="tags")` finds documents containing "tag"
+    - geo: index a geometry property
+    - renamed_from: the previous name of the index, an existing index with
+      that name is renamed instead of creating a new one
+
+    .. code::
+
+        @classmethod
+        def get_indexes(cls):
+            return [
+                "name",
+                Index("country_city", ["country", "city"]),
+                Index("tags", multi=True),
+                Index("location", geo=True),
+                Index("full_name", function=lambda row: row["first"] + row["last"]),
+            ]
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        name: str,
+        fields: Optional[Union[str, List[str], Tuple[str, ...]]] = None,
+        function: Optional[Callable] = None,
+        multi: bool = False,
+        geo: bool = False,
+        renamed_from: Optional[str] = None,
+    ):
+        """Declare the index."""
+        if fields is None:
+            fields = name
+        self.name = name
+        self.fields: Tuple[str, ...] = (
+            (fields,) if isinstance(fields, str) else tuple(fields)
+        )
+        self.function = function
+        self.multi = multi
+        self.geo = geo
+        self.renamed_from = renamed_from
+
+    @property
+    def selectable(self) -> bool:
+        """Return :code:`True` if the index selects documents by property values.
+
+        Only those indexes are used to select documents for dict filters.
+        """
+        return self.function is None and not self.multi and not self.geo
+
+    def create(self, table: Any) -> Any:
+        """Return the ReQL query that creates the index on :code:`table`."""
+        options = {option: True for option in ("multi", "geo") if getattr(self, option)}
+        if self.function is not None:
+            return table.index_create(self.name, self.function, **options)
+        if self.fields == (self.name,):
+            return table.index_create(self.name, **options)
+
+        fields = self.fields
+        if len(fields) == 1:
+            return table.index_create(self.name, lambda row: row[fields[0]], **options)
+        return table.index_create(
+            self.name, lambda row: [row[field] for field in fields], **options
+        )
+
+    def __repr__(self) -> str:
+        """Representation of the index."""
+        return f"<Index {self.name} {self.fields}>"
+
+
+class Schema:  # pylint: disable=too-few-public-methods
+    """Compiled description of the fields of a Model class.
+
+    It's computed once per class, on first use, and kept until the
+    annotations of the class (or its parents) change. See
+    :meth:`Model.schema`.
+
+    - fields: the annotated attribute names
+    - relations: fields linked to one Model, as :code:`{name: Model}`
+    - list_relations: fields linked to a list of Models, as :code:`{name: Model}`
+    - optional: fields that accept :code:`None`
+    - defaults: values to set on construction
+    """
+
+    def __init__(self, model: Type["BaseModel"]):
+        """Introspect the model annotations."""
+        self.hints: Dict[str, Any] = get_type_hints(model)
+        self.fields: Tuple[str, ...] = tuple(self.hints.keys())
+        self.relations: Dict[str, Type["Model"]] = {}
+        self.list_relations: Dict[str, Type["Model"]] = {}
+        self.defaults: Dict[str, Any] = {}
+
+        optional = []
+        for name, hint in self.hints.items():
+            linked, is_list, is_optional = self.__inspect(hint)
+            if linked is not None and is_list:
+                self.list_relations[name] = linked
+            elif linked is not None:
+                self.relations[name] = linked
+            if is_optional:
+                optional.append(name)
+
+            default = getattr(model, name, None)
+            if callable(default) or isinstance(default, property):
+                default = None
+            self.defaults[name] = default
+
+        self.optional: FrozenSet[str] = frozenset(optional)
+        self.signature = self.fingerprint(model)
+
+    @staticmethod
+    def fingerprint(model: Type["BaseModel"]) -> Tuple:
+        """Return a cheap signature of the annotations of the class hierarchy."""
+        return tuple(
+            (id(annotations), len(annotations or ()))
+            for annotations in (
+                klass.__dict__.get("__annotations__") for klass in model.__mro__
+            )
+        )
+
+    @staticmethod
+    def __inspect(hint: Any) -> Tuple[Optional[Type["Model"]], bool, bool]:
+        """Return the linked Model, and if the field is a list or is optional."""
+        linked, is_list, is_optional = None, False, False
+        pending = [hint]
+        while pending:
+            hint = pending.pop()
+            origin = get_origin(hint)
+            if origin is Union:
+                is_optional = is_optional or NoneType in get_args(hint)
+                pending.extend(arg for arg in get_args(hint) if arg is not NoneType)
+            elif origin in (list, set, tuple):
+                is_list = True
+                pending.extend(get_args(hint))
+            elif origin is type:
+                pending.extend(get_args(hint))
+            elif inspect.isclass(hint) and issubclass(hint, Model):
+                linked = hint
+        return linked, is_list, is_optional
+
+    def new_values(self) -> Dict[str, Any]:
+        """Return a copy of default values to set on a new object."""
+        return {
+            name: copy.copy(value) if isinstance(value, (list, dict, set)) else value
+            for name, value in self.defaults.items()
+        }
 
 
 class BaseModel:  # pylint: disable=too-few-public-methods
@@ -92,6 +306,37 @@ class BaseModel:  # pylint: disable=too-few-public-methods
             manage a cascade deletion.
         """
 
+    @classmethod
+    def on_created_many(cls, objects: List["BaseModel"]):
+        """Is called after :meth:`Model.save_many` with :code:`hooks="batch"`.
+
+        It receives the created objects. By default, :meth:`on_created` is
+        called for each object.
+        """
+        for obj in objects:
+            obj.on_created()
+
+    @classmethod
+    def on_modified_many(cls, objects: List["BaseModel"]):
+        """Is called after a batch update with :code:`hooks="batch"`.
+
+        Batch updates are :meth:`Model.save_many` and :meth:`Model.update_where`.
+        It receives the modified objects. By default, :meth:`on_modified` is
+        called for each object.
+        """
+        for obj in objects:
+            obj.on_modified()
+
+    @classmethod
+    def on_deleted_many(cls, objects: List["BaseModel"]):
+        """Is called after :meth:`Model.delete_where` with :code:`hooks="batch"`.
+
+        It receives the deleted objects. By default, :meth:`on_deleted` is
+        called for each object.
+        """
+        for obj in objects:
+            obj.on_deleted()
+
     @classmethod
     def get_indexes(cls) -> Optional[Union[List, Dict]]:
         """You can override this method to return a list of indexes.
@@ -99,15 +344,123 @@ class BaseModel:  # pylint: disable=too-few-public-methods
         This method is called by :meth:`rethinkmodel.manage.auto` function to
         prepare indexes in database.
 
-        .. warning::
+        The list can contain strings (name of properties to use as index) and
+        :class:`Index` declarations for compound, multi, geo or function
+        indexes. A dictionary declares named indexes, each one on a property
+        or on a list of properties (compound index):
+
+        .. code::
+
+            @classmethod
+            def get_indexes(cls):
+                return {
+                    "name": "name",
+                    "country_city": ["country", "city"],
+                }
+
+        Declared indexes are used by queries to select objects, see
+        :meth:`rethinkmodel.query.QuerySet.explain`.
+        """
+        return None
+
+    @classmethod
+    def get_table_options(cls) -> Optional[Dict[str, Any]]:
+        """You can override this method to configure the table in the cluster.
+
+        Accepted keys are the :code:`table_create` options: "shards",
+        "replicas" (a number, or a dict of server tags and numbers),
+        "primary_replica_tag" and "durability" ("hard" or "soft").
+
+        :meth:`rethinkmodel.manage.sync` creates the table with these options,
+        and reconfigures existing tables when their configuration differs.
+
+        .. code::
+
+            @classmethod
+            def get_table_options(cls):
+                return {
+                    "shards": 4,
+                    "replicas": {"paris": 2, "london": 1},
+                    "primary_replica_tag": "paris",
+                }
+        """
+        return None
+
+    @classmethod
+    def get_write_options(cls) -> Optional[Dict[str, Any]]:
+        """You can override this method to set the default write options.
+
+        Accepted keys are "durability" ("hard" or "soft") and "noreply"
+        (:code:`True` to not wait for the write result). They are used by
+        :meth:`Model.save`, :meth:`Model.delete` and :meth:`Model.truncate`,
+        and can be overridden per call.
 
-            This is a work in progress. At this time, you can only return a list of
-            strings (name of properties to use as index)
+        .. code::
+
+            class Measure(Model):
+                value: float
+
+                @classmethod
+                def get_write_options(cls):
+                    return {"durability": "soft", "noreply": True}
+
+        Soft durability acknowledges writes before they are written on disk,
+        noreply writes do not wait at all and errors are not reported. Call
+        :func:`rethinkmodel.db.flush` to wait for noreply writes.
         """
         return None
 
+    @classmethod
+    def get_cache_options(cls) -> Optional[Dict[str, Any]]:
+        """You can override this method to cache the objects read by :meth:`Model.get`.
+
+        Accepted keys are "max_size" (number of cached documents, default
+        1000), "ttl" (seconds before a cached document is read again, default
+        is no expiry) and "feed_size" (changes waiting in the invalidation
+        changefeed). Return :code:`None` to not use the cache.
+
+        .. code::
+
+            class Country(Model):
+                name: str
+
+                @classmethod
+                def get_cache_options(cls):
+                    return {"max_size": 500, "ttl": 300}
+
+        See :mod:`rethinkmodel.cache`.
+        """
+        return None
+
+    @classmethod
+    def index_specs(cls) -> Dict[str, Index]:
+        """Return the declared indexes as :class:`Index` objects, by name."""
+        indexes = cls.get_indexes() or []
+        if isinstance(indexes, dict):
+            indexes = [
+                index if isinstance(index, Index) else Index(name, index)
+                for name, index in indexes.items()
+            ]
+        specs = [
+            index if isinstance(index, Index) else Index(index) for index in indexes
+        ]
+        return {spec.name: spec for spec in specs}
 
-class Model(BaseModel):
+    @classmethod
+    def indexed_fields(cls) -> Dict[str, Tuple[str, ...]]:
+        """Return the indexes that select documents by property values.
+
+        The result maps index names to a tuple of properties, a simple index
+        has only one property. Multi, geo and function indexes are excluded.
+        """
+        return {
+            name: spec.fields
+            for name, spec in cls.index_specs().items()
+            if spec.selectable
+        }
+
+
+class Model(BaseModel):  # pylint: disable=too-many-public-methods
     """Model is the parent class of all tables for RethinkDB.
 
     The constructor accepts kwargs with attributes to set. For example,
@@ -130,22 +483,27 @@ class Model(BaseModel):
 
         :code:kwargs is set to object attributes if they are declared in annotations
         """
+        # modified attributes, and copy of lists and dicts, since last save
+        self.__dirty: Set[str] = set()
+        self.__snapshot: Dict[str, Any] = {}
+
+        # objects built by asynchronous methods load deferred fields with aload()
+        self.__asynchronous = False
+
         # we must have ID
         self.id = None  # pylint: disable=invalid-name
 
-        # keep connection
-        self.__r, self.__conn = connect()
-
         # default properties
         self.created_on = None
         self.updated_on = None
         self.deleted_on = None
 
-        annotations = get_type_hints(self.__class__).keys()
-        for attr in annotations:
-            setattr(self, attr, None)
+        schema = self.schema()
+        for attr, value in schema.new_values().items():
+            setattr(self, attr, value)
 
         # and then, for given parameters...
+        annotations = schema.hints
         for name, value in kwargs.items():
             # see __setattr__ which calls __validate()
             if name not in annotations and name != "id":
@@ -154,6 +512,19 @@ class Model(BaseModel):
                 )
             setattr(self, name, value)
 
+    @classmethod
+    def schema(cls) -> Schema:
+        """Return the compiled :class:`Schema` of the class.
+
+        It's computed on first call and cached in the class. The cache is
+        refreshed if annotations are changed.
+        """
+        schema = vars(cls).get("_schema")
+        if schema is None or schema.signature != Schema.fingerprint(cls):
+            schema = Schema(cls)
+            cls._schema = schema
+        return schema
+
     @classmethod
     @property
     def tablename(cls) -> str:
@@ -197,11 +568,21 @@ class Model(BaseModel):
         return tablename
 
     def todict(self) -> dict:
-        """Transform the current object to dict that can be written in RethinkDB."""
-        annotations = get_type_hints(self.__class__)
+        """Transform the current object to dict that can be written in RethinkDB.
+
+        Deferred fields are loaded.
+        """
+        data = self._document(self.schema().fields)
 
+        # set the id if it exists
+        if self.id:
+            data["id"] = self.id
+        return data
+
+    def _document(self, fields: Iterable[str]) -> dict:
+        """Return the values to write for the given fields."""
         # get only annotated attributes
-        data = {k: getattr(self, k) for k in annotations.keys()}
+        data = {k: getattr(self, k) for k in fields}
         for name, val in data.items():
             if isinstance(val, Model):
                 data[name] = val.id
@@ -209,124 +590,1129 @@ class Model(BaseModel):
                 data[name] = [
                     model.id if isinstance(model, Model) else model for model in val
                 ]
+        return data
 
-        # set the id if it exists
+    def changed_fields(self) -> Set[str]:
+        """Return the fields modified since the object was fetched or saved.
+
+        Fields are modified by assignation, lists and dicts are also compared to
+        their value when the object was fetched or saved.
+        """
+        fields = self.schema().hints
+        changed = {name for name in self.__dirty if name in fields}
+        changed.update(
+            name
+            for name, value in self.__snapshot.items()
+            if getattr(self, name) != value
+        )
+        return changed
+
+    def _mark_clean(self):
+        """Forget modifications, the object is synchronized with database."""
+        self.__snapshot = {}
+        for name in self.schema().fields:
+            value = self._raw(name)
+            if isinstance(value, (list, dict)):
+                self.__snapshot[name] = copy.copy(value)
+        self.__dirty = set()
+
+    def _raw(self, name: str) -> Any:
+        """Return an attribute, without loading it if it's deferred."""
+        return super().__getattribute__(name)
+
+    def _defer(self, fields: Iterable[str], asynchronous: bool = False):
+        """Mark fields as not loaded, they will be loaded on first access.
+
+        If :code:`asynchronous` is :code:`True`, they must be loaded with
+        :meth:`aload`.
+        """
+        self.__asynchronous = asynchronous
+        for name in fields:
+            super().__setattr__(name, DEFERRED)
+
+    def deferred_fields(self) -> Set[str]:
+        """Return the fields that are not loaded yet."""
+        return {name for name in self.schema().fields if self._raw(name) is DEFERRED}
+
+    def __load_deferred(self):
+        """Load every deferred field in one query, with linked objects."""
+        deferred = self.deferred_fields()
+        if not deferred:
+            return
+
+        if self.__asynchronous:
+            raise RuntimeError(
+                f"Deferred fields of {type(self).__name__} {self.id} cannot be "
+                "loaded on access, the object was fetched by an asynchronous "
+                "method: await its aload() method before to read them"
+            )
+
+        document: Dict[str, Any] = {}
         if self.id:
-            data["id"] = self.id
-        return data
+            with connection() as (rdb, conn):
+                document = self.__deferred_query(rdb, deferred).run(conn)
+
+        loaded = self.__partial(document, deferred)
+        self.__link([loaded])
+        self.__take_deferred(loaded, deferred)
+
+    async def aload(self) -> "Model":
+        """Load every deferred field in the running event loop, see :meth:`only`.
+
+        Objects fetched by asynchronous methods (:meth:`aget`,
+        :meth:`rethinkmodel.query.QuerySet.aall`,
+        :meth:`rethinkmodel.query.QuerySet.astream`...) do not load deferred
+        fields on first access, as the blocking query would stop the event
+        loop: reading them raises a :code:`RuntimeError`. Await this method
+        before. Linked objects are fetched as in :meth:`afrom_documents`.
+
+        .. code::
+
+            user = await User.query().only("name").afirst()
+            await user.aload()
+            print(user.email)
+
+        Return the object itself.
+        """
+        deferred = self.deferred_fields()
+        if not deferred:
+            return self
+
+        document: Dict[str, Any] = {}
+        if self.id:
+            async with aconnection() as (rdb, conn):
+                document = await self.__deferred_query(rdb, deferred).run(conn)
+
+        loaded = self.__partial(document, deferred)
+        await self.__alink([loaded])
+        self.__take_deferred(loaded, deferred)
+        return self
 
-    def save(self) -> "Model":
+    def __deferred_query(self, rdb: RethinkDB, deferred: Set[str]) -> Any:
+        """Return the query of the deferred fields of the object."""
+        return rdb.table(self.tablename).get(self.id).pluck(*deferred).default({})
+
+    def __partial(self, document: dict, deferred: Set[str]) -> "Model":
+        """Build an object with the loaded fields, to fetch its linked objects.
+
+        It's not registered in the session, where this object is already known.
+        """
+        # pylint: disable=protected-access
+        loaded = type(self)(**{**document, "id": self.id})
+        loaded._defer(set(self.schema().fields) - deferred)
+        return loaded
+
+    def __take_deferred(self, loaded: "Model", deferred: Set[str]):
+        """Set the deferred fields from the partial object."""
+        # pylint: disable=protected-access
+        for name in deferred:
+            value = loaded._raw(name)
+            super().__setattr__(name, value)
+            if isinstance(value, (list, dict)):
+                self.__snapshot[name] = copy.copy(value)
+
+    def save(
+        self,
+        force: bool = False,
+        return_changes: bool = False,
+        durability: Optional[str] = None,
+        noreply: Optional[bool] = None,
+    ) -> "Model":
         """Insert or update data if self.id is set.
 
+        On update, only the fields returned by :meth:`changed_fields` are sent,
+        and nothing is done if there is no change. Set :code:`force` to
+        :code:`True` to write the whole object.
+
+        If :code:`return_changes` is :code:`True`, the document written by
+        RethinkDB is returned in the same round-trip and the object is updated
+        with it. This is useful when you set values that are computed by the
+        server, e.g. :code:`rdb.row["counter"] + 1`.
+
+        :code:`durability` and :code:`noreply` override the options returned
+        by :meth:`get_write_options`. With :code:`noreply`, the id of a new
+        object is generated by the client, and write errors are not reported.
+
+        Inside a :func:`rethinkmodel.session`, the object is queued and saved
+        when the session ends, unless an option is given.
+
         Return the save object (self)
         """
+        active = current_session()
+        if active is not None and not (
+            force or return_changes or durability or noreply
+        ):
+            active.add(self)
+            return self
+
+        write = self.__prepare_save(force, return_changes, durability, noreply)
+        if write is not None:
+            query, run_options, data = write
+            self.__saved(self.__run_write(query, run_options), data)
+        return self
+
+    async def asave(
+        self,
+        force: bool = False,
+        return_changes: bool = False,
+        durability: Optional[str] = None,
+        noreply: Optional[bool] = None,
+    ) -> "Model":
+        """Asynchronous version of :meth:`save`.
+
+        Noreply writes are sent on the asyncio pool, see
+        :func:`rethinkmodel.db.aflush`.
+        """
+        write = self.__prepare_save(force, return_changes, durability, noreply)
+        if write is not None:
+            query, run_options, data = write
+            self.__saved(await self.__arun_write(query, run_options), data)
+        return self
+
+    def __prepare_save(
+        self,
+        force: bool,
+        return_changes: bool,
+        durability: Optional[str],
+        noreply: Optional[bool],
+    ) -> Optional[Tuple[Callable, Dict[str, Any], dict]]:
+        """Return the write query, its run options and the written data.
+
+        Return :code:`None` if there is nothing to update.
+        """
         now = datetime.astimezone(datetime.now())
+        options = {"return_changes": True} if return_changes else {}
+        run_options = self.__write_options(durability, noreply)
+        if return_changes and run_options.get("noreply"):
+            raise ValueError("return_changes cannot be used with noreply")
+
         if self.id:
+            changed = self.changed_fields()
+            if not changed and not force:
+                return None
+
             self.updated_on = now
-            data = self.todict()
-            res = (
-                self.__r.table(self.tablename)
+            if force:
+                data = self.todict()
+            else:
+                # deferred fields that are not modified are not loaded
+                changed.add("updated_on")
+                data = self._document(changed)
+            return (
+                lambda rdb: rdb.table(self.tablename)
                 .get(self.id)
-                .update(data)
-                .run(self.__conn)
+                .update(data, **options),
+                run_options,
+                data,
             )
-            if res.get("errors") != 0:
+
+        self.created_on = now
+        data = self.todict()
+        del data["id"]
+        if run_options.get("noreply"):
+            # there is no response to get the generated key
+            data["id"] = str(uuid.uuid4())
+        return (
+            lambda rdb: rdb.table(self.tablename).insert(data, **options),
+            run_options,
+            data,
+        )
+
+    def __saved(self, res: Optional[dict], data: dict):
+        """Check the result of the write query, and call hooks."""
+        if self.id:
+            self.__evict(self.id)
+            if res is not None and res.get("errors") != 0:
                 msg = f"An error occured on create in {self.tablename} entry: {res['first_error']}"
                 raise errors.ReqlError(msg)
+            self.__apply_changes(res)
+            self._mark_clean()
             self.on_modified()
+            return
+
+        if res is None:
+            self.id = data["id"]
+        elif res.get("errors") != 0:
+            msg = f"An error occured on insert in {self.tablename} entry: {res['first_error']}"
+            raise errors.ReqlError(msg)
         else:
-            self.created_on = now
-            data = self.todict()
-            del data["id"]
-            res = self.__r.table(self.tablename).insert(data).run(self.__conn)
-            if res.get("errors") != 0:
-                msg = f"An error occured on insert in {self.tablename} entry: {res['first_error']}"
-                raise errors.ReqlError(msg)
             self.id = res.get("generated_keys")[0]
+            self.__apply_changes(res)
+        self._mark_clean()
+        self.on_created()
+
+    def upsert(
+        self,
+        conflict: Union[str, Callable] = "update",
+        return_changes: bool = True,
+        durability: Optional[str] = None,
+    ) -> "Model":
+        """Insert the object, or update it if the id already exists, in one query.
+
+        This is useful when you know the id but not if the document exists,
+        there is no need to :meth:`get` it before.
+
+        The :code:`conflict` argument can be:
+
+        - "update": the fields are merged in the existing document
+        - "replace": the existing document is replaced
+        - a function that receives the id, the old and the new document, and
+          returns the document to write, see RethinkDB :code:`insert` documentation
+
+        With "update" and "replace", :code:`created_on` is kept from the
+        existing document. If :code:`return_changes` is :code:`True`, the
+        object is updated with the written document.
+
+        :meth:`on_created` or :meth:`on_modified` is called depending on what
+        RethinkDB did, so the result is always awaited, even if
+        :meth:`get_write_options` sets "noreply".
+        """
+        now = datetime.astimezone(datetime.now())
+        self.created_on = self.created_on or now
+        self.updated_on = now
+        data = self.todict()
+        if not self.id:
+            del data["id"]
+
+        def keep_created(old, new):
+            return {"created_on": old["created_on"].default(new["created_on"])}
+
+        strategies = {
+            "update": lambda _, old, new: old.merge(new).merge(keep_created(old, new)),
+            "replace": lambda _, old, new: new.merge(keep_created(old, new)),
+        }
+        if isinstance(conflict, str):
+            conflict = strategies.get(conflict, conflict)
+
+        res = self.__run_write(
+            lambda rdb: rdb.table(self.tablename).insert(
+                data, conflict=conflict, return_changes=return_changes
+            ),
+            self.__write_options(durability, noreply=False),
+        )
+        if self.id:
+            self.__evict(self.id)
+        if res.get("errors") != 0:
+            msg = f"An error occured on upsert in {self.tablename} entry: {res['first_error']}"
+            raise errors.ReqlError(msg)
+
+        if res.get("generated_keys"):
+            self.id = res["generated_keys"][0]
+        self.__apply_changes(res)
+        self._mark_clean()
+        if res.get("inserted"):
             self.on_created()
+        else:
+            self.on_modified()
         return self
 
+    def __apply_changes(self, res: Optional[dict]):
+        """Set values from the "changes" of a write result.
+
+        Linked objects are kept if the linked id didn't change.
+        """
+        changes = res.get("changes") if res else None
+        if not changes or not changes[0].get("new_val"):
+            return
+
+        schema = self.schema()
+        for name, value in changes[0]["new_val"].items():
+            if name not in schema.hints:
+                continue
+            current = self._raw(name)
+            if isinstance(current, Model) and current.id == value:
+                continue
+            if (
+                isinstance(current, list)
+                and [item.id if isinstance(item, Model) else item for item in current]
+                == value
+            ):
+                continue
+            setattr(self, name, value)
+
+    @classmethod
+    def __write_options(
+        cls, durability: Optional[str] = None, noreply: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Return the run options of a write, call options override model ones."""
+        options = dict(cls.get_write_options() or {})
+        if durability is not None:
+            options["durability"] = durability
+        if noreply is not None:
+            options["noreply"] = noreply
+        if not options.get("noreply"):
+            options.pop("noreply", None)
+        return options
+
+    @staticmethod
+    def __run_write(query: Callable, options: Dict[str, Any]) -> Optional[dict]:
+        """Run the write query built by "query", return None for noreply writes."""
+        options = dict(options)
+        pool = db.get_pool()
+        if options.pop("noreply", False):
+            pool.run_noreply(query(pool.rdb), **options)
+            return None
+
+        with connection() as (rdb, conn):
+            return query(rdb).run(conn, **options)
+
+    @staticmethod
+    async def __arun_write(query: Callable, options: Dict[str, Any]) -> Optional[dict]:
+        """Asynchronous version of :meth:`__run_write`."""
+        options = dict(options)
+        pool = db.get_async_pool()
+        if options.pop("noreply", False):
+            await pool.run_noreply(query(pool.rdb), **options)
+            return None
+
+        async with aconnection() as (rdb, conn):
+            return await query(rdb).run(conn, **options)
+
+    @classmethod
+    def save_many(  # pylint: disable=too-many-arguments,too-many-locals,too-many-branches,protected-access
+        cls,
+        objects: List["Model"],
+        chunk_size: int = 1000,
+        durability: Optional[str] = None,
+        conflict: str = "update",
+        hooks: Optional[str] = "object",
+        changed_only: bool = False,
+    ) -> Dict[str, Any]:
+        """Insert or update a list of objects with one query per chunk.
+
+        Objects without :code:`id` get a random UUID and are inserted.
+        Objects with an :code:`id` are written with the :code:`conflict`
+        strategy ("update" by default, like :meth:`save`, or "replace", "error").
+        :code:`durability` can be "hard" or "soft", default is the one returned
+        by :meth:`get_write_options`. Results are always awaited, to report
+        errors.
+
+        Errors do not stop the process, the returned dict contains the number of
+        "inserted", "replaced" and "unchanged" documents, and the "errors" list
+        of :code:`(object, message)` tuples. Objects that were not inserted
+        have no id.
+
+        The :code:`hooks` argument sets how events are called, after every
+        chunk is written:
+
+        - "object": :meth:`on_created` and :meth:`on_modified` are called for each object
+        - "batch": :meth:`on_created_many` and :meth:`on_modified_many` are called once
+        - :code:`None`: no event is called
+
+        If :code:`changed_only` is :code:`True`, objects with an :code:`id`
+        that are not modified are skipped, and only the fields returned by
+        :meth:`changed_fields` are written for the others, as :meth:`save`
+        does. It must be used with the "update" conflict strategy, on objects
+        that exist in database.
+        """
+        now = datetime.astimezone(datetime.now())
+        if changed_only:
+            objects = [obj for obj in objects if not obj.id or obj.changed_fields()]
+        report: Dict[str, Any] = {
+            "inserted": 0,
+            "replaced": 0,
+            "unchanged": 0,
+            "errors": [],
+        }
+        created: List[Model] = []
+        modified: List[Model] = []
+
+        options: Dict[str, Any] = {"conflict": conflict, "return_changes": "always"}
+        durability = cls.__write_options(durability).get("durability")
+        if durability is not None:
+            options["durability"] = durability
+
+        # ids are generated before the writes, so that errors are bound by id
+        # and objects can link new objects of other chunks
+        new_ids = set()
+        for obj in objects:
+            if not obj.id:
+                obj.id = str(uuid.uuid4())
+                new_ids.add(obj.id)
+
+        chunk_size = max(1, chunk_size)
+        for start in range(0, len(objects), chunk_size):
+            chunk = objects[start : start + chunk_size]
+            new_objects = [obj for obj in chunk if obj.id in new_ids]
+            existing = [obj for obj in chunk if obj.id not in new_ids]
+            for obj in existing:
+                obj.updated_on = now
+            for obj in new_objects:
+                obj.created_on = now
+
+            documents = [
+                (
+                    obj._document(obj.changed_fields() | {"id", "updated_on"})
+                    if changed_only and obj.id not in new_ids
+                    else obj.todict()
+                )
+                for obj in chunk
+            ]
+            try:
+                with connection() as (rdb, conn):
+                    res = (
+                        rdb.table(cls.tablename).insert(documents, **options).run(conn)
+                    )
+            except BaseException:
+                # objects of this chunk and of the next ones are still new
+                for obj in objects[start:]:
+                    if obj.id in new_ids:
+                        obj.id = None
+                raise
+
+            cls.__evict(*[obj.id for obj in existing])
+            for key in ("inserted", "replaced", "unchanged"):
+                report[key] += res.get(key, 0)
+
+            failed = cls.__failed_documents(chunk, res)
+            report["errors"].extend(failed.items())
+
+            for obj in new_objects:
+                if obj in failed:
+                    obj.id = None
+            created.extend(obj for obj in new_objects if obj not in failed)
+            modified.extend(obj for obj in existing if obj not in failed)
+            for obj in chunk:
+                if obj not in failed:
+                    obj._mark_clean()
+
+        if hooks == "batch":
+            cls.on_created_many(created)
+            cls.on_modified_many(modified)
+        elif hooks == "object":
+            for obj in created:
+                obj.on_created()
+            for obj in modified:
+                obj.on_modified()
+
+        return report
+
+    @staticmethod
+    def __failed_documents(chunk: List["Model"], res: dict) -> Dict["Model", str]:
+        """Return objects that were not written with the error message.
+
+        Errors are read from the "changes" list, that has one entry per
+        document, and objects are found with their id. Errors of entries
+        without document are bound to the objects that have no entry.
+        """
+        if not res.get("errors"):
+            return {}
+
+        by_id = {obj.id: obj for obj in chunk}
+        failed: Dict[Model, str] = {}
+        unbound: List[str] = []
+        for change in res.get("changes", []):
+            document = change.get("new_val") or change.get("old_val") or {}
+            obj = by_id.pop(document.get("id"), None)
+            if "error" not in change:
+                continue
+            if obj is None:
+                unbound.append(change["error"])
+            else:
+                failed[obj] = change["error"]
+        failed.update(zip(by_id.values(), unbound))
+        return failed
+
     @classmethod
-    def get(cls, data_id: Optional[str]) -> Optional["Model"]:
-        """Return a Model object fetched from database for the giver ID."""
+    def get(
+        cls,
+        data_id: Optional[str],
+        prefetch: bool = True,
+        fields: Optional[Iterable[str]] = None,
+        cache: bool = True,
+    ) -> Optional["Model"]:
+        """Return a Model object fetched from database for the giver ID.
+
+        See :meth:`filter` for :code:`prefetch` and :code:`fields` arguments.
+
+        If the model declares :meth:`BaseModel.get_cache_options`, the
+        document is read from the cache. Set :code:`cache` to :code:`False` to
+        read it from the database. Partial objects are never cached.
+        """
         if data_id is None:
             return None
 
-        if db.SOFT_DELETE:
-            # filter method alreadu manage soft_delete attribute, use it:
-            result = cls.filter({"id": data_id})
-            if result and len(result) > 0:
-                return result[0]
+        active = current_session()
+        if active is not None and active.get(cls, data_id) is not None:
+            return active.get(cls, data_id)
+
+        document_cache = get_cache(cls) if cache and fields is None else None
+        result = document_cache.get(data_id) if document_cache else None
+        deferred: Tuple[str, ...] = ()
+        if result is None:
+            token = document_cache.reserve(data_id) if document_cache else None
+            try:
+                with connection() as (rdb, conn):
+                    query = rdb.table(cls.tablename).get(data_id)
+                    if fields is not None:
+                        # deleted_on is needed to check soft deletion
+                        deferred = tuple(
+                            name
+                            for name in cls.query().only(*fields).deferred_fields()
+                            if name != "deleted_on"
+                        )
+                        # pluck fails on the null of a missing document
+                        query = query.pluck("id", "deleted_on", *fields).default(None)
+                    result = query.run(conn)
+            finally:
+                if document_cache is not None and token is not None:
+                    alive = result and result.get("deleted_on") is None
+                    document_cache.put(data_id, result if alive else None, token)
+
+        if not result:
+            return None
+
+        if db.SOFT_DELETE and result.get("deleted_on") is not None:
+            return None
+
+        return cls._build_all([result], prefetch, deferred=deferred)[0]
+
+    @classmethod
+    def __evict(cls, *ids: Any):
+        """Remove written documents from the cache."""
+        ids = tuple(data_id for data_id in ids if data_id)
+        document_cache = get_cache(cls) if ids else None
+        if document_cache is not None:
+            document_cache.evict(*ids)
+
+    @classmethod
+    def __clear_cache(cls):
+        """Remove every document from the cache, after a write by filter."""
+        document_cache = get_cache(cls)
+        if document_cache is not None:
+            document_cache.clear()
+
+    @classmethod
+    def cache_stats(cls) -> Optional[Dict[str, int]]:
+        """Return the cache statistics, or :code:`None` if there is no cache.
+
+        See :meth:`rethinkmodel.cache.DocumentCache.stats`.
+        """
+        document_cache = get_cache(cls)
+        return document_cache.stats() if document_cache else None
+
+    @classmethod
+    async def aget(cls, data_id: Optional[str]) -> Optional["Model"]:
+        """Asynchronous version of :meth:`get`.
+
+        Linked objects are prefetched, each linked Model is fetched
+        concurrently.
+        """
+        if data_id is None:
             return None
 
-        rdb, conn = connect()
-        result = rdb.table(cls.tablename).get(data_id).run(conn)
-        conn.close()
+        active = current_session()
+        if active is not None and active.get(cls, data_id) is not None:
+            return active.get(cls, data_id)
+
+        async with aconnection() as (rdb, conn):
+            result = await rdb.table(cls.tablename).get(data_id).run(conn)
 
         if not result:
             return None
 
-        return cls.__build(result)
+        if db.SOFT_DELETE and result.get("deleted_on") is not None:
+            return None
+
+        return (await cls.afrom_documents([result]))[0]
 
     @classmethod
-    def get_all(
+    def get_all(  # pylint: disable=too-many-arguments
         cls,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
         order_by: Optional[Union[Dict, str]] = None,
-    ) -> List["Model"]:
-        """Get collection of results."""
-        select = {}
-        if db.SOFT_DELETE:
-            select["deleted_on"] = None
-
-        rdb, conn = connect()
-        query = cls.__prepare_query(rdb, limit, offset, order_by)
-        results = query.filter(select).run(conn)
-        conn.close()
+        prefetch: bool = True,
+        after: Optional[str] = None,
+        keyset: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> "ModelList":
+        """Get collection of results.
+
+        See :meth:`filter` for :code:`prefetch`, :code:`after`, :code:`keyset`
+        and :code:`fields` arguments.
+        """
+        query = cls.__prepare_query(limit, offset, order_by, prefetch, after, keyset)
+        if fields is not None:
+            query = query.only(*fields)
+        return query.all()
 
-        return [cls.__build(u) for u in results]
+    def delete(self, durability: Optional[str] = None, noreply: Optional[bool] = None):
+        """Delete this object from DB.
 
-    def delete(self):
-        """Delete this object from DB."""
-        if db.SOFT_DELETE:
-            self.__r.table(self.tablename).get(self.id).update(
-                {"deleted_on": datetime.astimezone(datetime.now())}
-            ).run(self.__conn)
-        else:
-            self.__r.table(self.tablename).get(self.id).delete().run(self.__conn)
+        See :meth:`save` for :code:`durability` and :code:`noreply` arguments.
+        """
+        active = current_session()
+        if active is not None:
+            active.forget(self)
+        self.__run_write(
+            self.__delete_query(), self.__write_options(durability, noreply)
+        )
+        self.__evict(self.id)
+        self.on_deleted()
+        self.id = None
 
+    async def adelete(
+        self, durability: Optional[str] = None, noreply: Optional[bool] = None
+    ):
+        """Asynchronous version of :meth:`delete`."""
+        active = current_session()
+        if active is not None:
+            active.forget(self)
+        await self.__arun_write(
+            self.__delete_query(), self.__write_options(durability, noreply)
+        )
+        self.__evict(self.id)
         self.on_deleted()
         self.id = None
 
+    def __delete_query(self) -> Callable:
+        """Return the query that deletes, or soft deletes, this object."""
+        now = datetime.astimezone(datetime.now())
+
+        def query(rdb):
+            document = rdb.table(self.tablename).get(self.id)
+            if db.SOFT_DELETE:
+                return document.update({"deleted_on": now})
+            return document.delete()
+
+        return query
+
     @classmethod
-    def delete_id(cls, idx: str):
+    def delete_id(
+        cls, idx: str, durability: Optional[str] = None, noreply: Optional[bool] = None
+    ):
         """Delete the object that is identified by :code:`id`."""
         data = cls(id=idx)
         data.id = idx
-        data.delete()
+        data.delete(durability=durability, noreply=noreply)
 
     @classmethod
-    def __build(cls, result: dict) -> "Model":
+    def update_where(
+        cls,
+        select: Optional[Union[Dict, Callable]],
+        changes: Union[Dict, Callable],
+        hooks: Optional[str] = None,
+        durability: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """Update every object that matches :code:`select` with one query.
+
+        :code:`select` is a filter, like in :meth:`filter`, and declared
+        indexes are used when possible. :code:`changes` is a dict of values
+        to set, or a function that receives the row and returns the dict.
+        :code:`updated_on` is set on every updated object, soft deleted
+        objects are not updated.
+
+        .. code::
+
+            User.update_where({"country": "fr"}, {"active": False})
+            User.update_where(
+                lambda row: row["age"] > 18,
+                lambda row: {"points": row["points"] + 1},
+            )
+
+        Return the number of "replaced", "unchanged" and "errors" documents.
+
+        By default, no event is called. Set :code:`hooks` to "object" or
+        "batch", like in :meth:`save_many`, to build the updated objects and
+        call :meth:`on_modified` or :meth:`on_modified_many`. This asks
+        RethinkDB to return every updated document.
+        """
+        now = datetime.astimezone(datetime.now())
+
+        def query(rdb):
+            def computed(row):
+                return rdb.expr(changes(row)).merge({"updated_on": now})
+
+            values = computed if callable(changes) else {**changes, "updated_on": now}
+            selection = cls.query().filter(select).build(rdb)
+            return selection.update(values, return_changes=hooks is not None)
+
+        res = cls.__run_write(query, cls.__write_options(durability, noreply=False))
+        cls.__clear_cache()
+        if hooks is not None:
+            objects = cls.__changed_objects(res, "new_val")
+            if hooks == "batch":
+                cls.on_modified_many(objects)
+            else:
+                for obj in objects:
+                    obj.on_modified()
+
+        return {key: res.get(key, 0) for key in ("replaced", "unchanged", "errors")}
+
+    @classmethod
+    def delete_where(
+        cls,
+        select: Optional[Union[Dict, Callable]],
+        hooks: Optional[str] = None,
+        durability: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """Delete every object that matches :code:`select` with one query.
+
+        :code:`select` is a filter, like in :meth:`filter`. If soft deletion
+        is activated, :code:`deleted_on` is set on the objects instead.
+
+        Return the number of "deleted" documents and of "errors".
+
+        By default, no event is called. Set :code:`hooks` to "object" or
+        "batch", like in :meth:`save_many`, to build the deleted objects and
+        call :meth:`on_deleted` or :meth:`on_deleted_many`.
+        """
+        now = datetime.astimezone(datetime.now())
+        return_changes = hooks is not None
+
+        def query(rdb):
+            selection = cls.query().filter(select).build(rdb)
+            if db.SOFT_DELETE:
+                return selection.update(
+                    {"deleted_on": now}, return_changes=return_changes
+                )
+            return selection.delete(return_changes=return_changes)
+
+        res = cls.__run_write(query, cls.__write_options(durability, noreply=False))
+        cls.__clear_cache()
+        if hooks is not None:
+            objects = cls.__changed_objects(res, "old_val")
+            for obj in objects:
+                obj.id = None
+            if hooks == "batch":
+                cls.on_deleted_many(objects)
+            else:
+                for obj in objects:
+                    obj.on_deleted()
+
+        deleted = res.get("replaced", 0) if db.SOFT_DELETE else res.get("deleted", 0)
+        return {"deleted": deleted, "errors": res.get("errors", 0)}
+
+    @classmethod
+    def purge(  # pylint: disable=too-many-locals
+        cls,
+        before: datetime,
+        batch_size: int = 1000,
+        pause: float = 0,
+        archive: Optional[IO[str]] = None,
+    ) -> int:
+        """Remove objects that were soft deleted before the given date.
+
+        Objects are selected with the :code:`rethinkmodel.db.DELETED_ON_INDEX`
+        index, created by :mod:`rethinkmodel.manage`, and deleted by batches of
+        :code:`batch_size` documents. The connection is given back to the pool
+        and the method sleeps :code:`pause` seconds between two batches, to
+        let other queries run.
+
+        If :code:`archive` is an opened text file, the documents are written in
+        it, one JSON document per line (NDJSON), before to be deleted. Dates
+        are written in the RethinkDB raw format, so the file can be imported
+        again as is. Documents restored while they are archived are not
+        deleted.
+
+        .. code::
+
+            with open("users.ndjson", "a") as archive:
+                User.purge(datetime.now() - timedelta(days=90), archive=archive)
+
+        Return the number of deleted documents.
+        """
+        if before.tzinfo is None:
+            before = before.astimezone()
+        batch_size = max(1, batch_size)
+        options = cls.__write_options(noreply=False)
+
+        purged = 0
+        while True:
+            with connection() as (rdb, conn):
+                table = rdb.table(cls.tablename)
+                selection = table.between(
+                    rdb.minval, before, index=db.DELETED_ON_INDEX
+                ).limit(batch_size)
+                if archive is None:
+                    res = selection.delete().run(conn, **options)
+                    selected = res.get("deleted", 0) + res.get("errors", 0)
+                else:
+                    documents = list(
+                        selection.run(conn, time_format="raw", binary_format="raw")
+                    )
+                    selected = len(documents)
+                    for document in documents:
+                        archive.write(json.dumps(document) + "\n")
+                    archive.flush()
+                    ids = [document["id"] for document in documents]
+                    # documents restored or deleted again since the selection
+                    # are kept
+                    res = (
+                        table.get_all(*ids)
+                        .filter(
+                            lambda row: row["deleted_on"].ne(None)
+                            & row["deleted_on"].lt(before)
+                        )
+                        .delete()
+                        .run(conn, **options)
+                        if ids
+                        else {}
+                    )
+            purged += res.get("deleted", 0)
+
+            if selected < batch_size or not res.get("deleted"):
+                return purged
+            if pause > 0:
+                time.sleep(pause)
+
+    @classmethod
+    def __changed_objects(cls, res: dict, value: str) -> List["Model"]:
+        """Build objects from the "changes" of a write result.
+
+        :code:`value` is "old_val" or "new_val". Linked objects are not fetched.
+        """
+        documents = [
+            change[value] for change in res.get("changes", []) if change.get(value)
+        ]
+        return cls.from_documents(documents, prefetch=False)
+
+    @classmethod
+    def __build(cls, result: dict, deferred: Iterable[str] = ()) -> "Model":
         """Build the object with nested object if there's Linked attributes."""
-        for name, kind in get_type_hints(cls).items():
-            models = [m for m in get_args(kind) if issubclass(m, Model)]
-            for model in models:
-                if isinstance(result[name], list):
-                    result[name] = [model.get(modelid) for modelid in result[name]]
+        known = cls.__known(result)
+        if known is not None:
+            return known
+
+        schema = cls.schema()
+        for links in (schema.relations, schema.list_relations):
+            for name, model in links.items():
+                if name in deferred:
+                    continue
+                value = result.get(name)
+                if isinstance(value, list):
+                    result[name] = [
+                        model.get(modelid, prefetch=False) for modelid in value
+                    ]
                 else:
-                    result[name] = model.get(result[name])
+                    result[name] = model.get(value, prefetch=False)
+
+        obj = cls(**result)
+        obj._defer(deferred)
+        obj._mark_clean()
+        cls.__register(obj)
+        return obj
+
+    @classmethod
+    def __known(cls, result: dict) -> Optional["Model"]:
+        """Return the object of the session identity map for a document."""
+        active = current_session()
+        return active.get(cls, result.get("id")) if active else None
+
+    @staticmethod
+    def __register(obj: "Model"):
+        """Keep the object in the session identity map, if any."""
+        active = current_session()
+        if active is not None:
+            active.register(obj)
+
+    @classmethod
+    def __instances(
+        cls, results: List[dict], deferred: Iterable[str], asynchronous: bool = False
+    ) -> Tuple["ModelList", List["Model"]]:
+        """Return the objects of documents, and the ones that are not yet loaded.
+
+        Objects of the session identity map are reused. See :meth:`_defer` for
+        :code:`asynchronous`.
+        """
+        objects = ModelList()
+        created = []
+        for result in results:
+            obj = cls.__known(result)
+            if obj is None:
+                obj = cls(**result)
+                obj._defer(deferred, asynchronous)
+                created.append(obj)
+            objects.append(obj)
+        return objects, created
+
+    @classmethod
+    def _build_all(
+        cls,
+        results: List[dict],
+        prefetch: bool,
+        known: Optional[Dict[Tuple[Type["Model"], Any], "Model"]] = None,
+        deferred: Iterable[str] = (),
+    ) -> "ModelList":
+        """Build objects from a result set.
+
+        If :code:`prefetch` is :code:`True`, linked objects are fetched with
+        one query per linked Model and per nested level, instead of one query
+        per linked object. Objects in :code:`known`, indexed by Model and id,
+        are not fetched. Linked objects are not fetched for :code:`deferred`
+        fields.
+        """
+        deferred = frozenset(deferred)
+        if not prefetch:
+            return ModelList(cls.__build(result, deferred) for result in results)
+
+        objects, created = cls.__instances(results, deferred)
+        cls.__link(created, known)
+        for obj in created:
+            cls.__register(obj)
+        return objects
+
+    @classmethod
+    def __link(  # pylint: disable=protected-access
+        cls,
+        objects: List["Model"],
+        known: Optional[Dict[Tuple[Type["Model"], Any], "Model"]] = None,
+    ):
+        """Fetch the linked objects of built objects, see :meth:`__hydrate`."""
+        steps = cls.__hydrate(objects, known)
+        try:
+            wanted = next(steps)
+            while True:
+                wanted = steps.send(
+                    {model: model._fetch_ids(ids) for model, ids in wanted.items()}
+                )
+        except StopIteration:
+            pass
+
+    @classmethod
+    async def afrom_documents(
+        cls, documents: List[dict], deferred: Iterable[str] = ()
+    ) -> "ModelList":
+        """Asynchronous version of :meth:`from_documents`.
+
+        Linked objects are always prefetched. At each nested level, the linked
+        Models are fetched concurrently with :code:`asyncio.gather()`.
+        """
+        objects, created = cls.__instances(documents, deferred, asynchronous=True)
+        await cls.__alink(created)
+        for obj in created:
+            cls.__register(obj)
+        return objects
+
+    @classmethod
+    async def __alink(cls, objects: List["Model"]):
+        """Asynchronous version of :meth:`__link`."""
+        # pylint: disable=protected-access
+        steps = cls.__hydrate(objects)
+        try:
+            wanted = next(steps)
+            while True:
+                models = list(wanted)
+                fetched = await asyncio.gather(
+                    *(model._afetch_ids(wanted[model]) for model in models)
+                )
+                wanted = steps.send(dict(zip(models, fetched)))
+        except StopIteration:
+            pass
+
+    @classmethod
+    def __hydrate(  # pylint: disable=protected-access,too-many-locals,too-many-branches
+        cls,
+        objects: List["Model"],
+        known: Optional[Dict[Tuple[Type["Model"], Any], "Model"]] = None,
+    ) -> Generator[
+        Dict[Type["Model"], List[Any]], Dict[Type["Model"], List[dict]], None
+    ]:
+        """Replace linked ids by objects, level by level.
+
+        For each nested level, the generator yields the ids to fetch per linked
+        Model and must receive the fetched documents per Model. This lets
+        :meth:`_build_all` and :meth:`afrom_documents` share the linking.
+        Fetched objects are registered in the session, the given objects are
+        registered by the caller.
+        """
+        active = current_session()
+        loaded: Dict[Tuple[Type[Model], Any], Optional[Model]] = dict(known or {})
+        pending: List[Model] = list(objects)
+        built: List[Model] = list(objects)
+        while pending:
+            # collect ids that are not yet loaded, per linked model
+            wanted: Dict[Type[Model], List[Any]] = {}
+            for obj in pending:
+                for _, model, ids in obj._linked_ids():
+                    for modelid in ids:
+                        if modelid is None or (model, modelid) in loaded:
+                            continue
+                        loaded[(model, modelid)] = (
+                            active.get(model, modelid) if active else None
+                        )
+                        if loaded[(model, modelid)] is None:
+                            wanted.setdefault(model, []).append(modelid)
+
+            documents = (yield wanted) if wanted else {}
+            fetched: List[Model] = []
+            for model, results in documents.items():
+                for result in results:
+                    obj = model(**result)
+                    loaded[(model, obj.id)] = obj
+                    fetched.append(obj)
+
+            # replace ids by objects
+            for obj in pending:
+                for name, model, ids in obj._linked_ids():
+                    value = [loaded.get((model, modelid)) for modelid in ids]
+                    if not isinstance(getattr(obj, name), list):
+                        value = value[0]
+                    setattr(obj, name, value)
+
+            pending = fetched
+            built.extend(fetched)
+
+        for obj in built:
+            obj._mark_clean()
+        for obj in built[len(objects) :]:
+            cls.__register(obj)
+
+    def _linked_ids(self) -> Generator[Tuple[str, Type["Model"], List], None, None]:
+        """Yield linked field name, linked Model and ids set in this object."""
+        schema = self.schema()
+        for links in (schema.relations, schema.list_relations):
+            for name, model in links.items():
+                value = self._raw(name)
+                if value is DEFERRED:
+                    continue
+                yield name, model, value if isinstance(value, list) else [value]
 
-        return cls(**result)
+    @classmethod
+    def _fetch_ids(cls, ids: List[Any]) -> List[dict]:
+        """Fetch documents by ids, using one query per chunk of ids."""
+        results = []
+        chunk_size = max(1, db.PREFETCH_CHUNK_SIZE)
+        with connection() as (rdb, conn):
+            for start in range(0, len(ids), chunk_size):
+                query = rdb.table(cls.tablename).get_all(
+                    *ids[start : start + chunk_size]
+                )
+                if db.SOFT_DELETE:
+                    query = query.filter({"deleted_on": None})
+                results.extend(query.run(conn))
+        return results
+
+    @classmethod
+    async def _afetch_ids(cls, ids: List[Any]) -> List[dict]:
+        """Asynchronous version of :meth:`_fetch_ids`."""
+        results = []
+        chunk_size = max(1, db.PREFETCH_CHUNK_SIZE)
+        async with aconnection() as (rdb, conn):
+            for start in range(0, len(ids), chunk_size):
+                query = rdb.table(cls.tablename).get_all(
+                    *ids[start : start + chunk_size]
+                )
+                if db.SOFT_DELETE:
+                    query = query.filter({"deleted_on": None})
+                results.extend(
+                    [document async for document in aiterate(await query.run(conn))]
+                )
+        return results
 
     @classmethod
-    def filter(
+    def filter(  # pylint: disable=too-many-arguments
         cls,
         select: Optional[Union[Dict, Callable]] = None,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
         order_by: Optional[Union[Dict, str]] = None,
-    ) -> Union[List["Model"]]:
+        prefetch: bool = True,
+        after: Optional[str] = None,
+        keyset: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> "ModelList":
         """Select object in database with filters.
 
         The :code:`select` argument can take a :code:`dict` or a :code:`Callable` where
@@ -352,45 +1738,338 @@ class Model(BaseModel):
             will need to use specific RethinkDB methods to make the filter to work.
 
             See: https://rethinkdb.com/api/python/filter/
+
+        Linked objects are fetched with :code:`prefetch` mode by default: ids
+        are collected on the whole result set, and each linked Model is fetched
+        in one query (by chunks of :code:`rethinkmodel.db.PREFETCH_CHUNK_SIZE`
+        ids) for each nested level. Objects that link the same id share the same
+        linked object. Set :code:`prefetch` to :code:`False` to fetch linked
+        objects one by one.
+
+        For deep pages, prefer keyset pagination to :code:`offset`: set
+        :code:`keyset` to the index to paginate on ("id" or a declared index),
+        and give the :code:`next_token` of the returned list as :code:`after`
+        argument to get the next page. See
+        :meth:`rethinkmodel.query.QuerySet.after`.
+
+        .. code::
+
+            page = User.filter({"active": True}, limit=50, keyset="id")
+            while page:
+                process(page)
+                page = User.filter({"active": True}, limit=50, after=page.next_token)
+
+        With :code:`fields`, only the given fields (and the id) are fetched,
+        and linked objects are only fetched for them. The other fields are
+        loaded in one query the first time one of them is read. See
+        :meth:`rethinkmodel.query.QuerySet.only`.
         """
-        # force not deleted object
-        first_filter = {}
-        if db.SOFT_DELETE:
-            first_filter["deleted_on"] = None
+        query = cls.__prepare_query(limit, offset, order_by, prefetch, after, keyset)
+        if fields is not None:
+            query = query.only(*fields)
+        return query.filter(select).all()
+
+    @classmethod
+    def stream(  # pylint: disable=too-many-arguments
+        cls,
+        select: Optional[Union[Dict, Callable]] = None,
+        order_by: Optional[Union[Dict, str]] = None,
+        chunk_size: int = 100,
+        max_batch_rows: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+        prefetch: bool = True,
+    ) -> Generator["Model", None, None]:
+        """Iterate over objects without loading the whole result set in memory.
+
+        The :code:`select`, :code:`order_by` and :code:`prefetch` arguments are
+        the same as in :meth:`filter`. See :meth:`rethinkmodel.query.QuerySet.stream`
+        for the others.
+
+        .. code::
+
+            for user in User.stream({"active": True}, max_batch_rows=500):
+                process(user)
+        """
+        query = cls.__prepare_query(None, None, order_by, prefetch).filter(select)
+        return query.stream(
+            chunk_size=chunk_size,
+            max_batch_rows=max_batch_rows,
+            max_batch_bytes=max_batch_bytes,
+        )
+
+    @classmethod
+    async def afilter(  # pylint: disable=too-many-arguments
+        cls,
+        select: Optional[Union[Dict, Callable]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        order_by: Optional[Union[Dict, str]] = None,
+        after: Optional[str] = None,
+        keyset: Optional[str] = None,
+    ) -> "ModelList":
+        """Asynchronous version of :meth:`filter`.
+
+        Linked objects are always prefetched. Use :meth:`query` and
+        :meth:`rethinkmodel.query.QuerySet.aall` for the other options.
+        """
+        query = cls.__prepare_query(limit, offset, order_by, True, after, keyset)
+        return await query.filter(select).aall()
 
-        rdb, conn = connect()
-        query = cls.__prepare_query(rdb, limit, offset, order_by)
-        results = query.filter(first_filter).filter(select).run(conn)
-        conn.close()
+    @classmethod
+    async def aget_all(
+        cls,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        order_by: Optional[Union[Dict, str]] = None,
+        after: Optional[str] = None,
+        keyset: Optional[str] = None,
+    ) -> "ModelList":
+        """Asynchronous version of :meth:`get_all`."""
+        query = cls.__prepare_query(limit, offset, order_by, True, after, keyset)
+        return await query.aall()
+
+    @classmethod
+    def astream(  # pylint: disable=too-many-arguments
+        cls,
+        select: Optional[Union[Dict, Callable]] = None,
+        order_by: Optional[Union[Dict, str]] = None,
+        chunk_size: int = 100,
+        max_batch_rows: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+    ) -> AsyncGenerator["Model", None]:
+        """Asynchronous version of :meth:`stream`.
+
+        .. code::
 
-        return [cls.__build(u) for u in results]
+            async for user in User.astream({"active": True}):
+                process(user)
 
-    def join(
+        See :meth:`rethinkmodel.query.QuerySet.astream`.
+        """
+        query = cls.__prepare_query(None, None, order_by, True).filter(select)
+        return query.astream(
+            chunk_size=chunk_size,
+            max_batch_rows=max_batch_rows,
+            max_batch_bytes=max_batch_bytes,
+        )
+
+    @classmethod
+    def query(cls, prefetch: bool = True) -> QuerySet:
+        """Return a lazy :class:`rethinkmodel.query.QuerySet` on the table.
+
+        .. code::
+
+            users = User.query().filter({"name": "foo"}).order_by("age").limit(10)
+            first = users.first()
+
+        See :mod:`rethinkmodel.query`.
+        """
+        return QuerySet(cls, prefetch=prefetch)
+
+    @classmethod
+    def from_documents(
+        cls,
+        documents: List[dict],
+        prefetch: bool = True,
+        deferred: Iterable[str] = (),
+    ) -> "ModelList":
+        """Build objects from documents fetched from RethinkDB.
+
+        See :meth:`filter` for :code:`prefetch` argument. The :code:`deferred`
+        fields were not fetched, they are loaded when they are read.
+        """
+        return cls._build_all(documents, prefetch, deferred=deferred)
+
+    def join(  # pylint: disable=too-many-arguments
         self,
         *models: Type["Model"],
         limit: Optional[int] = None,
         offset: Optional[int] = None,
         order_by: Optional[Union[Dict, str]] = None,
+        prefetch: bool = True,
+        server_side: bool = False,
     ) -> "Model":
-        """Join linked models to the current model, fetched by id."""
+        """Join linked models to the current model, fetched by id.
+
+        The joined objects are set in a property named with the joined model
+        :code:`tablename`. The :code:`limit`, :code:`offset` and :code:`order_by`
+        arguments are applied on each joined collection.
+
+        If :code:`server_side` is :code:`True`, every joined collection is
+        fetched in one query, see :meth:`join_all`.
+        """
+        if server_side:
+            self.join_all(
+                [self],
+                *models,
+                limit=limit,
+                offset=offset,
+                order_by=order_by,
+                prefetch=prefetch,
+            )
+            return self
+
         for model in models:
             if not issubclass(model, Model):
                 continue
 
             # find the right attribute in "model" which is bounded to self class
-            hints = get_type_hints(model)
-            for name, hint in hints.items():
-                args = get_args(hint)
-                if self.__class__ in args:
-                    fields = model.filter(
-                        {name: self.id}, limit=limit, offset=offset, order_by=order_by
-                    )
-                    setattr(self, model.tablename, fields)
+            for name, _ in self.__class__.__backlinks(model):
+                fields = model.filter(
+                    {name: self.id},
+                    limit=limit,
+                    offset=offset,
+                    order_by=order_by,
+                    prefetch=prefetch,
+                )
+                setattr(self, model.tablename, fields)
 
         return self
 
     @classmethod
-    def changes(cls, select: Optional[Union[Dict, Callable]] = None) -> Generator:
+    def join_all(  # pylint: disable=too-many-arguments,too-many-locals,protected-access
+        cls,
+        objects: List["Model"],
+        *models: Type["Model"],
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        order_by: Optional[Union[Dict, str]] = None,
+        prefetch: bool = True,
+    ) -> List["Model"]:
+        """Join linked models to a list of objects, in one query.
+
+        The query is compiled and executed by RethinkDB: for each object, the
+        linked objects are selected with :code:`get_all()` if an index is
+        declared on the linked field by :meth:`get_indexes`, or with a
+        :code:`filter()` otherwise. List fields need a :code:`multi` index,
+        see :class:`Index`. The :code:`limit`, :code:`offset` and
+        :code:`order_by` arguments are the same as in :meth:`filter` and are
+        applied on each joined collection.
+
+        This is what :meth:`ModelList.join` uses, so you can do:
+
+        .. code::
+
+            projects = Project.filter({"owner": user.id}).join(Task)
+            for project in projects:
+                print(project.tasks)
+        """
+        joins = [
+            (model, name, is_list)
+            for model in models
+            if issubclass(model, Model)
+            for name, is_list in cls.__backlinks(model)
+        ]
+        if not objects or not joins:
+            return objects
+
+        def children(rdb, parent_id):
+            return {
+                model.tablename: model._children_query(
+                    rdb, name, is_list, parent_id, limit, offset, order_by
+                ).coerce_to("array")
+                for model, name, is_list in joins
+            }
+
+        with connection() as (rdb, conn):
+            ids = [obj.id for obj in objects]
+            results = rdb.expr(ids).map(lambda parent_id: children(rdb, parent_id))
+            results = results.run(conn)
+
+        known = {(cls, obj.id): obj for obj in objects}
+        for obj, joined in zip(objects, results):
+            for model in {model for model, _, _ in joins}:
+                rows = joined[model.tablename]
+                setattr(
+                    obj,
+                    model.tablename,
+                    model._build_all(rows, prefetch, known),
+                )
+
+        return objects
+
+    @classmethod
+    def __backlinks(cls, model: Type["Model"]) -> List[Tuple[str, bool]]:
+        """Return fields of "model" that are linked to this class.
+
+        Each field is returned with a boolean which is :code:`True` if the field
+        is a list of objects.
+        """
+        schema = model.schema()
+        return [
+            (name, links is schema.list_relations)
+            for links in (schema.relations, schema.list_relations)
+            for name, linked in links.items()
+            if linked is cls
+        ]
+
+    @classmethod
+    def _children_query(  # pylint: disable=too-many-arguments
+        cls,
+        rdb: RethinkDB,
+        name: str,
+        is_list: bool,
+        parent_id: Any,
+        limit: Optional[int],
+        offset: Optional[int],
+        order_by: Optional[Union[dict, str]],
+    ) -> Any:
+        """Return the query that selects objects linked to "parent_id"."""
+        table = rdb.table(cls.tablename)
+        index = cls.__field_index(name, multi=is_list)
+        if index is not None:
+            query = table.get_all(parent_id, index=index)
+            if db.SOFT_DELETE:
+                query = query.filter({"deleted_on": None})
+        else:
+            if db.SOFT_DELETE:
+                table = table.get_all(True, index=db.SOFT_DELETE_INDEX)
+            if is_list:
+                query = table.filter(lambda row: row[name].contains(parent_id))
+            else:
+                query = table.filter({name: parent_id})
+
+        if isinstance(order_by, dict):
+            query = query.order_by(**order_by)
+        elif order_by:
+            query = query.order_by(order_by)
+
+        if offset and offset > 0:
+            query = query.skip(offset)
+
+        if limit and limit > 0:
+            query = query.limit(limit)
+
+        return query
+
+    @classmethod
+    def __field_index(cls, field: str, multi: bool = False) -> Optional[str]:
+        """Return the name of a declared index on "field", if any.
+
+        A list field can only be searched with a :code:`multi` index.
+        """
+        for name, spec in cls.index_specs().items():
+            if (
+                spec.fields == (field,)
+                and spec.function is None
+                and not spec.geo
+                and spec.multi == multi
+            ):
+                return name
+        return None
+
+    @classmethod
+    def changes(  # pylint: disable=too-many-arguments,too-many-locals
+        cls,
+        select: Optional[Union[Dict, Callable]] = None,
+        squash: Union[bool, float] = False,
+        include_initial: bool = False,
+        include_states: bool = False,
+        changefeed_queue_size: Optional[int] = None,
+        raw: bool = False,
+        batch_size: Optional[int] = None,
+        reconnect: int = 0,
+    ) -> Generator:
         """Get a feed Generator which reacts on changes.
 
         This return a blocking cursor **tuple** where the first element is the
@@ -414,85 +2093,296 @@ class Model(BaseModel):
             for oldval, newval in feed:
                 # only on user named "Foo"
 
+        :code:`squash`, :code:`include_initial`, :code:`include_states` and
+        :code:`changefeed_queue_size` are given to RethinkDB, see
+        https://rethinkdb.com/api/python/changes/. With :code:`squash`, bursts
+        of changes on a document are merged by the server (set a number of
+        seconds to wait for more changes). With :code:`include_initial`, the
+        current objects are given first, as :code:`(None, newval)`.
+
+        If :code:`raw` is :code:`True`, the changefeed documents are given as
+        is, without building objects. The "state" documents sent with
+        :code:`include_states` are only given in this mode.
+
+        If :code:`batch_size` is set, the feed gives lists of changes: the
+        changes already received are read at once, up to :code:`batch_size`.
+        This allows to keep up when changes come faster than they are handled.
+
+        .. code::
+
+            for batch in User.changes(raw=True, batch_size=500, squash=True):
+                update_cache(batch)
+
+        If the connection is lost, the feed is opened again up to
+        :code:`reconnect` times in a row. As changes can be lost meanwhile, the
+        reopened feed gives the current objects first, as with
+        :code:`include_initial`.
         """
-        # we need an holder object to ensure RethinkDB connection to be
-        # closed when the object is destroyed after the generator stopped
+        options = cls.__changefeed_options(
+            squash, include_initial, include_states, changefeed_queue_size
+        )
+
+        attempts = 0
+        while True:
+            try:
+                # the feed has its own connection while the generator is
+                # running, it is closed when the generator is closed
+                with dedicated_connection() as (rdb, conn):
+                    feed = cls.changes_query(rdb, select, **options).run(conn)
+                    try:
+                        for changes in cls.__read_changes(feed, batch_size):
+                            attempts = 0
+                            values = [
+                                change if raw else cls.from_change(change)
+                                for change in changes
+                                if raw or "state" not in change
+                            ]
+                            if batch_size is not None:
+                                yield values
+                            else:
+                                yield from values
+                    finally:
+                        feed.close()
+                return
+            except db.BROKEN_CONNECTION_ERRORS:
+                attempts += 1
+                if attempts > reconnect:
+                    raise
+                time.sleep(min(0.5 * 2 ** (attempts - 1), 10))
+                options["include_initial"] = True
+
+    @staticmethod
+    def __changefeed_options(
+        squash: Union[bool, float],
+        include_initial: bool,
+        include_states: bool,
+        changefeed_queue_size: Optional[int],
+    ) -> Dict[str, Any]:
+        """Return the options of the ReQL changes() command that are set."""
+        return {
+            name: value
+            for name, value in (
+                ("squash", squash),
+                ("include_initial", include_initial),
+                ("include_states", include_states),
+                ("changefeed_queue_size", changefeed_queue_size),
+            )
+            if value
+        }
+
+    @staticmethod
+    def __read_changes(
+        feed: Any, batch_size: Optional[int]
+    ) -> Generator[List[dict], None, None]:
+        """Yield lists of changes, that are already received, from a feed."""
+        for change in feed:
+            changes = [change]
+            while batch_size is not None and len(changes) < batch_size:
+                try:
+                    changes.append(feed.next(wait=False))
+                except errors.ReqlTimeoutError:
+                    break
+            yield changes
+
+    @classmethod
+    def subscribe(
+        cls,
+        select: Optional[Union[Dict, Callable]] = None,
+        maxsize: Optional[int] = None,
+        policy: Optional[str] = None,
+    ) -> Subscription:
+        """Subscribe to a changefeed that is shared in the process.
+
+        It works like :meth:`changes`, but subscribers of the same table and
+        :code:`select` filter share one changefeed. Each subscriber gets the
+        changes in a queue of :code:`maxsize` changes, and :code:`policy`
+        tells what to do when the queue is full: "drop", "coalesce" or
+        "disconnect". See :mod:`rethinkmodel.feed`.
+
+        .. code::
+
+            with User.subscribe(policy="coalesce") as subscription:
+                for oldval, newval in subscription:
+                    notify(oldval, newval)
+
+        """
+        return get_hub().subscribe(cls, select, maxsize=maxsize, policy=policy)
+
+    @classmethod
+    async def achanges(  # pylint: disable=too-many-arguments
+        cls,
+        select: Optional[Union[Dict, Callable]] = None,
+        squash: Union[bool, float] = False,
+        include_initial: bool = False,
+        include_states: bool = False,
+        changefeed_queue_size: Optional[int] = None,
+        raw: bool = False,
+    ) -> AsyncGenerator[Any, None]:
+        """Asynchronous version of :meth:`changes`.
 
-        holder = cls()
-        rdb, conn = holder.get_connection()
+        .. code::
+
+            async for oldval, newval in User.achanges():
+                ...
+
+        The feed has its own connection until the generator is closed.
+        """
+        options = cls.__changefeed_options(
+            squash, include_initial, include_states, changefeed_queue_size
+        )
+        async with adedicated_connection() as (rdb, conn):
+            feed = await cls.changes_query(rdb, select, **options).run(conn)
+            try:
+                async for change in feed:
+                    if raw:
+                        yield change
+                    elif "state" not in change:
+                        yield cls.from_change(change)
+            finally:
+                await feed.close()
+
+    @classmethod
+    def changes_query(
+        cls, rdb: RethinkDB, select: Optional[Union[Dict, Callable]], **options
+    ) -> Any:
+        """Return the changefeed query of the table.
+
+        It's used by :meth:`changes` and by :mod:`rethinkmodel.feed`. The
+        :code:`options` are given to the ReQL :code:`changes()` command.
+        """
         query = rdb.table(cls.tablename)
         if db.SOFT_DELETE:
-            query = query.filter({"deleted_on": None})
+            query = query.get_all(True, index=db.SOFT_DELETE_INDEX)
         if select is not None:
             query = query.filter(select)
-
-        feed = query.changes().run(conn)
-        for change in feed:
-            old, new = None, None
-            if change.get("old_val", False):
-                old = cls(**change.get("old_val"))
-            if change.get("new_val", False):
-                new = cls(**change.get("new_val"))
-            yield old, new
-        feed.close()
+        return query.changes(**options)
 
     @classmethod
-    def truncate(cls):
-        """Truncate table, delete everything in the table."""
-        rdb, conn = connect()
-        rdb.table(cls.tablename).delete().run(conn)
-        conn.close()
+    def from_change(cls, change: dict) -> Tuple[Optional["Model"], Optional["Model"]]:
+        """Return the old and new objects of a changefeed document."""
+        old, new = None, None
+        if change.get("old_val", False):
+            old = cls(**change.get("old_val"))
+            old._mark_clean()
+        if change.get("new_val", False):
+            new = cls(**change.get("new_val"))
+            new._mark_clean()
+        return old, new
 
-    def get_connection(self):
-        """Return the RethinkDB object and connection holder."""
-        return self.__r, self.__conn
+    @classmethod
+    def truncate(cls, durability: Optional[str] = None, noreply: Optional[bool] = None):
+        """Truncate table, delete everything in the table.
 
-    def __del__(self):
-        """On object deletion, close database connection."""
-        self.__conn.close()
+        See :meth:`save` for :code:`durability` and :code:`noreply` arguments.
+        """
+        cls.__run_write(
+            lambda rdb: rdb.table(cls.tablename).delete(),
+            cls.__write_options(durability, noreply),
+        )
+        cls.__clear_cache()
+
+    @staticmethod
+    def get_connection():
+        """Return the RethinkDB object and a connection borrowed from the pool.
+
+        Model objects do not keep any connection. Close the returned
+        connection to give it back to the pool, otherwise it's given back when
+        it's garbage collected.
+        """
+        return connect()
 
     def __dict__(self):
         """Return the dict representation."""
         return self.todict()
 
     def __repr__(self):
-        """Representation of the object."""
-        return repr(self.todict())
+        """Representation of the object, deferred fields are not loaded."""
+        fields = self.schema().fields
+        deferred = self.deferred_fields()
+        values = self._document(name for name in fields if name not in deferred)
+        return repr({name: values.get(name, DEFERRED) for name in fields})
 
     @classmethod
-    def __prepare_query(
+    def __prepare_query(  # pylint: disable=too-many-arguments
         cls,
-        rdb: RethinkDB,
         limit: Optional[int],
         offset: Optional[int],
         order_by: Optional[Union[dict, str]],
-    ) -> Any:
-
-        query = rdb.table(cls.tablename)
-        if order_by:
+        prefetch: bool,
+        after: Optional[str] = None,
+        keyset: Optional[str] = None,
+    ) -> QuerySet:
+        """Return the QuerySet for get_all() and filter() arguments.
+
+        A dict :code:`order_by` is used as keyword arguments, e.g.
+        :code:`{"index": "name"}`.
+        """
+        query = cls.query(prefetch=prefetch)
+        if after or keyset:
+            query = query.after(after, index=keyset)
+        elif isinstance(order_by, dict):
+            query = query.order_by(**order_by)
+        elif order_by:
             query = query.order_by(order_by)
 
-        if offset and offset > 0:
-            query = query.skip(offset)
-
-        if limit and limit > 0:
-            query = query.limit(limit)
-
-        return query
+        return query.skip(offset).limit(limit)
 
     # pylint: disable=useless-super-delegation
     def __getattribute__(self, name: str) -> Any:
-        """Avoid IDE problems.
+        """Avoid IDE problems, and load deferred fields on first access.
 
         Mainly done to avoid errors in IDE and editors when we want to
         access model properties
         """
-        return super().__getattribute__(name)
+        value = super().__getattribute__(name)
+        if value is DEFERRED:
+            self.__load_deferred()
+            value = super().__getattribute__(name)
+        return value
 
     def __setattr__(self, name: str, value: Any) -> None:
-        """Avoid IDE problems.
+        """Avoid IDE problems, and keep modified attribute names.
 
         Mainly done to avoid errors in IDE and editors when we want to
         access model properties
         """
+        dirty = getattr(self, "_Model__dirty", None)
+        if dirty is not None:
+            dirty.add(name)
         return super().__setattr__(name, value)
+
+
+class ModelList(list):
+    """List of Model objects, returned by :meth:`Model.filter` and :meth:`Model.get_all`.
+
+    It's a standard :code:`list` which proposes a :meth:`join` method to join
+    linked models on the whole list in one query.
+
+    With keyset pagination, :code:`next_token` is the token to give to get
+    the next page, or :code:`None` on the last page.
+    """
+
+    next_token: Optional[str] = None
+
+    def join(  # pylint: disable=too-many-arguments
+        self,
+        *models: Type[Model],
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        order_by: Optional[Union[Dict, str]] = None,
+        prefetch: bool = True,
+    ) -> "ModelList":
+        """Join linked models to each object of the list.
+
+        See :meth:`Model.join_all`.
+        """
+        if self:
+            self[0].__class__.join_all(
+                self,
+                *models,
+                limit=limit,
+                offset=offset,
+                order_by=order_by,
+                prefetch=prefetch,
+            )
+        return self
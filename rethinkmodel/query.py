@@ -0,0 +1,675 @@
+"""Lazy and chainable queries.
+
+A :class:`QuerySet` is returned by :meth:`rethinkmodel.model.Model.query`.
+Each method returns a new QuerySet, nothing is sent to RethinkDB until the
+results are needed (iteration, :code:`len()`, slicing, :meth:`QuerySet.first`
+or :meth:`QuerySet.all`).
+
+.. code::
+
+    users = (
+        User.query()
+        .filter({"country": "fr"})
+        .order_by("name")
+        .skip(20)
+        .limit(10)
+    )
+    for user in users:  # the query is executed here, only once
+        print(user.name)
+
+The ReQL query is always built in the same order, whatever the call order:
+filters, then order, then skip and limit, then pluck (and the projection of
+:meth:`QuerySet.only` and :meth:`QuerySet.defer`). So the server filters
+before to paginate.
+
+Dictionary filters are matched against the indexes declared by
+:meth:`rethinkmodel.model.BaseModel.get_indexes`. When the filtered values
+cover an index, the documents are selected with :code:`get_all()` (or with
+:code:`between()` for the first properties of a compound index) and the other
+predicates are applied as a filter on the selection. Use
+:meth:`QuerySet.explain` to see the chosen index.
+
+Deep pages should use keyset pagination, see :meth:`QuerySet.after`:
+instead of skipping the previous results, the server starts reading the
+index after the last returned object, so every page costs the same.
+
+.. code::
+
+    page = User.query().after(index="name").limit(50).all()
+    while page:
+        process(page)
+        page = User.query().after(page.next_token).limit(50).all()
+
+In asyncio code, use the :code:`a` prefixed methods, :meth:`QuerySet.aall`,
+:meth:`QuerySet.afirst`, :meth:`QuerySet.acount` and :meth:`QuerySet.astream`,
+that use the asyncio connection pool.
+
+.. code::
+
+    users = await User.query().filter({"country": "fr"}).limit(10).aall()
+"""
+import base64
+import copy
+import json
+from datetime import datetime
+from typing import (Any, AsyncGenerator, Callable, Dict, Generator, Iterator,
+                    List, Optional, Tuple, Union)
+
+from rethinkdb import RethinkDB
+
+from . import db
+from .db import (aconnection, adedicated_connection, aiterate, connection,
+                 dedicated_connection)
+
+# values that can be searched in an index, null values are not indexed
+INDEXABLE_TYPES = (str, int, float, datetime)
+
+# the primary key, that can be used for keyset pagination
+PRIMARY_KEY = "id"
+
+
+def _raw_time(value: Any) -> Dict[str, Any]:
+    """Return a datetime in the RethinkDB raw format, to serialize it in JSON."""
+    if not isinstance(value, datetime):
+        raise TypeError(f"{type(value).__name__} cannot be used in a token")
+    offset = value.astimezone().strftime("%z")
+    return {
+        "$reql_type$": "TIME",
+        "epoch_time": value.timestamp(),
+        "timezone": f"{offset[:3]}:{offset[3:]}",
+    }
+
+
+def encode_token(index: str, key: Any, last_id: Any) -> str:
+    """Return the opaque continuation token of keyset pagination."""
+    data = json.dumps([index, key, last_id], default=_raw_time)
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_token(token: str) -> Tuple[str, Any, Any]:
+    """Return the index, the last key and the last id of a continuation token.
+
+    Dates are kept in the RethinkDB raw format, the server reads them as is.
+    """
+    try:
+        index, key, last_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (TypeError, ValueError) as error:
+        raise ValueError(f"Invalid continuation token {token!r}") from error
+    return index, key, last_id
+
+
+class QuerySet:  # pylint: disable=too-many-instance-attributes,too-many-public-methods
+    """Lazy query on a Model table.
+
+    Results are fetched once and kept in the QuerySet, iterate it again does
+    not send a new query.
+    """
+
+    def __init__(self, model: Any, prefetch: bool = True):
+        """Create a query that selects every object of the :code:`model` table."""
+        self.model = model
+        self._prefetch = prefetch
+        self._filters: List[Union[Dict, Callable]] = []
+        self._order_by: Tuple = ()
+        self._order_index: Optional[Any] = None
+        self._skip: Optional[int] = None
+        self._limit: Optional[int] = None
+        self._pluck: Tuple = ()
+        self._only: Tuple = ()
+        self._defer: Tuple = ()
+        self._keyset: Optional[str] = None
+        self._after: Optional[Tuple[Any, Any]] = None
+        self._results: Optional[List] = None
+
+    def __clone(self, **changes: Any) -> "QuerySet":
+        """Return a copy of the query, without results, with changed attributes."""
+        clone = copy.copy(self)
+        changes["results"] = None
+        vars(clone).update({f"_{name}": value for name, value in changes.items()})
+        return clone
+
+    def filter(self, select: Optional[Union[Dict, Callable]]) -> "QuerySet":
+        """Add a filter, see :meth:`rethinkmodel.model.Model.filter`.
+
+        Filters are combined with a logical "and".
+        """
+        if select is None:
+            return self.__clone()
+        return self.__clone(filters=self._filters + [select])
+
+    def order_by(self, *keys: Any, index: Optional[Any] = None) -> "QuerySet":
+        """Order results by :code:`keys`, or by a secondary :code:`index`.
+
+        Keys can be field names or :code:`r.desc("field")` / :code:`r.asc("field")`.
+        """
+        return self.__clone(
+            order_by=tuple(key for key in keys if key is not None), order_index=index
+        )
+
+    def skip(self, offset: Optional[int]) -> "QuerySet":
+        """Skip :code:`offset` results."""
+        return self.__clone(skip=offset if offset and offset > 0 else None)
+
+    def limit(self, limit: Optional[int]) -> "QuerySet":
+        """Limit the number of results."""
+        return self.__clone(limit=limit if limit and limit > 0 else None)
+
+    def pluck(self, *fields: str) -> "QuerySet":
+        """Only fetch the given fields, others are set to :code:`None`.
+
+        Use :meth:`only` to get objects that load the other fields when
+        they are needed.
+        """
+        return self.__clone(pluck=fields)
+
+    def only(self, *fields: str) -> "QuerySet":
+        """Only fetch the given fields, and the id.
+
+        Other fields are deferred: they are loaded, all at once, in one query
+        the first time one of them is read. Linked objects are only fetched
+        for the given fields.
+
+        .. code::
+
+            for user in User.query().only("name"):
+                print(user.name)  # no other query
+                print(user.email)  # loads every missing field of this user
+
+        Objects fetched by asynchronous methods, e.g. :meth:`aall` or
+        :meth:`astream`, do not load deferred fields on access since it would
+        block the event loop, reading them raises a :code:`RuntimeError`. Use
+        :meth:`rethinkmodel.model.Model.aload` first.
+        """
+        return self.__clone(only=self.__check_fields(fields))
+
+    def defer(self, *fields: str) -> "QuerySet":
+        """Do not fetch the given fields, see :meth:`only`.
+
+        This is useful to not fetch large fields, or linked objects, that
+        are rarely used.
+        """
+        return self.__clone(defer=self._defer + self.__check_fields(fields))
+
+    def __check_fields(self, fields: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Raise an error if a field is not declared in the model."""
+        declared = self.model.schema().fields
+        for name in fields:
+            if name not in declared:
+                raise AttributeError(
+                    f"The field named {name} is not declared in {self.model.__name__}"
+                )
+        return tuple(name for name in fields if name != PRIMARY_KEY)
+
+    def deferred_fields(self) -> Tuple[str, ...]:
+        """Return the fields that are not fetched, see :meth:`only` and :meth:`defer`."""
+        fields = self.model.schema().fields
+        kept = (PRIMARY_KEY,) + self.__keyset_fields()
+        return tuple(
+            name
+            for name in fields
+            if name not in kept
+            and (name in self._defer or (self._only and name not in self._only))
+        )
+
+    def __keyset_fields(self) -> Tuple[str, ...]:
+        """Return the fields of the keyset pagination index, they are always fetched."""
+        if self._keyset is None or self._keyset == PRIMARY_KEY:
+            return ()
+        return self.model.indexed_fields()[self._keyset]
+
+    def after(
+        self, token: Optional[str] = None, index: Optional[str] = None
+    ) -> "QuerySet":
+        """Use keyset pagination on an index, and start after :code:`token`.
+
+        Results are ordered by the :code:`index`, that can be the primary key
+        ("id", the default) or a declared simple or compound index. The list
+        returned by :meth:`all` has a :code:`next_token` attribute, that is
+        :code:`None` on the last page (when there are less than :meth:`limit`
+        results). Give it to this method to get the next page: the index is
+        read from the token.
+
+        The server reads the index from the last returned key, so there is no
+        need to skip the previous results. The ordering of :meth:`order_by` is
+        ignored.
+        """
+        after = None
+        if token:
+            token_index, key, last_id = decode_token(token)
+            if index is not None and index != token_index:
+                raise ValueError(
+                    f"The token paginates on {token_index!r}, not on {index!r}"
+                )
+            index = token_index
+            after = (key, last_id)
+
+        index = index or PRIMARY_KEY
+        if index != PRIMARY_KEY and index not in self.model.indexed_fields():
+            raise ValueError(
+                f"{index!r} is not a declared index of {self.model.__name__}"
+            )
+        return self.__clone(keyset=index, after=after)
+
+    def prefetch(self, prefetch: bool = True) -> "QuerySet":
+        """Activate or deactivate linked objects prefetching.
+
+        See :meth:`rethinkmodel.model.Model.filter`.
+        """
+        return self.__clone(prefetch=prefetch)
+
+    def explain(self) -> Dict[str, Any]:
+        """Return the plan used to select documents.
+
+        The plan is a dictionary with:
+
+        - :code:`method`: "keyset" for keyset pagination, "order_by" when an
+          ordering index is given, "get_all" or "between" when a declared
+          index is used, and "table" otherwise
+        - :code:`index`: the name of the used index, or :code:`None`
+        - :code:`values`: the values searched in the index ("between" uses
+          them as the first values of a compound index)
+        - :code:`filters`: the remaining filters, applied on the selection
+        - :code:`soft_delete`: "index" or "filter" to tell how soft deleted
+          objects are removed, :code:`None` if soft deletion is disabled
+
+        .. code::
+
+            >>> User.query().filter({"name": "foo", "active": True}).explain()
+            {'method': 'get_all', 'index': 'name', 'values': ['foo'],
+             'filters': [{'active': True}], 'soft_delete': 'filter'}
+        """
+        plan = self.__plan()
+        if db.SOFT_DELETE:
+            # the soft delete index can only be used on the table
+            plan["soft_delete"] = "index" if plan["method"] == "table" else "filter"
+        else:
+            plan["soft_delete"] = None
+        return plan
+
+    def __plan(self) -> Dict[str, Any]:  # pylint: disable=too-many-branches
+        """Find the declared index that covers the most filtered values."""
+        plan: Dict[str, Any] = {
+            "method": "table",
+            "index": None,
+            "values": None,
+            "filters": list(self._filters),
+        }
+        if self._keyset is not None:
+            plan.update(
+                method="keyset",
+                index=self._keyset,
+                values=None if self._after is None else [self._after[0]],
+            )
+            return plan
+
+        if self._order_index is not None:
+            # ordering with index must be done on the table
+            plan.update(method="order_by", index=self._order_index)
+            return plan
+
+        # first value found for each property in dict filters
+        equals: Dict[str, Any] = {}
+        for select in self._filters:
+            if not isinstance(select, dict):
+                continue
+            for key, value in select.items():
+                if isinstance(value, INDEXABLE_TYPES):
+                    equals.setdefault(key, value)
+
+        best: Optional[Tuple[bool, int]] = None
+        used: List[str] = []
+        for index, fields in self.model.indexed_fields().items():
+            covered = 0
+            while covered < len(fields) and fields[covered] in equals:
+                covered += 1
+            score = (covered == len(fields), covered)
+            if covered and (best is None or score > best):
+                best = score
+                used = fields[:covered]
+                plan.update(index=index)
+
+        if best is None:
+            return plan
+
+        plan["method"] = "get_all" if best[0] else "between"
+        plan["values"] = [equals[field] for field in used]
+        plan["filters"] = []
+        for select in self._filters:
+            if isinstance(select, dict):
+                select = {
+                    key: value
+                    for key, value in select.items()
+                    if not (key in used and value is equals[key])
+                }
+                if not select:
+                    continue
+            plan["filters"].append(select)
+        return plan
+
+    def build(self, rdb: RethinkDB) -> Any:  # pylint: disable=too-many-branches
+        """Return the ReQL query."""
+        plan = self.explain()
+        query = rdb.table(self.model.tablename)
+        if plan["method"] == "keyset":
+            query = self.__keyset_selection(rdb, query)
+        elif plan["method"] == "order_by":
+            query = query.order_by(*self._order_by, index=plan["index"])
+        elif plan["method"] in ("get_all", "between"):
+            fields = self.model.indexed_fields()[plan["index"]]
+            values = list(plan["values"])
+            if len(fields) == 1:
+                query = query.get_all(values[0], index=plan["index"])
+            elif plan["method"] == "get_all":
+                query = query.get_all(values, index=plan["index"])
+            else:
+                missing = len(fields) - len(values)
+                query = query.between(
+                    values + [rdb.minval] * missing,
+                    values + [rdb.maxval] * missing,
+                    index=plan["index"],
+                )
+
+        if plan["soft_delete"] == "index":
+            query = query.get_all(True, index=db.SOFT_DELETE_INDEX)
+        elif plan["soft_delete"] == "filter":
+            query = query.filter({"deleted_on": None})
+
+        for select in plan["filters"]:
+            query = query.filter(select)
+
+        if plan["method"] not in ("keyset", "order_by") and self._order_by:
+            query = query.order_by(*self._order_by)
+
+        if self._skip:
+            query = query.skip(self._skip)
+
+        if self._limit:
+            query = query.limit(self._limit)
+
+        if self._pluck:
+            query = query.pluck(*self._pluck)
+
+        if self._only:
+            query = query.pluck(PRIMARY_KEY, *self._only, *self.__keyset_fields())
+        defer = [name for name in self._defer if name not in self.__keyset_fields()]
+        if defer:
+            query = query.without(*defer)
+
+        return query
+
+    def __keyset_selection(self, rdb: RethinkDB, table: Any) -> Any:
+        """Return the table ordered by the keyset index, after the last key."""
+        index = self._keyset
+        if self._after is None:
+            return table.order_by(index=index)
+
+        key, last_id = self._after  # pylint: disable=unpacking-non-sequence
+        if index == PRIMARY_KEY:
+            return table.between(
+                key, rdb.maxval, index=index, left_bound="open"
+            ).order_by(index=index)
+
+        # objects with the same key are ordered by id, skip the ones that
+        # were already returned
+        fields = self.model.indexed_fields()[index]
+        return (
+            table.between(key, rdb.maxval, index=index)
+            .order_by(index=index)
+            .filter(
+                lambda row: rdb.expr(self.__index_key(row, fields))
+                .ne(key)
+                .or_(row[PRIMARY_KEY].gt(last_id))
+            )
+        )
+
+    @staticmethod
+    def __index_key(document: Any, fields: Tuple[str, ...]) -> Any:
+        """Return the value indexed for a document (or a row)."""
+        if len(fields) == 1:
+            return document[fields[0]]
+        return [document[field] for field in fields]
+
+    def __next_token(self, results: List[dict]) -> Optional[str]:
+        """Return the continuation token, if there may be a next page."""
+        if self._keyset is None or not self._limit or len(results) < self._limit:
+            return None
+        last = results[-1]
+        fields = self.__keyset_fields() or (PRIMARY_KEY,)
+        key = self.__index_key({name: last.get(name) for name in fields}, fields)
+        return encode_token(self._keyset, key, last[PRIMARY_KEY])
+
+    def __fetch(self) -> List:
+        """Execute the query and build objects."""
+        with connection() as (rdb, conn):
+            results = list(self.build(rdb).run(conn))
+        objects = self.model.from_documents(
+            results, prefetch=self._prefetch, deferred=self.deferred_fields()
+        )
+        objects.next_token = self.__next_token(results)
+        return objects
+
+    async def __afetch(self) -> List:
+        """Execute the query in the running event loop and build objects."""
+        async with aconnection() as (rdb, conn):
+            results = [
+                document async for document in aiterate(await self.build(rdb).run(conn))
+            ]
+        objects = await self.model.afrom_documents(
+            results, deferred=self.deferred_fields()
+        )
+        objects.next_token = self.__next_token(results)
+        return objects
+
+    def all(self) -> List:
+        """Execute the query, if needed, and return the list of objects."""
+        if self._results is None:
+            self._results = self.__fetch()
+        return self._results
+
+    async def aall(self) -> List:
+        """Asynchronous version of :meth:`all`.
+
+        Linked objects are always prefetched, each linked Model is fetched
+        concurrently.
+        """
+        if self._results is None:
+            self._results = await self.__afetch()
+        return self._results
+
+    def first(self) -> Optional[Any]:
+        """Return the first object, or :code:`None` if there is no result."""
+        if self._results is not None:
+            return self._results[0] if self._results else None
+
+        results = self.limit(1).all()
+        return results[0] if results else None
+
+    async def afirst(self) -> Optional[Any]:
+        """Asynchronous version of :meth:`first`."""
+        if self._results is not None:
+            return self._results[0] if self._results else None
+
+        results = await self.limit(1).aall()
+        return results[0] if results else None
+
+    def count(self) -> int:
+        """Return the number of results, counted by RethinkDB."""
+        if self._results is not None:
+            return len(self._results)
+
+        with connection() as (rdb, conn):
+            return self.build(rdb).count().run(conn)
+
+    async def acount(self) -> int:
+        """Asynchronous version of :meth:`count`."""
+        if self._results is not None:
+            return len(self._results)
+
+        async with aconnection() as (rdb, conn):
+            return await self.build(rdb).count().run(conn)
+
+    @staticmethod
+    def __batch_options(
+        max_batch_rows: Optional[int], max_batch_bytes: Optional[int]
+    ) -> Dict[str, int]:
+        """Return the run options that limit the size of cursor batches."""
+        return {
+            name: value
+            for name, value in (
+                ("max_batch_rows", max_batch_rows),
+                ("max_batch_bytes", max_batch_bytes),
+            )
+            if value is not None
+        }
+
+    def stream(
+        self,
+        chunk_size: int = 100,
+        max_batch_rows: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+    ) -> Generator[Any, None, None]:
+        """Yield objects while they are read from the RethinkDB cursor.
+
+        Results are not kept in memory: documents are built by chunks of
+        :code:`chunk_size` objects (linked objects are prefetched per chunk).
+        :code:`max_batch_rows` and :code:`max_batch_bytes` are given to
+        RethinkDB to limit the size of each batch sent by the server.
+
+        The cursor is read on a dedicated connection, that is not taken from
+        the pool, so that objects can be built and used while the generator
+        runs. The connection and the cursor are closed when the iteration
+        ends, when the generator is closed or on exception.
+
+        .. code::
+
+            for user in User.query().filter({"active": True}).stream():
+                process(user)
+        """
+        options = self.__batch_options(max_batch_rows, max_batch_bytes)
+        chunk_size = max(1, chunk_size)
+        deferred = self.deferred_fields()
+
+        with dedicated_connection() as (rdb, conn):
+            cursor = self.build(rdb).run(conn, **options)
+            try:
+                chunk = []
+                for document in cursor:
+                    chunk.append(document)
+                    if len(chunk) >= chunk_size:
+                        yield from self.model.from_documents(
+                            chunk, prefetch=self._prefetch, deferred=deferred
+                        )
+                        chunk = []
+                if chunk:
+                    yield from self.model.from_documents(
+                        chunk, prefetch=self._prefetch, deferred=deferred
+                    )
+            finally:
+                if hasattr(cursor, "close"):
+                    cursor.close()
+
+    async def astream(
+        self,
+        chunk_size: int = 100,
+        max_batch_rows: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+    ) -> AsyncGenerator[Any, None]:
+        """Asynchronous version of :meth:`stream`.
+
+        The dedicated connection is closed when the iteration ends. If you
+        stop iterating before, close the generator, e.g. with
+        :code:`contextlib.aclosing()`, to close it immediately.
+
+        .. code::
+
+            async for user in User.query().filter({"active": True}).astream():
+                process(user)
+        """
+        options = self.__batch_options(max_batch_rows, max_batch_bytes)
+        chunk_size = max(1, chunk_size)
+        deferred = self.deferred_fields()
+
+        async with adedicated_connection() as (rdb, conn):
+            documents = aiterate(await self.build(rdb).run(conn, **options))
+            try:
+                chunk = []
+                async for document in documents:
+                    chunk.append(document)
+                    if len(chunk) >= chunk_size:
+                        for obj in await self.model.afrom_documents(
+                            chunk, deferred=deferred
+                        ):
+                            yield obj
+                        chunk = []
+                if chunk:
+                    for obj in await self.model.afrom_documents(
+                        chunk, deferred=deferred
+                    ):
+                        yield obj
+            finally:
+                await documents.aclose()
+
+    def join(self, *models: Any, **kwargs) -> List:
+        """Execute the query and join linked models.
+
+        See :meth:`rethinkmodel.model.Model.join_all`.
+        """
+        return self.model.join_all(self.all(), *models, **kwargs)
+
+    def __iter__(self) -> Iterator:
+        """Iterate over results."""
+        return iter(self.all())
+
+    def __len__(self) -> int:
+        """Return the number of results."""
+        return len(self.all())
+
+    def __bool__(self) -> bool:
+        """Return :code:`True` if there is at least one result."""
+        return len(self) > 0
+
+    def __getitem__(  # pylint: disable=too-many-boolean-expressions
+        self, key: Union[int, slice]
+    ) -> Any:
+        """Get one object, or a list of objects with a slice.
+
+        If results are not fetched, skip and limit are used to only get the
+        needed objects.
+        """
+        if self._results is not None:
+            result = self._results[key]
+            if isinstance(key, slice):
+                return type(self._results)(result)
+            return result
+
+        if isinstance(key, int) and key >= 0:
+            results = self.__slice(key, key + 1)
+            if not results:
+                raise IndexError("QuerySet index out of range")
+            return results[0]
+
+        if (
+            isinstance(key, slice)
+            and key.step is None
+            and (key.start is None or key.start >= 0)
+            and (key.stop is None or key.stop >= 0)
+        ):
+            return self.__slice(key.start or 0, key.stop)
+
+        return self.all()[key]
+
+    def __slice(self, start: int, stop: Optional[int]) -> List:
+        """Fetch results from "start" to "stop" with skip and limit."""
+        limit = None if stop is None else max(stop - start, 0)
+        if self._limit is not None:
+            remaining = max(self._limit - start, 0)
+            limit = remaining if limit is None else min(limit, remaining)
+
+        if limit == 0:
+            return self.model.from_documents([])
+
+        return self.__clone(skip=(self._skip or 0) + start or None, limit=limit).all()
+
+    def __repr__(self) -> str:
+        """Representation of the query."""
+        return f"<QuerySet {self.build(RethinkDB())}>"
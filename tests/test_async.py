@@ -0,0 +1,105 @@
+"""Tests on the asyncio API."""
+# pylint: disable=missing-class-docstring
+import asyncio
+from typing import List, Optional
+from unittest import IsolatedAsyncioTestCase
+
+from rethinkmodel import config, db
+from rethinkmodel.manage import manage
+from rethinkmodel.model import Model
+
+from tests.utils import clean
+
+DB_NAME = "test_async"
+
+
+class AsyncUser(Model):
+    name: str
+
+
+class AsyncTag(Model):
+    name: str
+
+
+class AsyncPost(Model):
+    title: str
+    author: Optional[AsyncUser]
+    tags: List[AsyncTag]
+
+
+clean(DB_NAME)
+
+
+class AsyncTest(IsolatedAsyncioTestCase):
+    """Use models in an event loop."""
+
+    def setUp(self) -> None:
+        """Configure database and create tables."""
+        config(dbname=DB_NAME, pool_max_size=4)
+        manage(__name__)
+        for model in (AsyncUser, AsyncTag, AsyncPost):
+            model.truncate()
+        return super().setUp()
+
+    async def test_save_get(self):
+        """Objects are saved and fetched without blocking."""
+        user = await AsyncUser(name="foo").asave()
+        self.assertIsNotNone(user.id)
+
+        user.name = "bar"
+        await user.asave()
+        fetched = await AsyncUser.aget(user.id)
+        self.assertEqual(fetched.name, "bar")
+        self.assertEqual(fetched.changed_fields(), set())
+
+        await fetched.adelete()
+        self.assertIsNone(await AsyncUser.aget(user.id))
+
+    async def test_relations(self):
+        """Linked objects are fetched concurrently."""
+        user = await AsyncUser(name="author").asave()
+        tags = [await AsyncTag(name=f"tag{i}").asave() for i in range(3)]
+        await asyncio.gather(
+            *(
+                AsyncPost(title=f"post{i}", author=user, tags=tags).asave()
+                for i in range(5)
+            )
+        )
+
+        posts = await AsyncPost.afilter({"title": "post1"})
+        self.assertEqual(len(posts), 1)
+        self.assertEqual(posts[0].author.name, "author")
+        self.assertEqual([tag.name for tag in posts[0].tags], ["tag0", "tag1", "tag2"])
+
+        streamed = [post async for post in AsyncPost.astream(chunk_size=2)]
+        self.assertEqual(len(streamed), 5)
+        self.assertIs(streamed[0].author, streamed[1].author)
+
+        self.assertEqual(await AsyncPost.query().acount(), 5)
+        self.assertEqual(db.get_async_pool().stats()["in_use"], 0)
+
+    async def test_deferred(self):
+        """Deferred fields of asynchronous objects are loaded with aload()."""
+        user = await AsyncUser(name="author").asave()
+        await AsyncPost(title="deferred", author=user).asave()
+
+        post = await AsyncPost.query().only("title").afirst()
+        self.assertEqual(post.title, "deferred")
+        with self.assertRaises(RuntimeError):
+            post.author  # pylint: disable=pointless-statement
+
+        self.assertIs(await post.aload(), post)
+        self.assertEqual(post.author.name, "author")
+        self.assertEqual(post.deferred_fields(), set())
+
+    async def test_changes(self):
+        """Changes are received in an asynchronous generator."""
+        feed = AsyncUser.achanges()
+        task = asyncio.ensure_future(feed.__anext__())
+        await asyncio.sleep(0.5)
+        await AsyncUser(name="foo").asave()
+
+        old, new = await asyncio.wait_for(task, 5)
+        await feed.aclose()
+        self.assertIsNone(old)
+        self.assertEqual(new.name, "foo")
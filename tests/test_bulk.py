@@ -0,0 +1,138 @@
+"""Tests on bulk writes."""
+# pylint: disable=missing-class-docstring
+
+import logging
+from typing import List
+from unittest.case import TestCase
+
+from rethinkmodel import config, db
+from rethinkmodel.manage import manage
+from rethinkmodel.model import Model
+
+from tests.utils import clean
+
+DB_NAME = "test_bulk"
+LOGGER_NAME = "tests.bulk"
+
+
+class BulkUser(Model):
+    name: str
+
+    def on_created(self):
+        """Log creation."""
+        logging.getLogger(LOGGER_NAME).info("created %s", self.name)
+
+    @classmethod
+    def on_modified_many(cls, objects: List[Model]):
+        """Log batch modification."""
+        logging.getLogger(LOGGER_NAME).info("modified %d", len(objects))
+
+    def on_deleted(self):
+        """Log deletion."""
+        logging.getLogger(LOGGER_NAME).info("deleted %s", self.name)
+
+
+clean(DB_NAME)
+
+
+class BulkSaveTest(TestCase):
+    """Make some tests on save_many."""
+
+    def setUp(self) -> None:
+        """Configure database and create tables."""
+        config(dbname=DB_NAME)
+        manage(__name__)
+        BulkUser.truncate()
+        return super().setUp()
+
+    def test_insert_many(self):
+        """Objects get their ids in order."""
+        users = [BulkUser(name=f"user{i}") for i in range(25)]
+        with self.assertLogs(LOGGER_NAME) as logs:
+            report = BulkUser.save_many(users, chunk_size=10)
+
+        self.assertEqual(report["inserted"], 25)
+        self.assertEqual(report["errors"], [])
+        self.assertEqual(len(logs.output), 25)
+        for user in users:
+            self.assertIsNotNone(user.id)
+            self.assertIsNotNone(user.created_on)
+            self.assertEqual(BulkUser.get(user.id).name, user.name)
+
+    def test_update_many(self):
+        """Existing objects are updated, with batch hooks."""
+        users = [BulkUser(name=f"user{i}") for i in range(5)]
+        BulkUser.save_many(users, hooks=None)
+        for user in users:
+            user.name = user.name.upper()
+
+        with self.assertLogs(LOGGER_NAME) as logs:
+            report = BulkUser.save_many(users, hooks="batch")
+
+        self.assertEqual(report["replaced"], 5)
+        self.assertIn("modified 5", "".join(logs.output))
+        self.assertEqual(BulkUser.get(users[0].id).name, "USER0")
+
+    def test_errors(self):
+        """An error does not stop the batch."""
+        user = BulkUser(name="duplicated").save()
+        duplicate = BulkUser(name="duplicate")
+        duplicate.id = user.id
+        others = [BulkUser(name=f"other{i}") for i in range(3)]
+
+        report = BulkUser.save_many([duplicate] + others, conflict="error", hooks=None)
+        self.assertEqual(report["inserted"], 3)
+        self.assertEqual(len(report["errors"]), 1)
+        self.assertIs(report["errors"][0][0], duplicate)
+        for other in others:
+            self.assertIsNotNone(other.id)
+
+
+class BulkWhereTest(TestCase):
+    """Make some tests on update_where and delete_where."""
+
+    def setUp(self) -> None:
+        """Configure database and create some users."""
+        config(dbname=DB_NAME)
+        manage(__name__)
+        BulkUser.truncate()
+        BulkUser.save_many([BulkUser(name=f"user{i}") for i in range(10)], hooks=None)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        """Deactivate soft deletion."""
+        db.SOFT_DELETE = False
+        return super().tearDown()
+
+    def test_update_where(self):
+        """Matching objects are updated in one query."""
+        report = BulkUser.update_where(
+            lambda row: row["name"].match("^user[0-4]$"),
+            lambda row: {"name": row["name"].add("!")},
+        )
+        self.assertEqual(report, {"replaced": 5, "unchanged": 0, "errors": 0})
+        self.assertEqual(len(BulkUser.filter(lambda row: row["name"].match("!$"))), 5)
+
+        with self.assertLogs(LOGGER_NAME) as logs:
+            BulkUser.update_where({"name": "user9"}, {"name": "last"}, hooks="batch")
+        self.assertEqual(logs.output, [f"INFO:{LOGGER_NAME}:modified 1"])
+        self.assertEqual(BulkUser.filter({"name": "last"})[0].name, "last")
+
+    def test_delete_where(self):
+        """Matching objects are deleted, or soft deleted, in one query."""
+        with self.assertLogs(LOGGER_NAME) as logs:
+            report = BulkUser.delete_where({"name": "user0"}, hooks="object")
+        self.assertEqual(report, {"deleted": 1, "errors": 0})
+        self.assertEqual(logs.output, [f"INFO:{LOGGER_NAME}:deleted user0"])
+
+        # internal indexes are created when soft deletion is activated
+        config(dbname=DB_NAME, soft_delete=True)
+        manage(__name__)
+        report = BulkUser.delete_where(lambda row: row["name"].match("^user[1-4]$"))
+        self.assertEqual(report["deleted"], 4)
+        self.assertEqual(len(BulkUser.get_all()), 5)
+
+        # soft deleted objects are not deleted again, nor updated
+        report = BulkUser.delete_where(None)
+        self.assertEqual(report["deleted"], 5)
+        self.assertEqual(BulkUser.update_where(None, {"name": "x"})["replaced"], 0)
@@ -0,0 +1,98 @@
+"""Tests on the cache of Model.get()."""
+
+import time
+from unittest.case import TestCase
+
+from rethinkmodel import config
+from rethinkmodel.db import connection
+from rethinkmodel.manage import manage
+from rethinkmodel.model import Model
+
+from tests.utils import clean
+
+DB_NAME = "test_cache"
+
+
+class CachedCountry(Model):
+    """A country that is often read."""
+
+    name: str
+
+    @classmethod
+    def get_cache_options(cls):
+        """Keep 2 countries."""
+        return {"max_size": 2, "ttl": 60}
+
+
+clean(DB_NAME)
+
+
+class CacheTest(TestCase):
+    """Make some tests on the cache."""
+
+    def setUp(self) -> None:
+        """Create some countries."""
+        config(dbname=DB_NAME, soft_delete=True)
+        manage(__name__)
+        self.countries = [CachedCountry(name=f"country{i}").save() for i in range(3)]
+        return super().setUp()
+
+    def wait_for(self, condition):
+        """Wait until the changefeed is applied."""
+        for _ in range(50):
+            if condition():
+                return
+            time.sleep(0.1)
+        self.fail("The cache was not updated")
+
+    def test_read_through(self):
+        """Documents are read once, and evicted by size."""
+        first = self.countries[0]
+        self.assertEqual(CachedCountry.get(first.id).name, "country0")
+        self.assertEqual(CachedCountry.get(first.id).name, "country0")
+        self.assertIsNot(CachedCountry.get(first.id), CachedCountry.get(first.id))
+        stats = CachedCountry.cache_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 3)
+
+        for country in self.countries[1:]:
+            CachedCountry.get(country.id)
+        stats = CachedCountry.cache_stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["evictions"], 1)
+
+        CachedCountry.get(first.id, cache=False)
+        self.assertEqual(CachedCountry.cache_stats()["misses"], stats["misses"])
+
+    def test_own_writes(self):
+        """Documents written by the process are evicted immediately."""
+        country = self.countries[0]
+        CachedCountry.get(country.id)
+
+        country.name = "renamed"
+        country.save()
+        self.assertEqual(CachedCountry.get(country.id).name, "renamed")
+
+        CachedCountry.update_where({"name": "renamed"}, {"name": "updated"})
+        self.assertEqual(CachedCountry.get(country.id).name, "updated")
+
+        country_id = country.id
+        country.delete()
+        self.assertIsNone(CachedCountry.get(country_id))
+
+    def test_invalidation(self):
+        """Documents changed by other processes are updated by the changefeed."""
+        country = self.countries[0]
+        CachedCountry.get(country.id)
+
+        with connection() as (rdb, conn):
+            rdb.table(CachedCountry.tablename).get(country.id).update(
+                {"name": "renamed"}
+            ).run(conn)
+        self.wait_for(lambda: CachedCountry.cache_stats()["invalidations"] == 1)
+        self.assertEqual(CachedCountry.get(country.id).name, "renamed")
+
+        with connection() as (rdb, conn):
+            rdb.table(CachedCountry.tablename).get(country.id).delete().run(conn)
+        self.wait_for(lambda: CachedCountry.cache_stats()["invalidations"] == 2)
+        self.assertIsNone(CachedCountry.get(country.id))
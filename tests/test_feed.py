@@ -4,10 +4,13 @@ import time
 from queue import Queue
 from threading import Thread
 from typing import Optional
+from unittest import mock
 from unittest.case import TestCase
 
+from rethinkdb import errors
 from rethinkmodel import config
-from rethinkmodel.db import connect
+from rethinkmodel.db import connect, pool_stats
+from rethinkmodel.feed import FeedHub, Subscription, feed_key
 from rethinkmodel.manage import manage
 from rethinkmodel.model import Model
 
@@ -147,3 +150,170 @@ class FeedOnDeletedTest(TestCase):
         thread.join()
 
         conn.close()
+
+
+class FeedHubTest(TestCase):
+    """Make tests on shared feeds."""
+
+    def setUp(self) -> None:
+        """Manage table."""
+        config(dbname=DB_NAME)
+        manage(__name__)
+        return super().setUp()
+
+    def test_shared_feed(self):
+        """Subscribers with the same filter share one changefeed."""
+        hub = FeedHub(maxsize=10)
+        first = hub.subscribe(FeededUser, lambda row: row["name"].eq("shared"))
+        second = hub.subscribe(FeededUser, lambda user: user["name"].eq("shared"))
+        other = hub.subscribe(FeededUser)
+        self.assertEqual(hub.stats(), {"feeds": 2, "subscribers": 3})
+
+        # feeds do not take pooled connections
+        stats = pool_stats()
+        self.assertEqual(stats["in_use"], 0)
+        self.assertEqual(stats["dedicated"], 2)
+
+        FeededUser(name="shared").save()
+        for subscription in (first, second, other):
+            old, new = subscription.get(timeout=5)
+            self.assertIsNone(old)
+            self.assertEqual(new.name, "shared")
+
+        first.close()
+        self.assertEqual(hub.stats(), {"feeds": 2, "subscribers": 2})
+        second.close()
+        other.close()
+        self.assertEqual(hub.stats(), {"feeds": 0, "subscribers": 0})
+
+    def test_policies(self):
+        """Full queues drop, coalesce or disconnect."""
+        changes = [
+            {"old_val": None, "new_val": {"id": "a", "name": "a1"}},
+            {
+                "old_val": {"id": "a", "name": "a1"},
+                "new_val": {"id": "a", "name": "a2"},
+            },
+            {"old_val": None, "new_val": {"id": "b", "name": "b1"}},
+        ]
+        hub = FeedHub()
+
+        dropping = Subscription(hub, FeededUser, 2, "drop")
+        coalescing = Subscription(hub, FeededUser, 2, "coalesce")
+        disconnecting = Subscription(hub, FeededUser, 2, "disconnect")
+        for change in changes:
+            dropping.put(change)
+            coalescing.put(change)
+        self.assertFalse(all([disconnecting.put(change) for change in changes]))
+
+        self.assertEqual(dropping.dropped, 1)
+        self.assertEqual(dropping.get_raw(0), changes[1])
+
+        self.assertEqual(coalescing.dropped, 0)
+        old, new = coalescing.get(0)
+        self.assertIsNone(old)
+        self.assertEqual(new.name, "a2")
+
+        self.assertTrue(disconnecting.closed)
+        disconnecting.get_raw(0)
+        disconnecting.get_raw(0)
+        with self.assertRaises(errors.ReqlDriverError):
+            disconnecting.get_raw(0)
+
+        with self.assertRaises(ValueError):
+            hub.subscribe(FeededUser, policy="wait")
+
+    def test_shared_feed_reconnect(self):
+        """The shared changefeed is opened again when its connection is lost."""
+        opened = []
+        changes_query = FeededUser.changes_query
+
+        class LostCursor:
+            """Cursor of a changefeed that lost its connection."""
+
+            def next(self, wait):
+                raise errors.ReqlDriverError("Connection is closed.")
+
+            def close(self):
+                pass
+
+        class LosingQuery:
+            """Changefeed query that loses its first connection."""
+
+            def __init__(self, query):
+                self.query = query
+
+            def run(self, conn):
+                opened.append(conn)
+                if len(opened) == 1:
+                    return LostCursor()
+                return self.query.run(conn)
+
+        def losing_changes_query(rdb, select, **options):
+            return LosingQuery(changes_query(rdb, select, **options))
+
+        hub = FeedHub(reconnect=1)
+        with mock.patch.object(FeededUser, "changes_query", losing_changes_query):
+            subscription = hub.subscribe(FeededUser)
+            while len(opened) < 2:
+                time.sleep(0.1)
+            time.sleep(0.5)
+
+        FeededUser(name="reconnected").save()
+        _, new = subscription.get(timeout=5)
+        self.assertEqual(new.name, "reconnected")
+        subscription.close()
+
+        # without reconnection, subscribers get the error
+        opened.clear()
+        hub = FeedHub(reconnect=0)
+        with mock.patch.object(FeededUser, "changes_query", losing_changes_query):
+            with self.assertRaises(errors.ReqlDriverError):
+                hub.subscribe(FeededUser).get(timeout=5)
+        self.assertEqual(hub.stats(), {"feeds": 0, "subscribers": 0})
+
+    def test_feed_key(self):
+        """Filters are normalized."""
+        self.assertEqual(
+            feed_key(FeededUser, {"name": "foo", "pointer": None}),
+            feed_key(FeededUser, {"pointer": None, "name": "foo"}),
+        )
+        self.assertNotEqual(
+            feed_key(FeededUser, lambda row: row["name"].eq("foo")),
+            feed_key(FeededUser, lambda row: row["name"].eq("bar")),
+        )
+
+
+class FeedOptionsTest(TestCase):
+    """Make tests on changefeed options."""
+
+    def setUp(self) -> None:
+        """Manage table and create some users."""
+        config(dbname=DB_NAME)
+        manage(__name__)
+        FeededUser.truncate()
+        for i in range(3):
+            FeededUser(name=f"initial{i}").save()
+        return super().setUp()
+
+    def test_include_initial(self):
+        """Current objects are given first, states only in raw mode."""
+        feed = FeededUser.changes(include_initial=True)
+        names = sorted(next(feed)[1].name for _ in range(3))
+        feed.close()
+        self.assertEqual(names, ["initial0", "initial1", "initial2"])
+
+        feed = FeededUser.changes(include_initial=True, include_states=True, raw=True)
+        self.assertEqual(next(feed), {"state": "initializing"})
+        changes = [next(feed) for _ in range(4)]
+        feed.close()
+        self.assertEqual(changes[-1], {"state": "ready"})
+        self.assertTrue(all("new_val" in change for change in changes[:3]))
+
+    def test_batch(self):
+        """Received changes are given in lists."""
+        feed = FeededUser.changes(include_initial=True, raw=True, batch_size=2)
+        batches = [next(feed), next(feed)]
+        feed.close()
+        self.assertEqual(sorted(len(batch) for batch in batches), [1, 2])
+        self.assertIsInstance(batches[0][0], dict)
@@ -5,7 +5,8 @@ import logging
 import unittest
 from typing import Optional
 
-from rethinkmodel import config
+from rethinkdb import r
+from rethinkmodel import config, db
 from rethinkmodel.manage import manage
 from rethinkmodel.model import Model
 
@@ -75,6 +76,17 @@ class SimpleType(Model):
     age: int
 
 
+class Measure(Model):
+    """Written without waiting for the server."""
+
+    value: int
+
+    @classmethod
+    def get_write_options(cls):
+        """Use soft durability and noreply writes."""
+        return {"durability": "soft", "noreply": True}
+
+
 utils.clean("test_generic")
 
 
@@ -188,3 +200,70 @@ class GenericTest(unittest.TestCase):
         """Get None should not raise exception and return None."""
         user = User.get(None)
         self.assertIsNone(user)
+
+    def test_changed_fields(self):
+        """Only modified fields are tracked, and saved."""
+        user = User(name="tracked").save()
+        self.assertEqual(user.changed_fields(), set())
+
+        fetched = User.get(user.id)
+        self.assertEqual(fetched.changed_fields(), set())
+        updated_on = fetched.updated_on
+
+        # nothing changed, no write
+        fetched.save()
+        self.assertEqual(fetched.updated_on, updated_on)
+
+        fetched.name = "tracked and modified"
+        self.assertEqual(fetched.changed_fields(), {"name"})
+        fetched.save()
+        self.assertEqual(fetched.changed_fields(), set())
+        self.assertEqual(User.get(user.id).name, "tracked and modified")
+
+        # force writes the whole object
+        fetched.save(force=True)
+        self.assertIsNotNone(fetched.updated_on)
+
+    def test_upsert(self):
+        """Upsert creates or updates in one query."""
+        user = User(name="upserted")
+        user.id = "upserted-user"
+        user.upsert()
+        created_on = User.get("upserted-user").created_on
+        self.assertIsNotNone(created_on)
+
+        other = User(name="upserted again")
+        other.id = "upserted-user"
+        other.upsert()
+        fetched = User.get("upserted-user")
+        self.assertEqual(fetched.name, "upserted again")
+        self.assertEqual(fetched.created_on, created_on)
+        self.assertEqual(other.created_on, created_on)
+
+    def test_save_return_changes(self):
+        """Values computed by the server are returned."""
+        simple = SimpleType(name="counter", age=1, user=None).save()
+        simple.age = r.row["age"] + 1
+        simple.save(return_changes=True)
+        self.assertEqual(simple.age, 2)
+
+    def test_noreply(self):
+        """Noreply writes are visible after a flush."""
+        measures = [Measure(value=i).save() for i in range(10)]
+        self.assertTrue(all(measure.id for measure in measures))
+        db.flush()
+        self.assertEqual(len(Measure.get_all()), 10)
+
+        measures[0].delete()
+        db.flush()
+        self.assertEqual(len(Measure.get_all()), 9)
+
+        # override the model options
+        measure = Measure(value=42).save(noreply=False, durability="hard")
+        self.assertEqual(Measure.get(measure.id).value, 42)
+        with self.assertRaises(ValueError):
+            Measure(value=1).save(return_changes=True)
+
+        Measure.truncate()
+        db.flush()
+        self.assertEqual(len(Measure.get_all()), 0)
@@ -5,8 +5,8 @@ import unittest
 
 from rethinkmodel import config, db
 from rethinkmodel.db import connect
-from rethinkmodel.manage import introspect
-from rethinkmodel.model import Model
+from rethinkmodel.manage import config_differences, diff, introspect, sync
+from rethinkmodel.model import Index, Model
 
 from tests import utils
 
@@ -17,6 +17,32 @@ class ManagedTable(Model):
     name: str
 
 
+class IndexedTable(Model):
+    """A table with indexes to synchronize."""
+
+    name: str
+    tags: list
+
+    @classmethod
+    def get_indexes(cls):
+        """Declare some indexes."""
+        return [
+            Index("by_name", "name", renamed_from="name"),
+            Index("tags", multi=True),
+        ]
+
+
+class ShardedTable(Model):
+    """A table spread on several shards."""
+
+    name: str
+
+    @classmethod
+    def get_table_options(cls):
+        """Use two shards."""
+        return {"shards": 2, "replicas": 1, "durability": "soft"}
+
+
 utils.clean("test_manage")
 
 
@@ -36,3 +62,109 @@ class ManageTest(unittest.TestCase):
         conn.close()
         # the table must be created
         self.assertIn(ManagedTable.tablename, tables)
+
+    def test_diff(self):
+        """Compute operations from a database state."""
+        state = {
+            IndexedTable.tablename: ["name", "old", db.SOFT_DELETE_INDEX],
+        }
+        changes = diff([ManagedTable, IndexedTable], state)
+        self.assertEqual(changes["create_tables"], [ManagedTable.tablename])
+        self.assertEqual(changes["create_indexes"], [(IndexedTable.tablename, "tags")])
+        self.assertEqual(
+            changes["rename_indexes"], [(IndexedTable.tablename, "name", "by_name")]
+        )
+        self.assertEqual(changes["drop_indexes"], [(IndexedTable.tablename, "old")])
+
+        # internal indexes are only created with soft deletion
+        db.SOFT_DELETE = True
+        try:
+            changes = diff([ManagedTable, IndexedTable], state)
+        finally:
+            db.SOFT_DELETE = False
+        self.assertEqual(
+            changes["create_indexes"],
+            [
+                (ManagedTable.tablename, db.SOFT_DELETE_INDEX),
+                (ManagedTable.tablename, db.DELETED_ON_INDEX),
+                (IndexedTable.tablename, "tags"),
+                (IndexedTable.tablename, db.DELETED_ON_INDEX),
+            ],
+        )
+        self.assertEqual(changes["drop_indexes"], [(IndexedTable.tablename, "old")])
+
+    def test_sync(self):
+        """Synchronization is idempotent and dry run changes nothing."""
+        rdb, conn = connect()
+        rdb.table_create(IndexedTable.tablename).run(conn)
+        rdb.table(IndexedTable.tablename).index_create("old").run(conn)
+
+        changes = sync(IndexedTable, dry_run=True)
+        self.assertEqual(
+            rdb.table(IndexedTable.tablename).index_list().run(conn), ["old"]
+        )
+        self.assertEqual(changes["drop_indexes"], [(IndexedTable.tablename, "old")])
+
+        sync(IndexedTable)
+        indexes = rdb.table(IndexedTable.tablename).index_list().run(conn)
+        self.assertIn("by_name", indexes)
+        self.assertIn("old", indexes)
+
+        changes = sync(IndexedTable, drop=True)
+        self.assertEqual(changes["create_indexes"], [])
+        self.assertNotIn(
+            "old", rdb.table(IndexedTable.tablename).index_list().run(conn)
+        )
+
+        changes = sync(IndexedTable)
+        self.assertFalse(any(changes.values()))
+        conn.close()
+
+    def test_config_differences(self):
+        """Table options are compared to the table configuration."""
+        config = {
+            "shards": [
+                {"primary_replica": "one", "replicas": ["one"]},
+            ],
+            "durability": "hard",
+        }
+        servers = {"one": ["default", "paris"]}
+        self.assertEqual(config_differences({"replicas": 1}, config, servers), [])
+        self.assertEqual(
+            config_differences(ShardedTable.get_table_options(), config, servers),
+            ["shards", "durability"],
+        )
+        self.assertEqual(
+            config_differences(
+                {"replicas": {"paris": 1}, "primary_replica_tag": "london"},
+                config,
+                servers,
+            ),
+            ["primary_replica_tag"],
+        )
+
+        changes = diff(
+            [ShardedTable],
+            {ShardedTable.tablename: [db.SOFT_DELETE_INDEX]},
+            {ShardedTable.tablename: config},
+            servers,
+        )
+        self.assertEqual(
+            changes["reconfigure_tables"],
+            [(ShardedTable.tablename, ["shards", "durability"])],
+        )
+
+    def test_table_options(self):
+        """Tables are created, then reconfigured, with the declared options."""
+        rdb, conn = connect()
+        rdb.table_create(ShardedTable.tablename).run(conn)
+        changes = sync(ShardedTable)
+        self.assertEqual(
+            changes["reconfigure_tables"],
+            [(ShardedTable.tablename, ["shards", "durability"])],
+        )
+        config = rdb.table(ShardedTable.tablename).config().run(conn)
+        self.assertEqual(len(config["shards"]), 2)
+        self.assertEqual(config["durability"], "soft")
+        self.assertEqual(sync(ShardedTable)["reconfigure_tables"], [])
+        conn.close()
@@ -0,0 +1,223 @@
+"""Tests on index selection for dict filters."""
+# pylint: disable=missing-class-docstring,too-few-public-methods
+
+from datetime import datetime
+from typing import List
+from unittest import TestCase, mock
+
+from rethinkdb import RethinkDB
+from rethinkmodel import db
+from rethinkmodel.model import Index, Model
+from rethinkmodel.query import decode_token, encode_token
+
+
+class Place(Model):
+    name: str
+    country: str
+    city: str
+    active: bool
+
+    @classmethod
+    def get_indexes(cls):
+        return {"name": "name", "country_city": ["country", "city"]}
+
+
+class Tagged(Model):
+    name: str
+    tags: list
+
+    @classmethod
+    def get_indexes(cls):
+        return [
+            "name",
+            Index("tags", multi=True),
+            Index("lower_name", function=lambda row: row["name"].downcase()),
+        ]
+
+
+class Label(Model):
+    name: str
+
+
+class Labelled(Model):
+    labels: List[Label]
+
+    @classmethod
+    def get_indexes(cls):
+        return [Index("labels", multi=True)]
+
+
+class SimplyLabelled(Model):
+    labels: List[Label]
+
+    @classmethod
+    def get_indexes(cls):
+        return ["labels"]
+
+
+class PlannerTest(TestCase):
+    """Check the chosen index, without database."""
+
+    def setUp(self) -> None:
+        """Activate soft deletion."""
+        self.soft_delete = db.SOFT_DELETE
+        db.SOFT_DELETE = True
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        """Restore soft deletion configuration."""
+        db.SOFT_DELETE = self.soft_delete
+        return super().tearDown()
+
+    def test_simple_index(self):
+        """A filtered property with an index uses get_all."""
+        plan = Place.query().filter({"name": "foo", "active": True}).explain()
+        self.assertEqual(plan["method"], "get_all")
+        self.assertEqual(plan["index"], "name")
+        self.assertEqual(plan["values"], ["foo"])
+        self.assertEqual(plan["filters"], [{"active": True}])
+        self.assertEqual(plan["soft_delete"], "filter")
+
+        query = str(Place.query().filter({"name": "foo"}).build(RethinkDB()))
+        self.assertIn("get_all('foo', index='name')", query)
+
+    def test_compound_index(self):
+        """Compound indexes are preferred when all properties are given."""
+        plan = (
+            Place.query()
+            .filter({"name": "foo"})
+            .filter({"city": "Paris", "country": "fr"})
+            .explain()
+        )
+        self.assertEqual(plan["method"], "get_all")
+        self.assertEqual(plan["index"], "country_city")
+        self.assertEqual(plan["values"], ["fr", "Paris"])
+        self.assertEqual(plan["filters"], [{"name": "foo"}])
+
+    def test_compound_prefix(self):
+        """The first properties of a compound index use between."""
+        queryset = Place.query().filter({"country": "fr"})
+        plan = queryset.explain()
+        self.assertEqual(plan["method"], "between")
+        self.assertEqual(plan["index"], "country_city")
+        self.assertEqual(plan["filters"], [])
+        self.assertIn("between", str(queryset.build(RethinkDB())))
+
+    def test_no_index(self):
+        """Without matching index, the soft delete index is used."""
+        for queryset in (
+            Place.query().filter({"city": "Paris"}),
+            Place.query().filter({"name": None}),
+            Place.query().filter(lambda row: row["name"] == "foo"),
+        ):
+            plan = queryset.explain()
+            self.assertEqual(plan["method"], "table")
+            self.assertIsNone(plan["index"])
+            self.assertEqual(plan["soft_delete"], "index")
+
+    def test_order_index(self):
+        """Ordering with an index disables index selection."""
+        plan = Place.query().filter({"name": "foo"}).order_by(index="name").explain()
+        self.assertEqual(plan["method"], "order_by")
+        self.assertEqual(plan["filters"], [{"name": "foo"}])
+
+    def test_repr(self):
+        """The representation does not need the connection pool."""
+        with mock.patch.object(db, "get_pool", side_effect=AssertionError):
+            self.assertIn(
+                "get_all('foo', index='name')",
+                repr(Place.query().filter({"name": "foo"})),
+            )
+
+    def test_not_selectable(self):
+        """Multi and function indexes are not used for dict filters."""
+        self.assertEqual(Tagged.indexed_fields(), {"name": ("name",)})
+        plan = Tagged.query().filter({"tags": "foo", "lower_name": "foo"}).explain()
+        self.assertEqual(plan["method"], "table")
+
+
+class IndexSpecTest(TestCase):
+    """Check index declarations."""
+
+    def test_specs(self):
+        """Strings, dicts and Index objects are normalized."""
+        specs = Tagged.index_specs()
+        self.assertEqual(list(specs), ["name", "tags", "lower_name"])
+        self.assertTrue(specs["tags"].multi)
+        self.assertEqual(
+            Place.index_specs()["country_city"].fields, ("country", "city")
+        )
+
+    def test_create(self):
+        """Index creation queries use the declared options."""
+        table = RethinkDB().table("tagged")
+        specs = Tagged.index_specs()
+        self.assertEqual(
+            str(specs["name"].create(table)), "r.table('tagged').index_create('name')"
+        )
+        self.assertIn("multi=True", str(specs["tags"].create(table)))
+        self.assertIn("downcase", str(specs["lower_name"].create(table)))
+        self.assertIn("geo=True", str(Index("location", geo=True).create(table)))
+
+
+class KeysetTest(TestCase):
+    """Check keyset pagination queries."""
+
+    def test_token(self):
+        """Tokens keep the index, the key and the last id."""
+        now = datetime.now().astimezone()
+        index, key, last_id = decode_token(
+            encode_token("country_city", ["fr", now], "x")
+        )
+        self.assertEqual(index, "country_city")
+        self.assertEqual(key[0], "fr")
+        self.assertEqual(key[1]["$reql_type$"], "TIME")
+        self.assertAlmostEqual(key[1]["epoch_time"], now.timestamp())
+        self.assertEqual(last_id, "x")
+        with self.assertRaises(ValueError):
+            decode_token("not a token")
+
+    def test_plan(self):
+        """Keyset pagination reads the index after the last key."""
+        token = encode_token("name", "foo", "x")
+        queryset = Place.query().filter({"city": "Paris"}).after(token)
+        plan = queryset.explain()
+        self.assertEqual(plan["method"], "keyset")
+        self.assertEqual(plan["values"], ["foo"])
+        query = str(queryset.build(RethinkDB()))
+        self.assertIn("between('foo', r.maxval, index='name')", query)
+        self.assertIn("order_by(index='name')", query)
+
+        with self.assertRaises(ValueError):
+            Place.query().after(token, index="country_city")
+        with self.assertRaises(ValueError):
+            Place.query().after(index="city")
+
+
+class JoinQueryTest(TestCase):
+    """Check the queries of joined list relations."""
+
+    @staticmethod
+    def children(model, order_by=None):
+        """Return the ReQL that selects objects linked to a label."""
+        # pylint: disable=protected-access
+        query = model._children_query(
+            RethinkDB(), "labels", True, "x", None, None, order_by
+        )
+        return str(query)
+
+    def test_multi_index(self):
+        """List relations use a multi index."""
+        self.assertIn("get_all('x', index='labels')", self.children(Labelled))
+
+    def test_simple_index(self):
+        """A simple index cannot find list elements."""
+        query = self.children(SimplyLabelled)
+        self.assertNotIn("get_all('x'", query)
+        self.assertIn("contains('x')", query)
+
+    def test_order_by(self):
+        """A dict order_by is given as keyword arguments."""
+        self.assertIn(
+            "order_by(index='labels')", self.children(Labelled, {"index": "labels"})
+        )
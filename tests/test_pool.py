@@ -0,0 +1,146 @@
+"""Tests on the connection pool."""
+
+from threading import Thread
+from unittest.case import TestCase
+
+from rethinkdb import errors
+from rethinkmodel import config, db
+from rethinkmodel.db import ConnectionPool, connect, connection
+from rethinkmodel.manage import manage
+from rethinkmodel.model import Model
+
+from tests.utils import clean
+
+DB_NAME = "test_pool"
+
+
+class PooledUser(Model):
+    """A simple user."""
+
+    name: str
+
+
+clean(DB_NAME)
+
+
+class PoolTest(TestCase):
+    """Make some tests on connection borrowing."""
+
+    def setUp(self) -> None:
+        """Configure a small pool."""
+        config(dbname=DB_NAME, pool_max_size=2, pool_wait_timeout=1)
+        return super().setUp()
+
+    def test_reuse_connection(self):
+        """A released connection should be reused."""
+        with connection() as (rdb, conn):
+            rdb.expr(1).run(conn)
+        with connection() as (rdb, conn):
+            rdb.expr(1).run(conn)
+
+        stats = db.pool_stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["in_use"], 0)
+        self.assertEqual(stats["idle"], 1)
+
+    def test_connect_close_release(self):
+        """Closing a connection from connect() gives it back to the pool."""
+        rdb, conn = connect()
+        self.assertEqual(rdb.expr(1).run(conn), 1)
+        self.assertEqual(db.pool_stats()["in_use"], 1)
+        conn.close()
+        self.assertEqual(db.pool_stats()["in_use"], 0)
+
+    def test_connect_without_close(self):
+        """A connection that is not closed is given back when it's destroyed."""
+        for _ in range(3):
+            rdb, conn = connect()
+            self.assertEqual(rdb.expr(1).run(conn), 1)
+            del conn
+
+        stats = db.pool_stats()
+        self.assertEqual(stats["in_use"], 0)
+        self.assertLessEqual(stats["created"], 2)
+
+    def test_max_size(self):
+        """The pool must not open more than max_size connections."""
+        pool = ConnectionPool(max_size=2, wait_timeout=0.2)
+        first = pool.acquire()
+        second = pool.acquire()
+        with self.assertRaises(errors.ReqlDriverError):
+            pool.acquire()
+
+        # a waiter gets the released connection
+        got = []
+        thread = Thread(target=lambda: got.append(pool.acquire(timeout=5)))
+        thread.start()
+        pool.release(first)
+        thread.join()
+
+        self.assertIs(got[0], first)
+        self.assertEqual(pool.stats()["created"], 2)
+        pool.release(second)
+        pool.release(got[0])
+        pool.close()
+
+    def test_min_size(self):
+        """The pool created by get_pool() opens min_size connections."""
+        config(dbname=DB_NAME, pool_min_size=2, pool_max_size=2)
+        stats = db.pool_stats()
+        self.assertEqual(stats["created"], 2)
+        self.assertEqual(stats["idle"], 2)
+
+    def test_broken_connection(self):
+        """A broken connection is reopened on next borrow."""
+        pool = ConnectionPool(max_size=1, check_interval=0)
+        conn = pool.acquire()
+        pool.release(conn)
+
+        # simulate a broken socket
+        conn.close(noreply_wait=False)
+
+        conn = pool.acquire()
+        self.assertTrue(conn.is_open())
+        self.assertEqual(pool.rdb.expr(1).run(conn), 1)
+        self.assertEqual(pool.stats()["recycled"], 1)
+        pool.release(conn)
+        pool.close()
+
+
+class ModelConnectionTest(TestCase):
+    """Models must not keep connections."""
+
+    def setUp(self) -> None:
+        """Configure database and create tables."""
+        config(dbname=DB_NAME, pool_max_size=2)
+        manage(__name__)
+        return super().setUp()
+
+    def test_no_connection_per_instance(self):
+        """Building objects should not borrow connections."""
+        PooledUser.truncate()
+        users = [PooledUser(name=f"user{i}") for i in range(20)]
+        self.assertEqual(db.pool_stats()["in_use"], 0)
+
+        for user in users:
+            user.save()
+
+        fetched = PooledUser.get_all()
+        self.assertEqual(len(fetched), 20)
+
+        stats = db.pool_stats()
+        self.assertEqual(stats["in_use"], 0)
+        self.assertLessEqual(stats["created"], 2)
+
+    def test_stream_with_one_connection(self):
+        """Streamed objects can be saved when the pool has one connection."""
+        config(dbname=DB_NAME, pool_max_size=1, pool_wait_timeout=1)
+        PooledUser.truncate()
+        PooledUser.save_many([PooledUser(name=f"user{i}") for i in range(3)])
+
+        for user in PooledUser.query().stream(chunk_size=1):
+            user.name = user.name.upper()
+            user.save()
+
+        self.assertEqual(len(PooledUser.filter({"name": "USER0"})), 1)
+        self.assertEqual(db.pool_stats()["dedicated"], 0)
@@ -0,0 +1,142 @@
+"""Tests on lazy queries."""
+
+from unittest.case import TestCase
+
+from rethinkmodel import config, db
+from rethinkmodel.manage import manage
+from rethinkmodel.model import Model
+
+from tests.utils import clean
+
+DB_NAME = "test_query"
+
+
+class QueriedUser(Model):
+    """A simple user."""
+
+    name: str
+    age: int
+
+    @classmethod
+    def get_indexes(cls):
+        """Index on age, with duplicated values."""
+        return ["age"]
+
+
+clean(DB_NAME)
+
+
+class QuerySetTest(TestCase):
+    """Make some tests on QuerySet."""
+
+    def setUp(self) -> None:
+        """Create some users."""
+        config(dbname=DB_NAME)
+        manage(__name__)
+        QueriedUser.truncate()
+        for i in range(20):
+            QueriedUser(name=f"user{i:02d}", age=i % 2).save()
+        return super().setUp()
+
+    def test_filter_before_paginate(self):
+        """Skip and limit are applied after the filter."""
+        users = QueriedUser.filter({"age": 1}, order_by="name", offset=2, limit=3)
+        self.assertEqual([u.name for u in users], ["user05", "user07", "user09"])
+
+    def test_chaining(self):
+        """Methods can be chained in any order."""
+        query = QueriedUser.query().limit(3).skip(2).order_by("name").filter({"age": 1})
+        self.assertEqual([u.name for u in query], ["user05", "user07", "user09"])
+        self.assertEqual(len(query), 3)
+        self.assertEqual(query.first().name, "user05")
+
+    def test_lazy_and_cached(self):
+        """The query is not executed before it's needed, and only once."""
+        query = QueriedUser.query().order_by("name")
+        QueriedUser(name="user20", age=0).save()
+        results = query.all()
+        self.assertEqual(len(results), 21)
+        self.assertIs(query.all(), results)
+
+    def test_slicing(self):
+        """Slices use skip and limit."""
+        query = QueriedUser.query().order_by("name")
+        self.assertEqual([u.name for u in query[3:5]], ["user03", "user04"])
+        self.assertEqual(query[10].name, "user10")
+        self.assertEqual(query.count(), 20)
+
+    def test_pluck(self):
+        """Only plucked fields are set."""
+        user = QueriedUser.query().order_by("name").pluck("id", "name").first()
+        self.assertEqual(user.name, "user00")
+        self.assertIsNone(user.age)
+
+    def test_stream(self):
+        """Stream objects from cursor."""
+        names = [
+            user.name
+            for user in QueriedUser.stream(
+                {"age": 0}, order_by="name", chunk_size=3, max_batch_rows=2
+            )
+        ]
+        self.assertEqual(names, [f"user{i:02d}" for i in range(0, 20, 2)])
+
+    def test_stream_early_exit(self):
+        """The connection is closed when the stream is closed."""
+        stream = QueriedUser.query().stream(max_batch_rows=1)
+        next(stream)
+        self.assertEqual(db.pool_stats()["in_use"], 0)
+        self.assertEqual(db.pool_stats()["dedicated"], 1)
+        stream.close()
+        self.assertEqual(db.pool_stats()["dedicated"], 0)
+
+    def test_keyset_pagination(self):
+        """Pages are read from the index with continuation tokens."""
+        for keyset in ("id", "age"):
+            seen = []
+            page = QueriedUser.filter(
+                lambda row: row["name"].ne("user00"), limit=6, keyset=keyset
+            )
+            while page:
+                seen.extend(page)
+                if page.next_token is None:
+                    break
+                page = QueriedUser.filter(
+                    lambda row: row["name"].ne("user00"),
+                    limit=6,
+                    after=page.next_token,
+                )
+
+            self.assertEqual(len(seen), 19)
+            self.assertEqual(len({user.id for user in seen}), 19)
+            keys = [getattr(user, keyset) for user in seen]
+            self.assertEqual(keys, sorted(keys))
+
+        with self.assertRaises(ValueError):
+            QueriedUser.get_all(keyset="name")
+
+    def test_projection(self):
+        """Deferred fields are loaded on first access, in one query."""
+        user = QueriedUser.query().order_by("name").only("name").first()
+        self.assertEqual(user.name, "user00")
+        self.assertEqual(
+            user.deferred_fields(), {"age", "created_on", "updated_on", "deleted_on"}
+        )
+        self.assertEqual(user.age, 0)
+        self.assertEqual(user.deferred_fields(), set())
+        self.assertIsNotNone(user.created_on)
+
+        users = QueriedUser.filter({"age": 1}, fields=["name"])
+        self.assertEqual(len(users), 10)
+        self.assertIn("age", users[0].deferred_fields())
+
+        user = QueriedUser.get(users[0].id, fields=["age"])
+        self.assertIn("name", user.deferred_fields())
+        user.age = 3
+        user.save()
+        self.assertIn("name", user.deferred_fields())
+        self.assertEqual(QueriedUser.get(user.id).name, users[0].name)
+        self.assertIsNone(QueriedUser.get("missing", fields=["age"]))
+
+        user = QueriedUser.query().defer("name").first()
+        self.assertEqual(user.deferred_fields(), {"name"})
@@ -84,3 +84,49 @@ class TestOneToMany(TestCase):
         self.assertGreater(len(filtered_images), 0)
         for image in filtered_images:
             self.assertEqual(image.gallery.id, gallery.id)
+
+    def test_prefetch(self):
+        """Linked objects are the same with or without prefetch."""
+        users = [User(name=f"Prefetched{i}").save() for i in range(3)]
+        galleries = [
+            Gallery(name=f"Prefetch{i}", contributors=users[i:]).save()
+            for i in range(3)
+        ]
+        ids = [gallery.id for gallery in galleries]
+
+        def select(row):
+            return (
+                row["id"].eq(ids[0]).or_(row["id"].eq(ids[1])).or_(row["id"].eq(ids[2]))
+            )
+
+        prefetched = Gallery.filter(select, order_by="name")
+        fetched = Gallery.filter(select, order_by="name", prefetch=False)
+
+        self.assertEqual(len(prefetched), 3)
+        for first, second in zip(prefetched, fetched):
+            self.assertEqual(
+                [user.id for user in first.contributors],
+                [user.id for user in second.contributors],
+            )
+
+        # same id, same object
+        self.assertIs(prefetched[0].contributors[2], prefetched[2].contributors[0])
+
+    def test_server_side_join(self):
+        """Join is made in one query, on one object or on a list."""
+        gallery = Gallery(name="ServerJoin", contributors=[]).save()
+        for i in range(4):
+            Image(name=f"server{i}", gallery=gallery).save()
+
+        joined = Gallery.get(gallery.id).join(
+            Image, server_side=True, order_by="name", limit=2, offset=1
+        )
+        self.assertEqual(
+            [image.name for image in joined.images], ["server1", "server2"]
+        )
+        for image in joined.images:
+            self.assertIs(image.gallery, joined)
+
+        galleries = Gallery.filter({"name": "ServerJoin"}).join(Image)
+        self.assertEqual(len(galleries), 1)
+        self.assertEqual(len(galleries[0].images), 4)
@@ -0,0 +1,77 @@
+"""Tests on compiled model schema."""
+# pylint: disable=missing-class-docstring,too-few-public-methods
+
+from typing import List, Optional, Type
+from unittest import TestCase
+
+from rethinkmodel.model import DEFERRED, Model
+
+
+class Owner(Model):
+    name: Type[str]
+    tags: Optional[List[str]]
+    level: int = 1
+
+
+class Project(Model):
+    owner: Optional[Owner]
+    contributors: List[Owner]
+    name: str
+
+
+class SchemaTest(TestCase):
+    """Check the schema introspection."""
+
+    def test_relations(self):
+        """Linked fields are detected."""
+        schema = Project.schema()
+        self.assertEqual(schema.relations, {"owner": Owner})
+        self.assertEqual(schema.list_relations, {"contributors": Owner})
+        self.assertIn("owner", schema.optional)
+        self.assertNotIn("name", schema.optional)
+        self.assertEqual(
+            schema.fields,
+            ("id", "created_on", "deleted_on", "updated_on")
+            + ("owner", "contributors", "name"),
+        )
+
+    def test_defaults(self):
+        """Class attributes are used as default values."""
+        owner = Owner(name="foo")
+        self.assertEqual(owner.level, 1)
+        self.assertIsNone(owner.tags)
+
+    def test_cache(self):
+        """Schema is computed once, and refreshed when annotations change."""
+        schema = Owner.schema()
+        self.assertIs(Owner.schema(), schema)
+
+        class Changing(Model):
+            name: str
+
+        first = Changing.schema()
+        Changing.__annotations__["other"] = str
+        self.assertIsNot(Changing.schema(), first)
+        self.assertIn("other", Changing.schema().fields)
+
+    def test_deferred(self):
+        """Deferred fields are not loaded, and linked objects not fetched."""
+        deferred = Project.query().only("name").deferred_fields()
+        self.assertIn("owner", deferred)
+        self.assertNotIn("id", deferred)
+
+        documents = [{"id": "p1", "name": "foo", "owner": "o1"}]
+        for prefetch in (False, True):
+            project = Project.from_documents(
+                [dict(document) for document in documents],
+                prefetch=prefetch,
+                deferred=deferred,
+            )[0]
+            self.assertEqual(project.deferred_fields(), set(deferred))
+            self.assertEqual(project.changed_fields(), set())
+            self.assertIn("<deferred>", repr(project))
+
+        # assigned fields are not deferred anymore
+        project.owner = None
+        self.assertNotIn("owner", project.deferred_fields())
+        self.assertIsNot(project.owner, DEFERRED)
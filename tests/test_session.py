@@ -0,0 +1,107 @@
+"""Tests on sessions."""
+# pylint: disable=missing-class-docstring
+from typing import List, Optional
+from unittest.case import TestCase
+
+import rethinkmodel
+from rethinkmodel import config
+from rethinkmodel.manage import manage
+from rethinkmodel.model import Model
+
+from tests.utils import clean
+
+DB_NAME = "test_session"
+
+
+class SessionUser(Model):
+    name: str
+
+
+class SessionProject(Model):
+    name: str
+    owner: Optional[SessionUser]
+    members: List[SessionUser]
+
+
+clean(DB_NAME)
+
+
+class SessionTest(TestCase):
+    """Make some tests on identity map and queued writes."""
+
+    def setUp(self) -> None:
+        """Create a user with projects."""
+        config(dbname=DB_NAME)
+        manage(__name__)
+        SessionProject.truncate()
+        SessionUser.truncate()
+        self.user = SessionUser(name="owner").save()
+        for i in range(3):
+            SessionProject(
+                name=f"project{i}", owner=self.user, members=[self.user]
+            ).save()
+        return super().setUp()
+
+    def test_identity_map(self):
+        """Repeated loads return the same instance."""
+        with rethinkmodel.session():
+            user = SessionUser.get(self.user.id)
+            self.assertIs(SessionUser.get(self.user.id), user)
+            projects = SessionProject.get_all()
+            for project in projects:
+                self.assertIs(project.owner, user)
+                self.assertIs(project.members[0], user)
+            self.assertIs(SessionProject.get(projects[0].id), projects[0])
+
+        self.assertIsNot(SessionUser.get(self.user.id), SessionUser.get(self.user.id))
+
+    def test_queued_writes(self):
+        """Writes are sent when the session ends."""
+        with rethinkmodel.session() as current:
+            user = SessionUser(name="new user")
+            project = SessionProject(name="new project", owner=user, members=[])
+            project.save()
+            user.save()
+            self.assertIsNone(project.id)
+            self.assertEqual(len(current.pending()), 2)
+
+        # the linked user is saved first
+        self.assertIsNotNone(user.id)
+        self.assertEqual(SessionProject.get(project.id).owner.name, "new user")
+
+    def test_rollback(self):
+        """Queued writes are dropped on error."""
+        with self.assertRaises(RuntimeError):
+            with rethinkmodel.session():
+                SessionUser(name="dropped").save()
+                raise RuntimeError("stop")
+
+        self.assertEqual(len(SessionUser.filter({"name": "dropped"})), 0)
+
+    def test_deferred_fields(self):
+        """Deferred fields of a loaded object are loaded in a session."""
+        with rethinkmodel.session():
+            user = SessionUser.get(self.user.id)
+            project = SessionProject.query().only("name").first()
+            self.assertIs(project.owner, user)
+            self.assertEqual(project.deferred_fields(), set())
+            project.name = "renamed"
+            project.save()
+
+        saved = SessionProject.get(project.id)
+        self.assertEqual(saved.name, "renamed")
+        self.assertEqual(saved.owner.id, self.user.id)
+
+    def test_modified_objects(self):
+        """Modified objects are updated with their changed fields."""
+        with rethinkmodel.session() as current:
+            for project in SessionProject.get_all(fields=["name"]):
+                project.name = project.name.upper()
+                project.save()
+            report = current.flush()
+            self.assertEqual(report["replaced"], 3)
+            self.assertEqual(report["inserted"], 0)
+
+        for project in SessionProject.get_all():
+            self.assertTrue(project.name.startswith("PROJECT"))
+            self.assertEqual(project.owner.id, self.user.id)
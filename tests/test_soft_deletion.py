@@ -1,8 +1,11 @@
 """Tests with soft deletion."""
 
+import io
+import json
+from datetime import datetime, timedelta
 from unittest.case import TestCase
 
-from rethinkmodel import config
+from rethinkmodel import config, db
 from rethinkmodel.db import connect
 from rethinkmodel.manage import manage
 from rethinkmodel.model import Model
@@ -66,3 +69,68 @@ class SoftDeletionTest(TestCase):
         for user in second_users:
             if user.id == kept:
                 self.fail(f"The user id {user.id} is still fetched")
+
+    def test_soft_delete_index(self):
+        """The index used to select objects that are not deleted exists."""
+        rdb, conn = connect()
+        indexes = rdb.table(SoftUser.tablename).index_list().run(conn)
+        conn.close()
+        self.assertIn(db.SOFT_DELETE_INDEX, indexes)
+
+        SoftUser.truncate()
+        users = [SoftUser(name=f"Indexed{i}").save() for i in range(3)]
+        users[0].delete()
+
+        self.assertEqual(SoftUser.query().count(), 2)
+        self.assertIsNone(SoftUser.get(users[0].id))
+        self.assertIsNotNone(SoftUser.get(users[1].id))
+
+    def test_purge(self):
+        """Old soft deleted objects are archived and deleted by batches."""
+        SoftUser.truncate()
+        users = [SoftUser(name=f"Purged{i}").save() for i in range(5)]
+        for user in users[:4]:
+            user.delete()
+
+        # nothing is deleted before the cutoff
+        self.assertEqual(SoftUser.purge(datetime.now() - timedelta(days=1)), 0)
+
+        archive = io.StringIO()
+        purged = SoftUser.purge(
+            datetime.now() + timedelta(seconds=1), batch_size=3, archive=archive
+        )
+        self.assertEqual(purged, 4)
+        lines = archive.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(
+            {json.loads(line)["name"] for line in lines},
+            {f"Purged{i}" for i in range(4)},
+        )
+
+        rdb, conn = connect()
+        self.assertEqual(rdb.table(SoftUser.tablename).count().run(conn), 1)
+        conn.close()
+
+    def test_purge_keeps_restored(self):
+        """Objects restored while they are archived are not deleted."""
+        SoftUser.truncate()
+        users = [SoftUser(name=f"Restored{i}").save() for i in range(2)]
+        for user in users:
+            user.delete()
+
+        class RestoringArchive(io.StringIO):
+            """Archive that restores the first user when it's flushed."""
+
+            def flush(self):
+                super().flush()
+                rdb, conn = connect()
+                rdb.table(SoftUser.tablename).get(users[0].id).update(
+                    {"deleted_on": None}
+                ).run(conn)
+                conn.close()
+
+        purged = SoftUser.purge(
+            datetime.now() + timedelta(seconds=1), archive=RestoringArchive()
+        )
+        self.assertEqual(purged, 1)
+        self.assertIsNotNone(SoftUser.get(users[0].id))